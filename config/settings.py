@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "users",
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "lm.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -73,12 +75,17 @@ WSGI_APPLICATION = "config.wsgi.application"
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
+        "lm.search.FullTextSearchFilter",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "lm.paginations.CustomPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "lm.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.TokenAuthentication",
     ],
@@ -88,6 +95,9 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Списки сериализуются из .values() (lm.fastpath); False возвращает ModelSerializer
+FAST_LIST_SERIALIZATION = False if os.getenv("FAST_LIST_SERIALIZATION") == "False" else True
+
 if "test" in sys.argv:
     DATABASES = {
         "default": {
@@ -142,6 +152,18 @@ STATIC_URL = "static/"
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+MEDIA_URL = "media/"
+
+MEDIA_ROOT = BASE_DIR / "media"
+
+# Файлы материалов отдает nginx по X-Accel-Redirect (internal location, см. nginx/nginx.conf)
+MEDIA_ACCEL_REDIRECT = True if os.getenv("MEDIA_ACCEL_REDIRECT") == "True" else False
+
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+
+# Максимальный размер файла материала при загрузке по частям
+MATERIAL_UPLOAD_MAX_SIZE = 5 * 1024**3
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -153,8 +175,16 @@ AUTH_USER_MODEL = "users.CustomUser"
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "users.tokens.UserClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.tokens.UserClaimsTokenRefreshSerializer",
 }
 
+# Сколько секунд кэшируется состояние пользователя (is_active, role, is_staff) для проверки JWT с claims
+AUTH_STATE_CACHE_TIMEOUT = 60
+
+# Сколько секунд хранится профиль прав пользователя (users.access); изменения сбрасывают его сигналами
+ACCESS_CACHE_TIMEOUT = 60 * 15
+
 STRIPE_API_KEY = os.getenv("STRIPE_API_KEY")
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
@@ -165,6 +195,11 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+# Обработка медиафайлов выполняется отдельным пулом процессов (сервис celery_media)
+CELERY_TASK_ROUTES = {
+    "lm.tasks.process_material_media": {"queue": "media"},
+}
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
@@ -172,6 +207,36 @@ CACHES = {
     }
 }
 
+# Буфер событий прогресса (lm/progress.py); None - буфер в памяти процесса
+PROGRESS_BUFFER_URL = CACHES["default"]["LOCATION"]
+
+# Фильтры Блума для проверок членства (lm/bloom.py); None - фильтры в памяти процесса
+BLOOM_FILTER_URL = CACHES["default"]["LOCATION"]
+# Начальная емкость слоя и допустимая доля ложноположительных ответов
+BLOOM_FILTER_CAPACITY = int(os.getenv("BLOOM_FILTER_CAPACITY", 100_000))
+BLOOM_FILTER_ERROR_RATE = float(os.getenv("BLOOM_FILTER_ERROR_RATE", 0.001))
+
+# Асинхронный клиент кэша для lm.async_views (redis.asyncio); None - асинхронные методы кэша Django
+ASYNC_CACHE_URL = CACHES["default"]["LOCATION"]
+
+# Метрики запросов (lm/metrics.py): снимки процессов в Redis; None - в памяти процесса
+METRICS_URL = CACHES["default"]["LOCATION"]
+METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", 30))
+# Токен для сборщика Prometheus (Authorization: Bearer ...); без него /metrics/ доступен только staff
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+if "test" in sys.argv:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+    PROGRESS_BUFFER_URL = None
+    BLOOM_FILTER_URL = None
+    ASYNC_CACHE_URL = None
+    METRICS_URL = None
+    CELERY_TASK_ALWAYS_EAGER = True
+
 EMAIL_HOST = "smtp.yandex.ru"
 EMAIL_PORT = 465
 EMAIL_HOST_USER = "your@yandex.ru"
@@ -186,9 +251,25 @@ CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
 CELERY_BEAT_SCHEDULE = {
     "last_user_login": {
-        "task": "lms.tasks.last_user_login",
+        "task": "lm.tasks.last_user_login",
         "schedule": timedelta(days=30),
     },
+    "flush_progress": {
+        "task": "lm.tasks.flush_progress",
+        "schedule": timedelta(seconds=10),
+    },
+    "cleanup_upload_sessions": {
+        "task": "lm.tasks.cleanup_upload_sessions",
+        "schedule": timedelta(hours=1),
+    },
+    "collect_blobs": {
+        "task": "lm.tasks.collect_blobs",
+        "schedule": timedelta(days=1),
+    },
+    "rebuild_bloom_filters": {
+        "task": "lm.tasks.rebuild_bloom_filters",
+        "schedule": timedelta(days=1),
+    },
 }
 
 SWAGGER_SETTINGS = {
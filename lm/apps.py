@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.backends.signals import connection_created
 
 
 class LmConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "lm"
+
+    def ready(self):
+        from lm import signals  # noqa: F401
+        from lm.metrics import install_query_wrapper
+
+        # Учет запросов к базе для lm.middleware.RequestMetricsMiddleware
+        connection_created.connect(install_query_wrapper)
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(connection=connection)
@@ -0,0 +1,137 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.response import Response
+
+from lm.cache import CachedResponseMixin, aget_generations, get_async_cache
+from lm.renderers import FastJSONRenderer
+from lm.views import (
+    CourseDetailView,
+    CourseListView,
+    EducationalModuleDetailView,
+    EducationalModuleListView,
+    EnrollmentListView,
+    MaterialDetailView,
+    MaterialListView,
+)
+from users.authentication import AsyncJWTAuthentication, aauthenticate
+
+
+class AsyncReadView(View):
+    """
+    Асинхронное чтение для ASGI. Queryset, фильтры, пагинация, сериализатор и права берутся
+    из синхронного представления sync_view; база читается через aget/aiterator, кэш ответов -
+    через асинхронный клиент (общие записи с синхронным представлением). Рендерится только JSON.
+    Условные GET (ETag) и быстрый путь .values() остаются на синхронных представлениях.
+    """
+
+    sync_view = None
+    authentication_classes = [AsyncJWTAuthentication, SessionAuthentication, TokenAuthentication]
+    renderer_classes = [FastJSONRenderer]
+
+    def get_sync_view(self, request, *args, **kwargs):
+        view = self.sync_view(
+            authentication_classes=self.authentication_classes, renderer_classes=self.renderer_classes
+        )
+        view.args, view.kwargs = args, kwargs
+        view.format_kwarg = None
+        view.headers = view.default_response_headers
+        view.request = view.initialize_request(request, *args, **kwargs)
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        view = self.get_sync_view(request, *args, **kwargs)
+        request = view.request
+        try:
+            await aauthenticate(request)
+            view.initial(request, *args, **kwargs)
+            response = await self.get_cached_response(view, request)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(request, response, *args, **kwargs)
+        # JSON рендерится здесь же: ответ с render() Django отправил бы в поток
+        response.render()
+        return HttpResponse(response.content, status=response.status_code, headers=dict(response.items()))
+
+    async def get_cached_response(self, view, request):
+        if not isinstance(view, CachedResponseMixin):
+            return await self.handle(view, request)
+        async_cache = get_async_cache()
+        key = view.make_cache_key(request, await aget_generations(view.cache_namespaces))
+        data = await async_cache.aget(key)
+        if data is not None:
+            return Response(data)
+        response = await self.handle(view, request)
+        if response.status_code == 200:
+            await async_cache.aset(key, response.data, view.cache_timeout)
+        return response
+
+    async def filter_queryset(self, view, queryset):
+        """
+        Фильтры только строят запрос, кроме django-filter: форма проверяет связанные объекты в базе,
+        поэтому при переданных полях filterset фильтрация выполняется в потоке.
+        """
+        if getattr(view, "filterset_class", None) or any(
+            name in view.request.query_params for name in getattr(view, "filterset_fields", ())
+        ):
+            return await sync_to_async(view.filter_queryset)(queryset)
+        return view.filter_queryset(queryset)
+
+    async def handle(self, view, request):
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    async def handle(self, view, request):
+        queryset = await self.filter_queryset(view, view.get_queryset())
+        if view.paginator is None:
+            rows = [row async for row in queryset]
+            return Response(view.get_serializer(rows, many=True).data)
+        page = await view.paginator.apaginate_queryset(queryset, request, view=view)
+        return view.paginator.get_paginated_response(view.get_serializer(page, many=True).data)
+
+
+class AsyncDetailView(AsyncReadView):
+    async def handle(self, view, request):
+        queryset = await self.filter_queryset(view, view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            obj = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        view.check_object_permissions(request, obj)
+        return Response(view.get_serializer(obj).data)
+
+
+# Курсы
+class AsyncCourseListView(AsyncListView):
+    sync_view = CourseListView
+
+
+class AsyncCourseDetailView(AsyncDetailView):
+    sync_view = CourseDetailView
+
+
+# Модули
+class AsyncEducationalModuleListView(AsyncListView):
+    sync_view = EducationalModuleListView
+
+
+class AsyncEducationalModuleDetailView(AsyncDetailView):
+    sync_view = EducationalModuleDetailView
+
+
+# Материалы
+class AsyncMaterialListView(AsyncListView):
+    sync_view = MaterialListView
+
+
+class AsyncMaterialDetailView(AsyncDetailView):
+    sync_view = MaterialDetailView
+
+
+# Записи на модули
+class AsyncEnrollmentListView(AsyncListView):
+    sync_view = EnrollmentListView
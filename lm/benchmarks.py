@@ -0,0 +1,223 @@
+import itertools
+import math
+import random
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from lm.models import Course, EducationalModule, Enrollment, Material
+from users.tokens import UserClaimsAccessToken
+
+User = get_user_model()
+
+# Префикс сгенерированных данных (seed_benchmark_data): по нему данные находятся и удаляются
+SEED_PREFIX = "bench_"
+SEED_EMAIL_DOMAIN = "bench.example.com"
+SEED_ADMIN = f"{SEED_PREFIX}admin"
+# Сколько ID каждого вида держать для detail-запросов
+SAMPLE_SIZE = 1000
+
+
+def percentile(values, q):
+    """Процентиль по ближайшему рангу; values отсортированы"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) * 1e3 if latencies else 0.0,
+            "p50": percentile(latencies, 0.50) * 1e3,
+            "p95": percentile(latencies, 0.95) * 1e3,
+            "p99": percentile(latencies, 0.99) * 1e3,
+            "max": (latencies[-1] if latencies else 0.0) * 1e3,
+        },
+    }
+
+
+class BenchmarkContext:
+    """
+    Данные, которыми параметризуются запросы: пользователи с токенами, выборки ID из сгенерированных данных
+    и курс/модуль прогона, к которым привязываются созданные записи (удаляются после прогона).
+    """
+
+    def __init__(self, seed, marker):
+        self.rng = random.Random(seed)
+        self.marker = marker
+        teachers = User.objects.filter(username__startswith=f"{SEED_PREFIX}teacher_").order_by("id")
+        self.teacher = teachers.first()
+        self.admin = User.objects.filter(username=SEED_ADMIN).first()
+        self.student = (
+            User.objects.filter(username__startswith=f"{SEED_PREFIX}student_", enrollments__isnull=False)
+            .order_by("id")
+            .first()
+        )
+        if self.teacher is None or self.admin is None or self.student is None:
+            raise LookupError("Нет сгенерированных данных: сначала выполните seed_benchmark_data")
+        self.tokens = {
+            role: str(UserClaimsAccessToken.for_user(user))
+            for role, user in (("teacher", self.teacher), ("student", self.student), ("admin", self.admin))
+        }
+
+        self.course_ids = self.sample(Course.objects.filter(teacher__in=teachers))
+        self.module_ids = self.sample(EducationalModule.objects.filter(author__in=teachers))
+        self.material_ids = self.sample(Material.objects.filter(uploaded_by__in=teachers))
+        self.student_ids = self.sample(User.objects.filter(username__startswith=f"{SEED_PREFIX}student_"))
+        self.enrollment_ids = self.sample(Enrollment.objects.filter(student=self.student))
+        self.progress_course_ids = self.sample(Course.objects.filter(student_progress__student=self.student))
+
+        self.course = Course.objects.create(title=marker, description=marker, teacher=self.teacher)
+        self.module = EducationalModule.objects.create(
+            order_number=0, title=marker, description=marker, course=self.course, author=self.teacher
+        )
+        self.module_numbers = itertools.count(1)
+
+    def sample(self, queryset):
+        ids = list(queryset.order_by("id").values_list("id", flat=True)[: SAMPLE_SIZE * 10])
+        return self.rng.sample(ids, min(SAMPLE_SIZE, len(ids)))
+
+    def choice(self, ids):
+        return ids[self.rng.randrange(len(ids))]
+
+    def new_module(self):
+        """
+        Новый модуль курса прогона: повторная запись студента на тот же модуль отклоняется.
+        Номера модулей курса прогона берутся из общего счетчика module_numbers, они уникальны в курсе.
+        """
+        return EducationalModule.objects.create(
+            order_number=next(self.module_numbers),
+            title=self.marker,
+            description=self.marker,
+            course=self.course,
+            author=self.teacher,
+        )
+
+    def cleanup(self):
+        """Удаляет все, что создано запросами прогона"""
+        self.course.delete()
+        Course.objects.filter(title__startswith=self.marker).delete()
+        Material.objects.filter(title__startswith=self.marker).delete()
+        User.objects.filter(username__startswith=self.marker).delete()
+
+
+class Scenario:
+    """
+    Запрос к эндпоинту: URL по имени, роль, kwargs URL и тело/параметры из контекста.
+    label - ключ в отчете; по умолчанию имя URL.
+    """
+
+    def __init__(self, name, role, method="get", kwargs=None, data=None, status=200, label=None):
+        self.name = name
+        self.role = role
+        self.method = method
+        self.kwargs = kwargs
+        self.data = data
+        self.status = status
+        self.label = label or name
+
+    def build(self, context, number):
+        """(путь, данные, заголовки) для запроса номер number"""
+        path = reverse(self.name, kwargs=self.kwargs(context) if self.kwargs else None)
+        data = self.data(context, number) if self.data else {}
+        headers = {"Authorization": f"Bearer {context.tokens[self.role]}"}
+        return path, data, headers
+
+
+def list_scenarios(name, role):
+    return [
+        Scenario(name, role),
+        Scenario(name, role, data=lambda context, number: {"pagination": "cursor"}, label=f"{name} cursor"),
+    ]
+
+
+SCENARIOS = [
+    # Списки
+    *list_scenarios("lm:course-list", "teacher"),
+    *list_scenarios("lm:module-list", "teacher"),
+    *list_scenarios("lm:material-list", "teacher"),
+    *list_scenarios("lm:enrollment-list", "student"),
+    *list_scenarios("users:user-list", "teacher"),
+    Scenario("lm:course-list", "teacher", data=lambda context, number: {"page": 100}, label="lm:course-list page 100"),
+    Scenario("lm:async-course-list", "teacher"),
+    Scenario("lm:async-module-list", "teacher"),
+    Scenario("lm:async-material-list", "teacher"),
+    Scenario("lm:async-enrollment-list", "student"),
+    # Детальные
+    Scenario("lm:course-detail", "teacher", kwargs=lambda context: {"pk": context.choice(context.course_ids)}),
+    Scenario("lm:course-outline", "teacher", kwargs=lambda context: {"pk": context.choice(context.course_ids)}),
+    Scenario("lm:module-detail", "teacher", kwargs=lambda context: {"pk": context.choice(context.module_ids)}),
+    Scenario("lm:material-detail", "teacher", kwargs=lambda context: {"pk": context.choice(context.material_ids)}),
+    Scenario("lm:enrollment-detail", "student", kwargs=lambda context: {"pk": context.choice(context.enrollment_ids)}),
+    Scenario("users:user-detail", "teacher", kwargs=lambda context: {"pk": context.choice(context.student_ids)}),
+    Scenario("lm:async-course-detail", "teacher", kwargs=lambda context: {"pk": context.choice(context.course_ids)}),
+    Scenario("lm:async-module-detail", "teacher", kwargs=lambda context: {"pk": context.choice(context.module_ids)}),
+    Scenario(
+        "lm:async-material-detail", "teacher", kwargs=lambda context: {"pk": context.choice(context.material_ids)}
+    ),
+    Scenario("lm:course-stats", "admin", kwargs=lambda context: {"pk": context.choice(context.course_ids)}),
+    Scenario(
+        "lm:course-student-progress",
+        "student",
+        kwargs=lambda context: {"pk": context.choice(context.progress_course_ids), "student_id": context.student.pk},
+    ),
+    # Создание
+    Scenario(
+        "lm:course-create",
+        "teacher",
+        "post",
+        data=lambda context, number: {"title": f"{context.marker} {number}", "description": "Benchmark"},
+        status=201,
+    ),
+    Scenario(
+        "lm:module-create",
+        "teacher",
+        "post",
+        data=lambda context, number: {
+            "order_number": next(context.module_numbers),
+            "title": f"{context.marker} {number}",
+            "description": "Benchmark",
+            "course": context.course.pk,
+        },
+        status=201,
+    ),
+    Scenario(
+        "lm:material-create",
+        "teacher",
+        "post",
+        data=lambda context, number: {"title": f"{context.marker} {number}", "content": "Benchmark", "type": "text"},
+        status=201,
+    ),
+    Scenario(
+        "lm:enrollment-create",
+        "student",
+        "post",
+        data=lambda context, number: {"module": context.new_module().pk},
+        status=201,
+    ),
+    Scenario(
+        "lm:enrollment-bulk-create",
+        "teacher",
+        "post",
+        data=lambda context, number: {
+            "students": context.rng.sample(context.student_ids, min(20, len(context.student_ids))),
+            "modules": [context.module.pk],
+        },
+        status=201,
+    ),
+    Scenario(
+        "users:user-create",
+        "admin",
+        "post",
+        data=lambda context, number: {
+            "username": f"{context.marker}{number}",
+            "email": f"{context.marker}{number}@{SEED_EMAIL_DOMAIN}",
+            "password": "benchmark-password",
+        },
+        status=201,
+    ),
+]
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from lm.models import Blob
+from lm.storage import get_blob_digest, material_storage
+
+BLOB_GC_GRACE = timedelta(hours=1)
+
+
+def acquire_blob(name):
+    """Увеличивает счетчик ссылок на блоб, создавая запись при первой ссылке"""
+    if get_blob_digest(name) is None:
+        return
+    now = timezone.now()
+    if Blob.objects.filter(name=name).update(ref_count=F("ref_count") + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(name=name, size=material_storage.size(name), ref_count=1)
+    except IntegrityError:
+        Blob.objects.filter(name=name).update(ref_count=F("ref_count") + 1, updated_at=now)
+
+
+def release_blob(name):
+    if get_blob_digest(name) is None:
+        return
+    Blob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1, updated_at=timezone.now())
+
+
+def collect_unreferenced_blobs(grace=BLOB_GC_GRACE):
+    """Удаляет блобы без ссылок, освобожденные больше grace назад"""
+    removed = 0
+    cutoff = timezone.now() - grace
+    candidates = Blob.objects.filter(ref_count=0, updated_at__lt=cutoff)
+    for name in candidates.values_list("name", flat=True).iterator():
+        with transaction.atomic():
+            # Повторная проверка под блокировкой: после выборки могла появиться ссылка,
+            # или хранилище сохранило то же содержимое и обновило updated_at (lm.storage.touch_blob)
+            if not Blob.objects.select_for_update().filter(name=name, ref_count=0, updated_at__lt=cutoff).exists():
+                continue
+            Blob.objects.filter(name=name).delete()
+            material_storage.purge(name)
+            removed += 1
+    return removed
@@ -0,0 +1,315 @@
+import threading
+from collections import Counter
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from pybloom_live import ScalableBloomFilter
+from rest_framework.validators import UniqueValidator
+
+from lm.models import Enrollment
+
+User = get_user_model()
+
+BLOOM_PREFIX = "lm:bloom"
+BLOOM_BATCH_SIZE = 1000
+BLOOM_REBUILD_TIMEOUT = 60 * 60
+MAX_LAYERS = 64
+
+# Масштабируемый фильтр как в pybloom_live.ScalableBloomFilter: каждый следующий слой вдвое больше,
+# а его доля ошибки в 0.9 раза меньше, так что суммарная ошибка не превышает error_rate.
+# Слой n-го добавленного элемента определяется счетчиком, поэтому все процессы пишут в одни и те же биты.
+COMMON_LUA = """
+local function layer(capacity, error_rate, index)
+    local error = error_rate * 0.1 * 0.9 ^ index
+    local slices = math.ceil(math.log(1 / error) / math.log(2))
+    local bits = math.ceil(capacity * 2 ^ index * math.abs(math.log(error)) / (slices * math.log(2) ^ 2))
+    return slices, bits
+end
+
+local function layer_index(capacity, count)
+    return math.floor(math.log((count - 1) / capacity + 1) / math.log(2))
+end
+
+local function positions(item, slices, bits)
+    local digest = redis.sha1hex(item)
+    local first = tonumber(string.sub(digest, 1, 8), 16)
+    local second = tonumber(string.sub(digest, 9, 16), 16)
+    local result = {}
+    for slice = 0, slices - 1 do
+        result[slice + 1] = slice * bits + (first + slice * second) % bits
+    end
+    return result
+end
+
+local function add(base, capacity, error_rate, item)
+    local index = layer_index(capacity, redis.call('INCR', base .. ':count'))
+    local slices, bits = layer(capacity, error_rate, index)
+    for _, position in ipairs(positions(item, slices, bits)) do
+        redis.call('SETBIT', base .. ':layer:' .. index, position, 1)
+    end
+end
+
+local function params(base)
+    local ready = redis.call('GET', base .. ':ready')
+    if not ready then
+        return nil
+    end
+    local capacity, error_rate = string.match(ready, '([^:]+):([^:]+)')
+    return tonumber(capacity), tonumber(error_rate)
+end
+"""
+
+# KEYS: рабочий фильтр, метка пересборки, новый фильтр; ARGV: параметры нового фильтра, элементы
+ADD_SCRIPT = COMMON_LUA + """
+local capacity, error_rate = params(KEYS[1])
+local rebuilding = redis.call('EXISTS', KEYS[2]) == 1
+for i = 3, #ARGV do
+    if capacity then
+        add(KEYS[1], capacity, error_rate, ARGV[i])
+    end
+    if rebuilding then
+        add(KEYS[3], tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[i])
+    end
+end
+"""
+
+# KEYS: новый фильтр; ARGV: параметры, элементы
+FILL_SCRIPT = COMMON_LUA + """
+for i = 3, #ARGV do
+    add(KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[i])
+end
+"""
+
+# KEYS: фильтр, статистика; ARGV: элементы. Пока фильтр не построен, ответ всегда "возможно есть"
+CONTAINS_SCRIPT = COMMON_LUA + """
+local result = {}
+local capacity, error_rate = params(KEYS[1])
+local count = tonumber(redis.call('GET', KEYS[1] .. ':count') or '0')
+local last = -1
+if capacity and count > 0 then
+    last = layer_index(capacity, count)
+end
+local negatives = 0
+for i = 1, #ARGV do
+    local found = capacity == nil
+    for index = 0, last do
+        local slices, bits = layer(capacity, error_rate, index)
+        local all = true
+        for _, position in ipairs(positions(ARGV[i], slices, bits)) do
+            if redis.call('GETBIT', KEYS[1] .. ':layer:' .. index, position) == 0 then
+                all = false
+                break
+            end
+        end
+        if all then
+            found = true
+            break
+        end
+    end
+    if found then
+        result[i] = 1
+    else
+        result[i] = 0
+        negatives = negatives + 1
+    end
+end
+redis.call('HINCRBY', KEYS[2], 'checks', #ARGV)
+redis.call('HINCRBY', KEYS[2], 'negatives', negatives)
+return result
+"""
+
+# KEYS: рабочий фильтр, новый фильтр, метка пересборки; ARGV: параметры нового фильтра, число слоев
+SWAP_SCRIPT = """
+for index = 0, tonumber(ARGV[3]) - 1 do
+    redis.call('DEL', KEYS[1] .. ':layer:' .. index)
+    if redis.call('EXISTS', KEYS[2] .. ':layer:' .. index) == 1 then
+        redis.call('RENAME', KEYS[2] .. ':layer:' .. index, KEYS[1] .. ':layer:' .. index)
+    end
+end
+redis.call('SET', KEYS[1] .. ':count', redis.call('GET', KEYS[2] .. ':count') or '0')
+redis.call('DEL', KEYS[2] .. ':count', KEYS[3])
+redis.call('SET', KEYS[1] .. ':ready', ARGV[1] .. ':' .. ARGV[2])
+"""
+
+
+def batched(items, size=BLOOM_BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(str(item))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RedisBloomFilter:
+    """
+    Масштабируемый фильтр Блума в Redis (битовые строки, скрипты Lua), общий для всех процессов.
+    Отвечает "точно нет" или "возможно есть"; до первой пересборки всегда "возможно есть".
+    """
+
+    def __init__(self, url, name, capacity, error_rate):
+        self.client = redis.Redis.from_url(url)
+        self.key = f"{BLOOM_PREFIX}:{name}"
+        self.next_key = f"{self.key}:next"
+        self.rebuilding_key = f"{self.key}:rebuilding"
+        self.stats_key = f"{self.key}:stats"
+        self.params = [capacity, error_rate]
+        self.add_script = self.client.register_script(ADD_SCRIPT)
+        self.fill_script = self.client.register_script(FILL_SCRIPT)
+        self.contains_script = self.client.register_script(CONTAINS_SCRIPT)
+        self.swap_script = self.client.register_script(SWAP_SCRIPT)
+
+    def add(self, items):
+        for batch in batched(items):
+            self.add_script(keys=[self.key, self.rebuilding_key, self.next_key], args=[*self.params, *batch])
+
+    def contains_many(self, items):
+        result = []
+        for batch in batched(items):
+            result.extend(bool(found) for found in self.contains_script(keys=[self.key, self.stats_key], args=batch))
+        return result
+
+    def rebuild(self, source):
+        """
+        Новый фильтр строится рядом и подменяет рабочий атомарно; добавления во время сборки пишутся в оба.
+        source - функция, возвращающая элементы; запрос к базе начинается только после метки пересборки.
+        Элементы добавляются после коммита (add_on_commit), поэтому строка, не попавшая в снимок source,
+        добавляется уже при метке и попадает в новый фильтр.
+        """
+        self.client.delete(
+            f"{self.next_key}:count", *(f"{self.next_key}:layer:{index}" for index in range(MAX_LAYERS))
+        )
+        self.client.set(self.rebuilding_key, 1, ex=BLOOM_REBUILD_TIMEOUT)
+        count = 0
+        for batch in batched(source()):
+            self.fill_script(keys=[self.next_key], args=[*self.params, *batch])
+            # Метка не должна истечь во время долгой сборки, иначе добавления пройдут мимо нового фильтра
+            self.client.expire(self.rebuilding_key, BLOOM_REBUILD_TIMEOUT)
+            count += len(batch)
+        self.swap_script(keys=[self.key, self.next_key, self.rebuilding_key], args=[*self.params, MAX_LAYERS])
+        return count
+
+    def record_false_positives(self, count):
+        # Пока фильтр не построен, любой ответ "возможно есть", ложными они не считаются
+        if count and self.client.exists(f"{self.key}:ready"):
+            self.client.hincrby(self.stats_key, "false_positives", count)
+
+    def get_stats(self):
+        return {key.decode(): int(value) for key, value in self.client.hgetall(self.stats_key).items()}
+
+
+class MemoryBloomFilter:
+    """Фильтр в памяти процесса (pybloom_live) для разработки и тестов"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.filter = None
+        self.next_filter = None
+        self.stats = Counter()
+
+    def make_filter(self):
+        return ScalableBloomFilter(self.capacity, self.error_rate, ScalableBloomFilter.SMALL_SET_GROWTH)
+
+    def add(self, items):
+        with self.lock:
+            for item in map(str, items):
+                for bloom in (self.filter, self.next_filter):
+                    if bloom is not None:
+                        bloom.add(item)
+
+    def contains_many(self, items):
+        with self.lock:
+            result = [self.filter is None or str(item) in self.filter for item in items]
+            self.stats["checks"] += len(result)
+            self.stats["negatives"] += result.count(False)
+        return result
+
+    def rebuild(self, source):
+        with self.lock:
+            self.next_filter = self.make_filter()
+        count = 0
+        for batch in batched(source()):
+            with self.lock:
+                for item in batch:
+                    self.next_filter.add(item)
+            count += len(batch)
+        with self.lock:
+            self.filter, self.next_filter = self.next_filter, None
+        return count
+
+    def record_false_positives(self, count):
+        with self.lock:
+            if self.filter is not None:
+                self.stats["false_positives"] += count
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def reset(self):
+        with self.lock:
+            self.filter = self.next_filter = None
+            self.stats.clear()
+
+
+def enrollment_key(student_id, module_id):
+    return f"{student_id}:{module_id}"
+
+
+# Источники для пересборки: имя фильтра -> функция, возвращающая элементы из базы
+BLOOM_SOURCES = {
+    "enrollment": lambda: (
+        enrollment_key(student_id, module_id)
+        for student_id, module_id in Enrollment.objects.values_list("student_id", "module_id").iterator(
+            chunk_size=BLOOM_BATCH_SIZE * 10
+        )
+    ),
+    "username": lambda: User.objects.values_list("username", flat=True).iterator(chunk_size=BLOOM_BATCH_SIZE * 10),
+    "email": lambda: User.objects.values_list("email", flat=True).iterator(chunk_size=BLOOM_BATCH_SIZE * 10),
+}
+
+
+@lru_cache(maxsize=None)
+def get_bloom_filter(name):
+    capacity, error_rate = settings.BLOOM_FILTER_CAPACITY, settings.BLOOM_FILTER_ERROR_RATE
+    if settings.BLOOM_FILTER_URL:
+        return RedisBloomFilter(settings.BLOOM_FILTER_URL, name, capacity, error_rate)
+    return MemoryBloomFilter(capacity, error_rate)
+
+
+def might_contain(name, item):
+    return get_bloom_filter(name).contains_many([item])[0]
+
+
+def rebuild_bloom_filter(name):
+    return get_bloom_filter(name).rebuild(BLOOM_SOURCES[name])
+
+
+def add_on_commit(name, items):
+    """
+    Добавляет элементы в фильтр после коммита текущей транзакции. Добавление до коммита могло бы пройти
+    мимо пересборки: метки еще нет, а снимок для нового фильтра строки еще не видит.
+    """
+    items = [str(item) for item in items]
+    transaction.on_commit(lambda: get_bloom_filter(name).add(items))
+
+
+class BloomUniqueValidator(UniqueValidator):
+    """UniqueValidator, который не обращается к базе, если фильтр Блума отвечает "точно нет" """
+
+    def __init__(self, filter_name, queryset, message=None, lookup="exact"):
+        super().__init__(queryset, message=message, lookup=lookup)
+        self.filter_name = filter_name
+
+    def __call__(self, value, serializer_field):
+        instance = getattr(serializer_field.parent, "instance", None)
+        if instance is None and self.lookup == "exact" and not might_contain(self.filter_name, value):
+            return
+        super().__call__(value, serializer_field)
@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import json
+import weakref
+
+import redis.asyncio
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisSerializer
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+CACHE_PREFIX = "lm"
+CATALOG_CACHE_TIMEOUT = 60 * 15
+
+
+def generation_key(namespace):
+    return f"{CACHE_PREFIX}:generation:{namespace}"
+
+
+def get_generations(namespaces):
+    """Текущие версии пространств имен кэша"""
+    keys = [generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, 1, timeout=None)
+            generations[key] = cache.get(key, 1)
+    return [generations[key] for key in keys]
+
+
+async def aget_generations(namespaces):
+    """Асинхронный вариант get_generations"""
+    async_cache = get_async_cache()
+    keys = [generation_key(namespace) for namespace in namespaces]
+    generations = await async_cache.aget_many(keys)
+    for key in keys:
+        if key not in generations:
+            await async_cache.aadd(key, 1, timeout=None)
+            generations[key] = await async_cache.aget(key, 1)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(namespace):
+    """Инвалидация за O(1): старые ключи просто перестают использоваться и истекают сами"""
+    key = generation_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+        cache.incr(key)
+
+
+def bump_generation_on_commit(namespace):
+    """
+    Смена версии после коммита: запрос между сменой версии и коммитом прочитал бы старые данные
+    и сохранил бы их под новой версией на весь таймаут.
+    """
+    transaction.on_commit(lambda: bump_generation(namespace))
+
+
+def get_permission_scope(request):
+    """Область прав запроса: ответы для разных ролей не смешиваются"""
+    user = request.user
+    if not user.is_authenticated:
+        return "anonymous"
+    if user.is_staff:
+        return "staff"
+    return getattr(user, "role", "user")
+
+
+def make_digest(payload):
+    return hashlib.md5(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_normalized_params(request):
+    """Параметры запроса без учета порядка"""
+    return sorted((key, request.query_params.getlist(key)) for key in request.query_params)
+
+
+class AsyncRedisCache:
+    """
+    Асинхронный клиент (redis.asyncio) к Redis кэша Django для lm.async_views.
+    Ключи и формат значений те же, что у RedisCache, поэтому синхронные и асинхронные представления делят записи.
+    """
+
+    def __init__(self, url):
+        self.client = redis.asyncio.Redis.from_url(url)
+        self.serializer = RedisSerializer()
+
+    async def aget(self, key, default=None):
+        value = await self.client.get(cache.make_and_validate_key(key))
+        return default if value is None else self.serializer.loads(value)
+
+    async def aget_many(self, keys):
+        full_keys = {cache.make_and_validate_key(key): key for key in keys}
+        values = await self.client.mget(list(full_keys))
+        return {
+            key: self.serializer.loads(value) for key, value in zip(full_keys.values(), values) if value is not None
+        }
+
+    async def aset(self, key, value, timeout):
+        await self.client.set(cache.make_and_validate_key(key), self.serializer.dumps(value), ex=timeout)
+
+    async def aadd(self, key, value, timeout):
+        return bool(
+            await self.client.set(cache.make_and_validate_key(key), self.serializer.dumps(value), ex=timeout, nx=True)
+        )
+
+
+# Соединения redis.asyncio привязаны к циклу событий: клиент создается на каждый цикл
+_async_caches = weakref.WeakKeyDictionary()
+
+
+def get_async_cache():
+    """Асинхронный кэш: redis.asyncio при ASYNC_CACHE_URL, иначе асинхронные методы кэша Django"""
+    if not settings.ASYNC_CACHE_URL:
+        return cache
+    loop = asyncio.get_running_loop()
+    if loop not in _async_caches:
+        _async_caches[loop] = AsyncRedisCache(settings.ASYNC_CACHE_URL)
+    return _async_caches[loop]
+
+
+class CachedResponseMixin:
+    """
+    Кэширование ответов list/retrieve в Redis (read-through).
+    Ключ зависит от представления, нормализованных параметров запроса, области прав
+    и версий пространств имен cache_namespaces, которые сбрасываются сигналами.
+    """
+
+    cache_namespaces = ()
+    cache_timeout = CATALOG_CACHE_TIMEOUT
+
+    def get_cache_key(self, request):
+        return self.make_cache_key(request, get_generations(self.cache_namespaces))
+
+    def make_cache_key(self, request, generations):
+        digest = make_digest([request.get_host(), self.kwargs, get_normalized_params(request), generations])
+        return f"{CACHE_PREFIX}:response:{self.__class__.__name__}:{get_permission_scope(request)}:{digest}"
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы (ETag / Last-Modified) для list/retrieve.
+    Валидаторы считаются одним запросом max(updated_at) и count(*) по отфильтрованным строкам,
+    без сериализации тела. Ставится перед CachedResponseMixin, чтобы 304 не трогал кэш ответов.
+    Версии cache_namespaces входят в ETag: изменения M2M не меняют updated_at.
+    If-Modified-Since проверяется только для detail: удаление строки из списка не меняет max(updated_at).
+    """
+
+    last_modified_field = "updated_at"
+    last_modified_is_exact = True
+    cache_namespaces = ()
+
+    def is_detail(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_validator_queryset(self):
+        queryset = self.get_queryset()
+        if self.is_detail():
+            return queryset.filter(**{self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]})
+        return self.filter_queryset(queryset)
+
+    def get_validators(self, request):
+        """ETag и Last-Modified; при заданных cache_namespaces хранятся в кэше до смены версии"""
+        parts = [
+            self.__class__.__name__,
+            self.kwargs,
+            get_normalized_params(request),
+            get_permission_scope(request),
+            request.accepted_renderer.format,
+        ]
+        key = None
+        if self.cache_namespaces:
+            parts.append(get_generations(self.cache_namespaces))
+            key = f"{CACHE_PREFIX}:validators:{make_digest(parts)}"
+            validators = cache.get(key)
+            if validators is not None:
+                return validators
+
+        state = self.get_validator_queryset().aggregate(last_modified=Max(self.last_modified_field), count=Count("pk"))
+        last_modified = state["last_modified"] and int(state["last_modified"].timestamp())
+        validators = (f'W/"{make_digest(parts + [state["last_modified"], state["count"]])}"', last_modified)
+        if key is not None:
+            cache.set(key, validators, CATALOG_CACHE_TIMEOUT)
+        return validators
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        use_last_modified = self.is_detail() and self.last_modified_is_exact
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified if use_last_modified else None
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
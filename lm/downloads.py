@@ -0,0 +1,102 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from lm.storage import get_blob_digest
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном.
+    Возвращает (start, end) включительно, None если заголовка нет, ValueError если диапазон невыполним.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        # Несколько диапазонов и непонятные форматы отдаем целиком
+        return None
+    start, end = match.groups()
+    if start == "":
+        # bytes=-500 - последние 500 байт
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), (min(int(end), size - 1) if end else size - 1)
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_range(file, start, length):
+    file.seek(start)
+    remaining = length
+    try:
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def serve_file(request, field_file, filename=None):
+    """
+    Отдает файл без участия воркера, если включен MEDIA_ACCEL_REDIRECT: nginx получает X-Accel-Redirect
+    и сам передает файл через sendfile с поддержкой Range. Иначе файл потоково отдает Django.
+    filename - имя для Content-Disposition, по умолчанию имя файла в хранилище.
+    """
+    filename = filename or os.path.basename(field_file.name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    # Имя блоба содержит хеш содержимого: сильный ETag без чтения файла
+    digest = get_blob_digest(field_file.name)
+    etag = f'"{digest}"' if digest else None
+    if etag and etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(f"{settings.MEDIA_ACCEL_PREFIX}{field_file.name}")
+        response["Content-Disposition"] = content_disposition_header(False, filename)
+        return with_etag(response, etag)
+
+    size = field_file.size
+    try:
+        byte_range = parse_range(request.headers.get("Range"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = field_file.storage.open(field_file.name, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, filename=filename)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(iter_range(file, start, length), status=206, content_type=content_type)
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Disposition"] = content_disposition_header(False, filename)
+    response["Accept-Ranges"] = "bytes"
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    if etag:
+        response["ETag"] = etag
+        # Содержимое по этому имени никогда не меняется
+        response["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
@@ -0,0 +1,147 @@
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Поля, у которых значение из .values() уже совпадает с представлением DRF
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.FloatField,
+    serializers.IntegerField,
+)
+
+
+class UnsupportedField(Exception):
+    """Поле сериализатора нельзя построить из .values(); используется обычный путь"""
+
+
+def get_m2m_relation(model, name):
+    """(queryset, внешний ключ, значение) для ID связанных объектов через промежуточную таблицу"""
+    field = model._meta.get_field(name)
+    return (
+        field.remote_field.through.objects.order_by("pk"),
+        f"{field.m2m_field_name()}_id",
+        f"{field.m2m_reverse_field_name()}_id",
+    )
+
+
+def get_datetime_converter(field):
+    """
+    DateTimeField.to_representation с часовым поясом, найденным один раз на запрос, а не на каждое значение.
+    Наивные даты и нестандартный формат идут через само поле.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+class ValuesSerializer:
+    """
+    Сериализация только для чтения из строк .values() с тем же выводом, что у ModelSerializer,
+    но без создания моделей и обхода полей DRF на каждую строку.
+    Списки ID связанных объектов загружаются одним запросом на поле для всей страницы.
+    Поля-методы поддерживаются, если сериализатор описал их в values_relations.
+    """
+
+    def __init__(self, serializer):
+        model = serializer.Meta.model
+        self.pk_name = model._meta.pk.name
+        self.columns = {self.pk_name}
+        self.relations = {}
+        self.plan = []
+        values_relations = getattr(serializer, "values_relations", {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in values_relations:
+                self.relations[name] = values_relations[name]
+                self.plan.append((name, None, None))
+            elif isinstance(field, serializers.ManyRelatedField):
+                self.relations[name] = get_m2m_relation(model, field.source)
+                self.plan.append((name, None, None))
+            else:
+                self.columns.add(field.source)
+                self.plan.append((name, field.source, self.get_converter(model, field)))
+
+    @staticmethod
+    def get_converter(model, field):
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return None
+        if isinstance(field, serializers.RelatedField) or isinstance(field, serializers.BaseSerializer):
+            raise UnsupportedField(field.field_name)
+        if isinstance(field, serializers.SerializerMethodField) or field.source == "*":
+            raise UnsupportedField(field.field_name)
+        if isinstance(field, IDENTITY_FIELDS) and type(field).to_representation in {
+            cls.to_representation for cls in IDENTITY_FIELDS
+        }:
+            return None
+        if type(field) is serializers.DateTimeField:
+            return get_datetime_converter(field)
+        if isinstance(field, serializers.FileField):
+            model_field = model._meta.get_field(field.source)
+            return lambda name: field.to_representation(model_field.attr_class(None, model_field, name))
+        return field.to_representation
+
+    def values(self, queryset, extra=()):
+        return queryset.prefetch_related(None).values(*self.columns, *extra)
+
+    def load_relations(self, ids):
+        related = {}
+        for name, (queryset, key, value) in self.relations.items():
+            grouped = defaultdict(list)
+            for owner, item in queryset.filter(**{f"{key}__in": ids}).values_list(key, value):
+                grouped[owner].append(item)
+            related[name] = grouped
+        return related
+
+    def serialize(self, rows):
+        rows = list(rows)
+        related = self.load_relations([row[self.pk_name] for row in rows]) if self.relations else {}
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, converter in self.plan:
+                if column is None:
+                    item[name] = related[name].get(row[self.pk_name], [])
+                    continue
+                value = row[column]
+                item[name] = value if converter is None or value is None else converter(value)
+            data.append(item)
+        return data
+
+
+class ValuesListMixin:
+    """
+    Быстрый путь для list: .values() + ValuesSerializer вместо ModelSerializer.
+    Выключается настройкой FAST_LIST_SERIALIZATION.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_LIST_SERIALIZATION:
+            return super().list(request, *args, **kwargs)
+        try:
+            values_serializer = ValuesSerializer(self.get_serializer())
+        except UnsupportedField:
+            return super().list(request, *args, **kwargs)
+
+        # Ключ курсора нужен в строке, чтобы построить ссылку на следующую страницу
+        queryset = values_serializer.values(
+            self.filter_queryset(self.get_queryset()), extra=getattr(self, "cursor_ordering", ())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(values_serializer.serialize(queryset))
+        return self.get_paginated_response(values_serializer.serialize(page))
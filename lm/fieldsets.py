@@ -0,0 +1,76 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_QUERY_PARAM = "fields"
+EXCLUDE_QUERY_PARAM = "exclude"
+
+
+def parse_field_names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def get_requested_fields(request, available):
+    """
+    Поля ответа с учетом ?fields=a,b и ?exclude=c в порядке available.
+    None, если выборка не задана или запрос не на чтение.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    if not params.get(FIELDS_QUERY_PARAM) and not params.get(EXCLUDE_QUERY_PARAM):
+        return None
+    selected = list(available)
+    if params.get(FIELDS_QUERY_PARAM):
+        wanted = parse_field_names(params[FIELDS_QUERY_PARAM])
+        selected = [name for name in selected if name in wanted]
+    if params.get(EXCLUDE_QUERY_PARAM):
+        excluded = parse_field_names(params[EXCLUDE_QUERY_PARAM])
+        selected = [name for name in selected if name not in excluded]
+    return selected
+
+
+def project_queryset(queryset, fields, keep=()):
+    """only() по колонкам модели, которые нужны выбранным полям; остальные (например, TextField) не читаются"""
+    meta = queryset.model._meta
+    columns = {meta.pk.name, *keep}
+    for name in fields:
+        try:
+            field = meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.many_to_many:
+            columns.add(field.name)
+    return queryset.only(*columns)
+
+
+class SparseFieldsMixin:
+    """Сериализатор выводит только поля из ?fields= и без полей из ?exclude="""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = get_requested_fields(self.context.get("request"), self.fields)
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    """
+    Проекция ?fields= / ?exclude= в запрос к базе.
+    prefetch_fields - поля сериализатора, ради которых в queryset есть prefetch_related;
+    если ни одно из них не выбрано, prefetch не выполняется.
+    """
+
+    prefetch_fields = ()
+
+    def get_requested_fields(self):
+        return get_requested_fields(self.request, self.get_serializer_class().Meta.fields)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset
+        if self.prefetch_fields and not set(self.prefetch_fields) & set(fields):
+            queryset = queryset.prefetch_related(None)
+        return project_queryset(queryset, fields, keep=getattr(self, "cursor_ordering", ()))
@@ -0,0 +1,92 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..apps import LmConfig
+from ..models import Course, EducationalModule, Enrollment, Material
+
+User = get_user_model()
+
+
+class AsyncReadViewTest(TestCase):
+    """Асинхронные представления отдают то же, что синхронные"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@test.com", password="testpass123", role="student"
+        )
+        for number in range(3):
+            course = Course.objects.create(title=f"Course {number}", description="Description", teacher=self.teacher)
+            module = EducationalModule.objects.create(
+                order_number=1, title=f"Module {number}", description="Description", course=course, author=self.teacher
+            )
+            material = Material.objects.create(
+                title="Material", content="Content", type="text", uploaded_by=self.teacher
+            )
+            module.materials.add(material)
+            Enrollment.objects.create(student=self.student, module=module)
+        self.course, self.module, self.material = course, module, material
+
+    def get_async(self, user, name, params=None, **kwargs):
+        url = reverse(f"{LmConfig.name}:async-{name}", kwargs=kwargs)
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"} if user else {}
+        return async_to_sync(self.async_client.get)(url, params, headers=headers)
+
+    def assertSameContent(self, user, name, params=None, **kwargs):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        expected = client.get(reverse(f"{LmConfig.name}:{name}", kwargs=kwargs), params)
+        cache.clear()
+        response = self.get_async(user, name, params, **kwargs)
+        self.assertEqual(response.status_code, expected.status_code)
+        # Ссылки пагинации ведут на тот же стек, с которого пришел запрос
+        self.assertEqual(json.loads(response.content.replace(b"/async/", b"/")), json.loads(expected.content))
+        return response
+
+    def test_lists(self):
+        for name in ("course-list", "module-list", "material-list"):
+            with self.subTest(name=name):
+                self.assertSameContent(self.teacher, name)
+                self.assertSameContent(self.teacher, name, {"page": 2, "page_size": 2})
+                self.assertSameContent(self.teacher, name, {"pagination": "cursor", "page_size": 2})
+        self.assertSameContent(self.student, "enrollment-list")
+
+    def test_details(self):
+        self.assertSameContent(self.teacher, "course-detail", pk=self.course.pk)
+        self.assertSameContent(self.teacher, "module-detail", pk=self.module.pk)
+        self.assertSameContent(self.teacher, "material-detail", pk=self.material.pk)
+
+    def test_filters_and_fields(self):
+        self.assertSameContent(self.teacher, "course-list", {"teacher": self.teacher.pk, "ordering": "-title"})
+        self.assertSameContent(self.teacher, "course-list", {"teacher": 999999})
+        self.assertSameContent(self.teacher, "module-list", {"fields": "id,materials"})
+
+    def test_errors(self):
+        self.assertSameContent(self.teacher, "course-list", {"page": 10})
+        self.assertSameContent(self.teacher, "course-detail", pk=self.course.pk + 100)
+        self.assertSameContent(self.teacher, "enrollment-list")
+
+        response = self.get_async(None, "course-list")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", response)
+
+    def test_cached_response(self):
+        """Повторный запрос берет ответ из кэша: в базу идет только чтение пользователя"""
+        self.get_async(self.teacher, "course-list")
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_async(self.teacher, "course-list")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), 1)
@@ -0,0 +1,125 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.access import get_access_profile
+
+from ..apps import LmConfig
+from ..bloom import BLOOM_SOURCES, MemoryBloomFilter, enrollment_key, get_bloom_filter, rebuild_bloom_filter
+from ..models import Course, EducationalModule, Enrollment
+from ..progress import get_progress_buffer
+from ..tasks import flush_progress
+
+User = get_user_model()
+
+
+class BloomTestMixin:
+    def tearDown(self):
+        # Фильтры в памяти живут между тестами, а строки базы - нет
+        for name in BLOOM_SOURCES:
+            get_bloom_filter(name).reset()
+
+
+class MemoryBloomFilterTest(TestCase):
+    def test_not_ready_answers_maybe(self):
+        bloom = MemoryBloomFilter(100, 0.01)
+        self.assertEqual(bloom.contains_many(["a", "b"]), [True, True])
+        bloom.record_false_positives(2)
+        self.assertEqual(bloom.get_stats(), {"checks": 2, "negatives": 0})
+
+    def test_no_false_negatives(self):
+        bloom = MemoryBloomFilter(100, 0.01)
+        bloom.rebuild(lambda: range(500))
+        bloom.add(["extra"])
+        self.assertTrue(all(bloom.contains_many([*range(500), "extra"])))
+        misses = bloom.contains_many(range(1000, 2000)).count(True)
+        self.assertLess(misses, 50)
+
+
+class EnrollmentBloomTest(BloomTestMixin, TestCase):
+    def setUp(self):
+        get_progress_buffer().drain()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.students = [
+            User.objects.create_user(username=f"student{number}", email=f"student{number}@test.com", password="pass")
+            for number in range(2)
+        ]
+        self.course = Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+        self.module = EducationalModule.objects.create(
+            order_number=1, title="Module", description="Description", course=self.course, author=self.teacher
+        )
+        Enrollment.objects.create(student=self.students[0], module=self.module)
+        self.assertEqual(rebuild_bloom_filter("enrollment"), 1)
+        self.bloom = get_bloom_filter("enrollment")
+
+    def test_created_enrollment_is_added(self):
+        key = enrollment_key(self.students[1].id, self.module.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.students[1], module=self.module)
+            # До коммита записи нет ни в базе для других соединений, ни в фильтре
+            self.assertFalse(self.bloom.contains_many([key])[0])
+        self.assertTrue(self.bloom.contains_many([key])[0])
+
+    def test_enrollment_committed_during_rebuild(self):
+        """Запись, закоммиченная после снимка пересборки, попадает в новый фильтр"""
+        key = enrollment_key(self.students[1].id, self.module.id)
+
+        def source():
+            snapshot = list(BLOOM_SOURCES["enrollment"]())
+            with self.captureOnCommitCallbacks(execute=True):
+                Enrollment.objects.create(student=self.students[1], module=self.module)
+            return snapshot
+
+        self.assertEqual(self.bloom.rebuild(source), 1)
+        self.assertTrue(self.bloom.contains_many([key])[0])
+
+    def test_bulk_enrollment_skips_lookup(self):
+        """Если ни одной пары точно нет, существующие записи не запрашиваются"""
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse(f"{LmConfig.name}:enrollment-bulk-create")
+        # Профиль прав загружается заранее: его запросы к lm_enrollment не относятся к проверке пар
+        get_access_profile(self.teacher)
+        with CaptureQueriesContext(connection) as context, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url, {"students": [self.students[1].id], "course": self.course.id}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1)
+        lookups = [query for query in context.captured_queries if query["sql"].startswith('SELECT "lm_enrollment"')]
+        self.assertEqual(lookups, [])
+        self.assertTrue(self.bloom.contains_many([enrollment_key(self.students[1].id, self.module.id)])[0])
+
+        response = self.client.post(url, {"students": [self.students[1].id], "course": self.course.id}, format="json")
+        self.assertEqual(response.data["created"], 0)
+
+    def test_flush_keeps_pairs_missing_from_filter(self):
+        """Прогресс записи, которой еще нет в фильтре, не теряется: существование пары проверяет база"""
+        (enrollment,) = Enrollment.objects.bulk_create([Enrollment(student=self.students[1], module=self.module)])
+        self.assertFalse(self.bloom.contains_many([enrollment_key(self.students[1].id, self.module.id)])[0])
+        get_progress_buffer().add(self.students[1].id, {self.module.id: 50.0})
+        self.assertEqual(flush_progress(), 1)
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.progress, 50.0)
+
+
+class RebuildBloomFiltersCommandTest(BloomTestMixin, TestCase):
+    def test_rebuild_and_stats(self):
+        User.objects.create_user(username="user", email="user@test.com", password="testpass123")
+        out = StringIO()
+        call_command("rebuild_bloom_filters", filter=["username"], stdout=out)
+        self.assertIn("username: добавлено элементов 1", out.getvalue())
+        self.assertEqual(get_bloom_filter("username").contains_many(["user", "other"]), [True, False])
+
+        out = StringIO()
+        call_command("rebuild_bloom_filters", stats=True, stdout=out)
+        self.assertIn("username: проверок 2, без запроса к базе 1 (50.0%)", out.getvalue())
@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..cache import bump_generation, bump_generation_on_commit, get_generations
+from ..models import Course, EducationalModule, Material
+
+User = get_user_model()
+
+
+class GenerationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_generation(self):
+        (before,) = get_generations(["test"])
+        bump_generation("test")
+        self.assertEqual(get_generations(["test"]), [before + 1])
+
+    def test_bump_generation_on_commit(self):
+        """До коммита версия прежняя: ответ, собранный в это время, не попадет под новую версию"""
+        (before,) = get_generations(["test"])
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_generation_on_commit("test")
+            self.assertEqual(get_generations(["test"]), [before])
+        self.assertEqual(get_generations(["test"]), [before + 1])
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+        self.course = Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+        self.module = EducationalModule.objects.create(
+            order_number=1, title="Module", description="Description", course=self.course, author=self.teacher
+        )
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(context.captured_queries)
+
+    def test_second_request_served_from_cache(self):
+        url = reverse(f"{LmConfig.name}:course-detail", kwargs={"pk": self.course.pk})
+        first, first_queries = self.get(url)
+        second, second_queries = self.get(url)
+        self.assertGreater(first_queries, 0)
+        self.assertEqual(second_queries, 0)
+        self.assertEqual(first.data, second.data)
+
+    def test_query_params_are_normalized(self):
+        url = reverse(f"{LmConfig.name}:course-list")
+        self.get(url + "?title=Course&teacher=%d" % self.teacher.pk)
+        _, queries = self.get(url + "?teacher=%d&title=Course" % self.teacher.pk)
+        self.assertEqual(queries, 0)
+
+    def test_course_save_invalidates(self):
+        url = reverse(f"{LmConfig.name}:course-detail", kwargs={"pk": self.course.pk})
+        self.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.title = "Updated"
+            self.course.save()
+        response, _ = self.get(url)
+        self.assertEqual(response.data["title"], "Updated")
+
+    def test_materials_change_invalidates(self):
+        url = reverse(f"{LmConfig.name}:module-detail", kwargs={"pk": self.module.pk})
+        self.get(url)
+        material = Material.objects.create(title="Material", content="Content", type="text", uploaded_by=self.teacher)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.module.materials.add(material)
+        response, _ = self.get(url)
+        self.assertEqual(response.data["materials"], [material.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            material.delete()
+        response, _ = self.get(url)
+        self.assertEqual(response.data["materials"], [])
+
+    def test_module_delete_invalidates_list(self):
+        url = reverse(f"{LmConfig.name}:module-list")
+        response, _ = self.get(url)
+        self.assertEqual(response.data["count"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.module.delete()
+        response, _ = self.get(url)
+        self.assertEqual(response.data["count"], 0)
@@ -0,0 +1,141 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..benchmarks import SCENARIOS, SEED_PREFIX
+from ..models import Course, EducationalModule, Enrollment, Material
+
+User = get_user_model()
+
+
+class ExplainListEndpointsCommandTest(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@test.com", password="testpass123", role="student"
+        )
+        course = Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+        module = EducationalModule.objects.create(
+            order_number=1, title="Module", description="Description", course=course, author=self.teacher
+        )
+        Enrollment.objects.create(student=self.student, module=module)
+
+    def test_reports_every_endpoint(self):
+        out = StringIO()
+        call_command("explain_list_endpoints", stdout=out)
+        output = out.getvalue()
+        for url_name in [
+            "lm:course-list",
+            "lm:module-list",
+            "lm:material-list",
+            "lm:enrollment-list",
+            "users:user-list",
+        ]:
+            self.assertIn(url_name, output)
+        self.assertIn("Всего последовательных сканирований", output)
+
+
+class BenchmarkBulkEnrollmentCommandTest(TestCase):
+    def test_runs_and_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark_bulk_enrollment", students=5, modules=2, stdout=out)
+        self.assertIn("Ускорение", out.getvalue())
+        self.assertFalse(Enrollment.objects.exists())
+
+
+class BenchmarkDeactivationCommandTest(TestCase):
+    def test_runs_and_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark_deactivation", users=10, chunk_size=3, stdout=out)
+        self.assertIn("Ускорение", out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith="benchmark_user_").exists())
+
+
+class BenchmarkSerializationCommandTest(TestCase):
+    def test_output_matches(self):
+        out = StringIO()
+        call_command("benchmark_serialization", rows=5, repeat=1, stdout=out)
+        self.assertEqual(out.getvalue().count("вывод совпадает: True"), 2)
+        self.assertFalse(Course.objects.exists())
+
+
+class BenchmarkAsyncCommandTest(TestCase):
+    def test_runs_and_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark_async", requests=4, concurrency=2, rows=3, stdout=out)
+        self.assertEqual(out.getvalue().count("async/sync"), 5)
+        self.assertFalse(Course.objects.exists())
+
+
+class SeedBenchmarkDataCommandTest(TestCase):
+    def seed(self, **options):
+        call_command(
+            "seed_benchmark_data",
+            students=10,
+            teachers=2,
+            courses=3,
+            modules_per_course=2,
+            materials_per_module=2,
+            enrollments=25,
+            batch_size=4,
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_seeds_requested_volumes(self):
+        """Создается ровно запрошенное число строк, модули студента не повторяются"""
+        self.seed()
+        self.assertEqual(User.objects.filter(username__startswith=f"{SEED_PREFIX}student_").count(), 10)
+        self.assertTrue(User.objects.get(username=f"{SEED_PREFIX}admin").is_staff)
+        self.assertEqual(Course.objects.count(), 3)
+        self.assertEqual(EducationalModule.objects.count(), 6)
+        self.assertEqual(Material.objects.count(), 12)
+        self.assertEqual(EducationalModule.materials.through.objects.count(), 12)
+        self.assertEqual(Enrollment.objects.count(), 25)
+        pairs = set(Enrollment.objects.values_list("student_id", "module_id"))
+        self.assertEqual(len(pairs), 25)
+
+    def test_same_seed_gives_same_data(self):
+        self.seed()
+        first = list(Enrollment.objects.order_by("id").values_list("student__username", "module__title", "progress"))
+        self.seed(clear=True)
+        second = list(Enrollment.objects.order_by("id").values_list("student__username", "module__title", "progress"))
+        self.assertEqual(first, second)
+
+    def test_refuses_to_seed_twice(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+class BenchmarkApiCommandTest(TestCase):
+    def test_requires_seed_data(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_api", requests=1, concurrency=1, stdout=StringIO())
+
+    def test_reports_every_scenario(self):
+        """JSON содержит каждый сценарий без ошибок, созданные прогоном данные удаляются"""
+        call_command("seed_benchmark_data", students=30, teachers=2, courses=3, enrollments=40, stdout=StringIO())
+        counts = (Course.objects.count(), Material.objects.count(), User.objects.count())
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "benchmark.json")
+            call_command("benchmark_api", requests=2, concurrency=1, output=output, stdout=StringIO())
+            with open(output, encoding="utf-8") as file:
+                report = json.load(file)
+
+        self.assertEqual(set(report["results"]), {scenario.label for scenario in SCENARIOS})
+        for label, result in report["results"].items():
+            if label != "lm:course-list page 100":
+                self.assertEqual(result["errors"], {}, label)
+            self.assertEqual(result["requests"], 2)
+            self.assertIsNotNone(result["queries_per_request"], label)
+        self.assertEqual(report["meta"]["rows"]["enrollments"], 40)
+        self.assertEqual((Course.objects.count(), Material.objects.count(), User.objects.count()), counts)
@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, EducationalModule, Material
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+        self.course = Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+        self.module = EducationalModule.objects.create(
+            order_number=1, title="Module", description="Description", course=self.course, author=self.teacher
+        )
+        self.material = Material.objects.create(
+            title="Material", content="Content", type="text", uploaded_by=self.teacher
+        )
+
+    def assertNotModified(self, url, etag, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        # Курсы и модули берут валидаторы из кэша, материалы - одним агрегатным запросом
+        self.assertLessEqual(len(context.captured_queries), 1)
+
+    def get_etag(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        return response["ETag"]
+
+    def test_all_views_answer_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без сериализации тела"""
+        urls = [
+            reverse(f"{LmConfig.name}:course-list"),
+            reverse(f"{LmConfig.name}:course-detail", kwargs={"pk": self.course.pk}),
+            reverse(f"{LmConfig.name}:module-list"),
+            reverse(f"{LmConfig.name}:module-detail", kwargs={"pk": self.module.pk}),
+            reverse(f"{LmConfig.name}:material-list"),
+            reverse(f"{LmConfig.name}:material-detail", kwargs={"pk": self.material.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotModified(url, self.get_etag(url))
+
+    def test_query_params_change_etag(self):
+        url = reverse(f"{LmConfig.name}:course-list")
+        self.assertNotEqual(self.get_etag(url), self.get_etag(url, page_size=5))
+
+    def test_update_changes_etag(self):
+        url = reverse(f"{LmConfig.name}:course-detail", kwargs={"pk": self.course.pk})
+        etag = self.get_etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.title = "Updated"
+            self.course.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Updated")
+
+    def test_delete_changes_list_etag(self):
+        url = reverse(f"{LmConfig.name}:material-list")
+        etag = self.get_etag(url)
+        self.material.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_module_materials_change_etag(self):
+        url = reverse(f"{LmConfig.name}:module-detail", kwargs={"pk": self.module.pk})
+        etag = self.get_etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.module.materials.add(self.material)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since_on_detail(self):
+        url = reverse(f"{LmConfig.name}:course-detail", kwargs={"pk": self.course.pk})
+        since = http_date(self.course.updated_at.timestamp() + 1)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_object(self):
+        url = reverse(f"{LmConfig.name}:course-detail", kwargs={"pk": self.course.pk + 100})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", response)
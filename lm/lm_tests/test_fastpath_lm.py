@@ -0,0 +1,105 @@
+import datetime
+import tempfile
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, EducationalModule, Enrollment, Material
+from ..renderers import FastJSONRenderer
+
+User = get_user_model()
+
+
+class FastJSONRendererTest(TestCase):
+    def test_same_bytes_as_json_renderer(self):
+        data = {
+            "text": 'Курс \u2028\u2029 "quoted" \\ emoji \U0001f600',
+            "number": 1,
+            "float": 12.5,
+            "none": None,
+            "list": [True, False, {"nested": "value"}],
+            "date": datetime.datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+            "decimal": Decimal("1.50"),
+            "uuid": uuid.UUID(int=1),
+            1: "integer key",
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_uses_standard_path(self):
+        data = {"key": [1, 2]}
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ValuesListTest(TestCase):
+    """Быстрый путь списков отдает те же байты, что и ModelSerializer"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@test.com", password="testpass123", role="student"
+        )
+        for number in range(3):
+            course = Course.objects.create(title=f"Курс {number}", description="Описание", teacher=self.teacher)
+            module = EducationalModule.objects.create(
+                order_number=1, title=f"Модуль {number}", description="Описание", course=course, author=self.teacher
+            )
+            materials = [
+                Material.objects.create(title="Текст", content="Содержимое", type="text", uploaded_by=self.teacher),
+                Material.objects.create(
+                    title="Файл",
+                    content="",
+                    type="pdf",
+                    uploaded_by=self.teacher,
+                    file=SimpleUploadedFile(f"lecture{number}.pdf", b"%PDF-1.4"),
+                ),
+            ]
+            module.materials.add(*materials)
+            Enrollment.objects.create(student=self.student, module=module, progress=12.5 * number)
+
+    def assertSameContent(self, user, url, params=None):
+        self.client.force_authenticate(user=user)
+        responses = []
+        for fast in (False, True):
+            cache.clear()
+            with self.settings(FAST_LIST_SERIALIZATION=fast):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            responses.append(response.content)
+        self.assertEqual(responses[0], responses[1])
+        return responses[1]
+
+    def test_lm_lists(self):
+        for name in ("course-list", "module-list", "material-list"):
+            with self.subTest(name=name):
+                self.assertSameContent(self.teacher, reverse(f"{LmConfig.name}:{name}"))
+        self.assertSameContent(self.student, reverse(f"{LmConfig.name}:enrollment-list"))
+
+    def test_user_list(self):
+        self.assertSameContent(self.teacher, reverse("users:user-list"))
+        self.assertSameContent(self.teacher, reverse("users:user-list"), {"role": "student"})
+
+    def test_cursor_pagination(self):
+        url = reverse(f"{LmConfig.name}:material-list")
+        content = self.assertSameContent(self.teacher, url, {"pagination": "cursor", "page_size": 4})
+        self.assertIn(b'"next":"http', content)
+
+    def test_sparse_fields(self):
+        url = reverse(f"{LmConfig.name}:module-list")
+        self.assertSameContent(self.teacher, url, {"fields": "id,materials"})
+        self.assertSameContent(self.teacher, reverse("users:user-list"), {"exclude": "authored_courses"})
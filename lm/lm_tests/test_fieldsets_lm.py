@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, EducationalModule, Material
+
+User = get_user_model()
+
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+        self.course = Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+        self.module = EducationalModule.objects.create(
+            order_number=1, title="Module", description="Description", course=self.course, author=self.teacher
+        )
+        self.material = Material.objects.create(
+            title="Material", content="Long article", type="text", uploaded_by=self.teacher
+        )
+        self.module.materials.add(self.material)
+
+    def get(self, name, params, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(f"{LmConfig.name}:{name}", kwargs=kwargs), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, " ".join(query["sql"] for query in context.captured_queries)
+
+    def test_fields(self):
+        """В ответе и в SQL только выбранные поля, content не читается из базы"""
+        response, sql = self.get("material-list", {"fields": "id,title,type"})
+        self.assertEqual(response.data["results"], [{"id": self.material.id, "title": "Material", "type": "text"}])
+        self.assertNotIn('"content"', sql)
+
+    def test_exclude(self):
+        response, sql = self.get("material-detail", {"exclude": "content,file"}, pk=self.material.pk)
+        self.assertEqual(set(response.data), {"id", "title", "type", "uploaded_by", "uploaded_at"})
+        self.assertNotIn('"content"', sql)
+
+    def test_unknown_fields_are_ignored(self):
+        response, _ = self.get("course-detail", {"fields": "title,unknown"}, pk=self.course.pk)
+        self.assertEqual(response.data, {"title": "Course"})
+
+    def test_prefetch_skipped_without_materials(self):
+        response, sql = self.get("module-list", {"fields": "id,title"})
+        self.assertEqual(response.data["results"], [{"id": self.module.id, "title": "Module"}])
+        self.assertNotIn("lm_educationalmodule_materials", sql)
+
+        response, _ = self.get("module-detail", {"fields": "materials"}, pk=self.module.pk)
+        self.assertEqual(response.data, {"materials": [self.material.id]})
+
+    def test_cursor_pagination(self):
+        response, _ = self.get("course-list", {"fields": "title", "pagination": "cursor", "page_size": 1})
+        self.assertEqual(response.data["results"], [{"title": "Course"}])
+
+    def test_write_ignores_fields(self):
+        """На запись выборка полей не действует"""
+        url = reverse(f"{LmConfig.name}:material-create") + "?fields=id"
+        response = self.client.post(url, {"title": "New", "content": "Content", "type": "text"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["title"], "New")
@@ -0,0 +1,119 @@
+import io
+import struct
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from pypdf import PdfWriter
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..media import make_thumbnail, read_mp4_duration, read_pdf
+from ..models import Material, MaterialMetadata
+from ..tasks import process_material_media
+
+User = get_user_model()
+
+
+def make_png(size=(800, 600)):
+    output = io.BytesIO()
+    Image.new("RGB", size, "red").save(output, format="PNG")
+    return output.getvalue()
+
+
+def make_pdf(pages=2):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def make_mp4(timescale=1000, duration=90500):
+    mvhd = struct.pack(">B3xIIII", 0, 0, 0, timescale, duration) + bytes(80)
+    moov = struct.pack(">I4s", len(mvhd) + 16, b"moov") + struct.pack(">I4s", len(mvhd) + 8, b"mvhd") + mvhd
+    ftyp = struct.pack(">I4s", 16, b"ftyp") + b"isom" + bytes(4)
+    return ftyp + moov
+
+
+class MediaTest(TestCase):
+    def test_thumbnail(self):
+        with Image.open(io.BytesIO(make_thumbnail(io.BytesIO(make_png())))) as image:
+            self.assertEqual(image.format, "PNG")
+            self.assertEqual(image.size, (320, 240))
+
+    def test_thumbnail_not_image(self):
+        self.assertIsNone(make_thumbnail(io.BytesIO(b"not an image")))
+
+    def test_mp4_duration(self):
+        data = make_mp4()
+        self.assertEqual(read_mp4_duration(io.BytesIO(data), len(data)), 90.5)
+
+    def test_read_pdf(self):
+        result = read_pdf(io.BytesIO(make_pdf()))
+        self.assertEqual(result["page_count"], 2)
+        self.assertEqual(result["text"].strip(), "")
+        self.assertNotIn("thumbnail", result)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MaterialMediaProcessingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_processing_after_create(self):
+        """Метаданные появляются после коммита создания материала"""
+        upload = SimpleUploadedFile("picture.png", make_png(), content_type="image/png")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(f"{LmConfig.name}:material-create"),
+                {"title": "Picture", "content": "Content", "type": "text", "file": upload},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(
+            reverse(f"{LmConfig.name}:material-metadata", kwargs={"material_id": response.data["id"]})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], MaterialMetadata.DONE)
+        self.assertTrue(response.data["thumbnail"])
+
+    def test_broken_file_marks_failed(self):
+        """Битый файл не роняет задачу, а помечается ошибкой"""
+        material = Material.objects.create(
+            title="Video",
+            content="Content",
+            type="video",
+            uploaded_by=self.teacher,
+            file=SimpleUploadedFile("video.mp4", struct.pack(">I4s", 1, b"moov") + b"\x00\x00"),
+        )
+        process_material_media(material.pk)
+        metadata = MaterialMetadata.objects.get(material=material)
+        self.assertEqual(metadata.status, MaterialMetadata.FAILED)
+        self.assertTrue(metadata.error)
+
+    def test_material_without_file(self):
+        material = Material.objects.create(title="Text", content="Content", type="text", uploaded_by=self.teacher)
+        self.assertIsNone(process_material_media(material.pk))
+        self.assertFalse(MaterialMetadata.objects.exists())
+
+    def test_metadata_requires_material_access(self):
+        """Метаданные видят только те, кому доступен файл материала"""
+        material = Material.objects.create(title="Text", content="Content", type="text", uploaded_by=self.teacher)
+        MaterialMetadata.objects.create(material=material, status=MaterialMetadata.DONE)
+        url = reverse(f"{LmConfig.name}:material-metadata", kwargs={"material_id": material.pk})
+        outsider = User.objects.create_user(username="outsider", email="outsider@test.com", password="testpass123")
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.teacher)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
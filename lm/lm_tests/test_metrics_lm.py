@@ -0,0 +1,145 @@
+import asyncio
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..apps import LmConfig
+from ..metrics import QueryCollector, current_collector, fingerprint, get_metrics_store, get_registry
+from ..models import Course
+
+User = get_user_model()
+
+
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        get_registry().reset()
+        get_metrics_store().delete(list(get_metrics_store().load()))
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.com", password="testpass123", is_staff=True
+        )
+        Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+
+    def tearDown(self):
+        get_registry().reset()
+
+    def get_stats(self, endpoint, method="GET"):
+        return get_registry().stats[(endpoint, method)]
+
+    def test_records_endpoint(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.client.get(reverse(f"{LmConfig.name}:course-list"))
+        self.client.get(reverse(f"{LmConfig.name}:course-list"), {"page_size": 1})
+        stats = self.get_stats("lm:course-list")
+        self.assertEqual(stats.duration.count, 2)
+        self.assertGreater(stats.queries.sum, 0)
+        self.assertGreater(stats.db_time.sum, 0)
+
+        self.client.get("/no-such-path/")
+        self.assertEqual(self.get_stats("unresolved").duration.count, 1)
+
+    def test_async_view_queries_are_counted(self):
+        url = reverse(f"{LmConfig.name}:async-course-detail", kwargs={"pk": Course.objects.get().pk})
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.teacher)}"}
+        response = async_to_sync(self.async_client.get)(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(self.get_stats("lm:async-course-detail").queries.sum, 1)
+
+    def test_duplicate_queries(self):
+        """Одинаковые запросы с разными параметрами дают один отпечаток"""
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        try:
+            for user in User.objects.all():
+                Course.objects.filter(teacher=user).count()
+        finally:
+            current_collector.reset(token)
+        ((sql, count),) = collector.get_duplicates().items()
+        self.assertEqual(count, 1)
+        self.assertIn('FROM "lm_course"', sql)
+        self.assertEqual(
+            fingerprint("SELECT 1 WHERE a IN (%s, %s) AND b = 'x'"), "SELECT ? WHERE a IN (...) AND b = ?"
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_prometheus_endpoint(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.client.get(reverse(f"{LmConfig.name}:course-list"))
+        url = reverse(f"{LmConfig.name}:metrics")
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=None)
+        self.client.force_login(self.admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        content = response.content.decode()
+        self.assertIn("# TYPE lm_http_request_duration_seconds histogram", content)
+        self.assertIn('lm_http_request_duration_seconds_count{endpoint="lm:course-list",method="GET"} 1', content)
+        self.assertIn('lm_db_queries_per_request_bucket{endpoint="lm:course-list",method="GET",le="+Inf"} 1', content)
+
+        client = APIClient()
+        self.assertEqual(client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code, status.HTTP_200_OK)
+        self.assertEqual(client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_prometheus_endpoint_with_jwt(self):
+        """Персонал с JWT видит метрики так же, как с сессией"""
+        url = reverse(f"{LmConfig.name}:metrics")
+        client = APIClient()
+        response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.admin)}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_FLUSH_INTERVAL=0)
+    def test_async_flush_runs_outside_event_loop(self):
+        """В async-стеке снимок сохраняется в потоке: блокирующий запрос к Redis не останавливает цикл событий"""
+        store = get_metrics_store()
+        in_event_loop = []
+
+        def save(process, snapshot):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                in_event_loop.append(False)
+            else:
+                in_event_loop.append(True)
+
+        url = reverse(f"{LmConfig.name}:async-course-detail", kwargs={"pk": Course.objects.get().pk})
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.teacher)}"}
+        with mock.patch.object(store, "save", side_effect=save):
+            response = async_to_sync(self.async_client.get)(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(in_event_loop, [False])
+
+    def test_snapshots_are_merged(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.client.get(reverse(f"{LmConfig.name}:course-list"))
+        get_metrics_store().save("other:1", get_registry().snapshot())
+        stale = get_registry().snapshot()
+        stale["updated_at"] -= 10**6
+        get_metrics_store().save("other:2", stale)
+        collector = QueryCollector()
+        for number in range(3):
+            collector.add(f"SELECT * FROM lm_material WHERE id = {number}", 0.001)
+        get_registry().record("lm:material-list", "GET", 0.2, collector)
+
+        out = StringIO()
+        call_command("slow_endpoints", top=3, stdout=out)
+        output = out.getvalue()
+        self.assertIn("GET lm:course-list: 2 запр.", output)
+        self.assertIn("GET lm:material-list: 2.0 повторов на запрос", output)
+        self.assertIn("x2: SELECT * FROM lm_material WHERE id = ?", output)
+        self.assertNotIn("other:2", get_metrics_store().load())
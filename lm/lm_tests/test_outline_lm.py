@@ -0,0 +1,109 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, EducationalModule, Material
+from ..outline import build_course_outline, outline_key
+
+User = get_user_model()
+
+
+class CourseOutlineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+        self.course = Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+        self.modules = [
+            EducationalModule.objects.create(
+                order_number=number,
+                title=f"Module {number}",
+                description="Description",
+                course=self.course,
+                author=self.teacher,
+            )
+            for number in (2, 1)
+        ]
+        self.material = Material.objects.create(
+            title="Material", content="Content", type="text", uploaded_by=self.teacher
+        )
+        self.modules[0].materials.add(self.material)
+        self.url = reverse(f"{LmConfig.name}:course-outline", kwargs={"pk": self.course.pk})
+
+    def get_outline(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_outline(self):
+        """Модули идут по порядку, у материалов нет содержимого"""
+        outline = self.get_outline()
+        self.assertEqual(outline["title"], "Course")
+        self.assertEqual([module["order_number"] for module in outline["modules"]], [1, 2])
+        self.assertEqual(outline["modules"][0]["materials"], [])
+        (material,) = outline["modules"][1]["materials"]
+        self.assertEqual(material["id"], self.material.id)
+        self.assertNotIn("content", material)
+
+    def test_read_from_snapshot(self):
+        """Повторное чтение не обращается к базе"""
+        self.get_outline()
+        with CaptureQueriesContext(connection) as context:
+            self.get_outline()
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_changes_rebuild_snapshot(self):
+        self.get_outline()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.title = "Updated"
+            self.material.save()
+        self.assertEqual(self.get_outline()["modules"][1]["materials"][0]["title"], "Updated")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.modules[1].materials.add(self.material)
+        self.assertEqual(len(self.get_outline()["modules"][0]["materials"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.delete()
+        self.assertEqual([module["materials"] for module in self.get_outline()["modules"]], [[], []])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.modules[0].delete()
+        self.assertEqual(len(self.get_outline()["modules"]), 1)
+
+    def test_read_does_not_replace_rebuilt_snapshot(self):
+        """Снимок, собранный на чтении, не затирает уже сохраненный снимок пересборки"""
+        cache.set(outline_key(self.course.pk), b"rebuilt", timeout=None)
+        build_course_outline(self.course.pk, replace=False)
+        self.assertEqual(cache.get(outline_key(self.course.pk)), b"rebuilt")
+        build_course_outline(self.course.pk)
+        self.assertEqual(json.loads(cache.get(outline_key(self.course.pk)))["title"], "Course")
+
+    def test_module_moved_to_other_course(self):
+        other = Course.objects.create(title="Other", description="Description", teacher=self.teacher)
+        self.get_outline()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.modules[0].course = other
+            self.modules[0].save()
+        self.assertEqual(len(self.get_outline()["modules"]), 1)
+
+    def test_missing_course(self):
+        response = self.client.get(reverse(f"{LmConfig.name}:course-outline", kwargs={"pk": self.course.pk + 100}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleted_course(self):
+        self.get_outline()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, EducationalModule
+
+User = get_user_model()
+
+
+class PaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+        self.courses = [
+            Course.objects.create(title=f"Course {number}", description="Description", teacher=self.teacher)
+            for number in range(25)
+        ]
+        self.url = reverse(f"{LmConfig.name}:course-list")
+
+    def test_page_number_pagination_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_page_size_query_param(self):
+        response = self.client.get(self.url, {"page_size": 5, "page": 2})
+        self.assertEqual([course["id"] for course in response.data["results"]], [c.id for c in self.courses[5:10]])
+
+    def test_cursor_pagination_walks_all_rows(self):
+        """Проход по всем страницам курсора возвращает каждую строку ровно один раз"""
+        ids = []
+        url = self.url + "?pagination=cursor&page_size=7"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            ids.extend(course["id"] for course in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(ids, [course.id for course in self.courses])
+
+    def test_cursor_pagination_with_equal_timestamps(self):
+        Course.objects.update(created_at=self.courses[0].created_at)
+        ids = []
+        url = self.url + "?pagination=cursor&page_size=4"
+        while url:
+            response = self.client.get(url)
+            ids.extend(course["id"] for course in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(ids, [course.id for course in self.courses])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_rejects_other_ordering(self):
+        response = self.client.get(self.url, {"pagination": "cursor", "ordering": "-title"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"pagination": "cursor", "ordering": "created_at", "page_size": 30})
+        self.assertEqual([course["id"] for course in response.data["results"]], [c.id for c in self.courses])
+
+
+class ModulePaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+        courses = [
+            Course.objects.create(title=f"Course {number}", description="Description", teacher=self.teacher)
+            for number in range(2)
+        ]
+        # Модули создаются не по порядку номеров, номера повторяются в разных курсах
+        for number in (3, 1, 2):
+            for course in courses:
+                EducationalModule.objects.create(
+                    order_number=number, title="Module", description="Description", course=course, author=self.teacher
+                )
+        self.url = reverse(f"{LmConfig.name}:module-list")
+
+    def test_cursor_keeps_page_order(self):
+        """Режим курсора отдает модули в том же порядке, что и постраничный"""
+        expected = [module["id"] for module in self.client.get(self.url, {"page_size": 100}).data["results"]]
+        ids = []
+        url = self.url + "?pagination=cursor&page_size=4"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(module["id"] for module in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(ids, expected)
+        self.assertEqual([module.order_number for module in EducationalModule.objects.filter(pk__in=ids[:2])], [1, 1])
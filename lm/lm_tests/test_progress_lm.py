@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, EducationalModule, Enrollment
+from ..progress import MemoryProgressBuffer, get_progress_buffer
+from ..tasks import flush_progress
+
+User = get_user_model()
+
+
+class ProgressIngestionTest(TestCase):
+    def setUp(self):
+        get_progress_buffer().drain()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@test.com", password="testpass123", role="student"
+        )
+        self.course = Course.objects.create(title="Test Course", description="Test Description", teacher=self.teacher)
+        self.modules = [
+            EducationalModule.objects.create(
+                order_number=number, title="Module", description="Description", course=self.course, author=self.teacher
+            )
+            for number in range(2)
+        ]
+        self.enrollments = [Enrollment.objects.create(student=self.student, module=module) for module in self.modules]
+        self.url = reverse(f"{LmConfig.name}:enrollment-progress")
+
+    def post(self, events):
+        self.client.force_authenticate(user=self.student)
+        return self.client.post(self.url, events, format="json")
+
+    def test_events_are_buffered_until_flush(self):
+        response = self.post([{"module": self.modules[0].id, "progress": 10.0}])
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.enrollments[0].refresh_from_db()
+        self.assertEqual(self.enrollments[0].progress, 0.0)
+
+        self.assertEqual(flush_progress(), 1)
+        self.enrollments[0].refresh_from_db()
+        self.assertEqual(self.enrollments[0].progress, 10.0)
+        self.assertEqual(self.enrollments[0].status, "in_progress")
+
+    def test_events_are_coalesced_and_monotonic(self):
+        self.post([{"module": self.modules[0].id, "progress": 40.0}, {"module": self.modules[0].id, "progress": 20.0}])
+        self.post([{"module": self.modules[0].id, "progress": 30.0}])
+        flush_progress()
+        self.enrollments[0].refresh_from_db()
+        self.assertEqual(self.enrollments[0].progress, 40.0)
+
+        self.post([{"module": self.modules[0].id, "progress": 35.0}])
+        self.assertEqual(flush_progress(), 0)
+        self.enrollments[0].refresh_from_db()
+        self.assertEqual(self.enrollments[0].progress, 40.0)
+
+    def test_completed_at_100(self):
+        self.post([{"module": self.modules[1].id, "progress": 100.0}])
+        flush_progress()
+        self.enrollments[1].refresh_from_db()
+        self.assertEqual(self.enrollments[1].status, "completed")
+
+    def test_events_without_enrollment_are_dropped(self):
+        other = User.objects.create_user(username="other", email="other@test.com", password="testpass123")
+        self.client.force_authenticate(user=other)
+        self.client.post(self.url, [{"module": self.modules[0].id, "progress": 50.0}], format="json")
+        self.assertEqual(flush_progress(), 0)
+
+    def test_failed_flush_keeps_events(self):
+        """Если запись в базу не удалась, события возвращаются в буфер и записываются следующим запуском"""
+        self.post([{"module": self.modules[0].id, "progress": 60.0}])
+        with mock.patch.object(Enrollment.objects, "bulk_update", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                flush_progress()
+        self.post([{"module": self.modules[0].id, "progress": 50.0}])
+        self.assertEqual(flush_progress(), 1)
+        self.enrollments[0].refresh_from_db()
+        self.assertEqual(self.enrollments[0].progress, 60.0)
+
+    def test_invalid_progress(self):
+        response = self.post([{"module": self.modules[0].id, "progress": 150.0}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_teacher_forbidden(self):
+        self.client.force_authenticate(user=self.teacher)
+        response = self.client.post(self.url, [{"module": self.modules[0].id, "progress": 10.0}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MemoryProgressBufferTest(TestCase):
+    def test_keeps_maximum(self):
+        buffer = MemoryProgressBuffer()
+        buffer.add(1, {2: 30.0})
+        buffer.add(1, {2: 10.0})
+        self.assertEqual(buffer.drain(), {(1, 2): 30.0})
+        self.assertEqual(buffer.drain(), {})
+
+    def test_claim_returns_values_on_error(self):
+        buffer = MemoryProgressBuffer()
+        buffer.add(1, {2: 30.0})
+        with self.assertRaises(RuntimeError), buffer.claim() as pending:
+            self.assertEqual(pending, {(1, 2): 30.0})
+            buffer.add(1, {2: 10.0, 3: 5.0})
+            raise RuntimeError
+        self.assertEqual(buffer.drain(), {(1, 2): 30.0, (1, 3): 5.0})
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, EducationalModule, Enrollment, Material
+
+User = get_user_model()
+
+
+class QueryCountMixin:
+    """Проверка того, что число запросов не растет вместе с числом строк"""
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url, make_rows, batches=(1, 5)):
+        counts = []
+        for size in batches:
+            # Версия кэша ответов меняется после коммита
+            with self.captureOnCommitCallbacks(execute=True):
+                make_rows(size)
+            counts.append(self.count_queries(url))
+        self.assertEqual(len(set(counts)), 1, f"Число запросов к {url} растет: {counts}")
+
+
+class ListQueryCountTest(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@test.com", password="testpass123", role="student"
+        )
+        self.course = Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+        self.rows = 0
+
+    def make_modules(self, size):
+        for _ in range(size):
+            self.rows += 1
+            module = EducationalModule.objects.create(
+                order_number=self.rows,
+                title=f"Module {self.rows}",
+                description="Description",
+                course=self.course,
+                author=self.teacher,
+            )
+            module.materials.add(
+                Material.objects.create(title="Material", content="Content", type="text", uploaded_by=self.teacher)
+            )
+
+    def make_courses(self, size):
+        for _ in range(size):
+            Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+
+    def make_materials(self, size):
+        for _ in range(size):
+            Material.objects.create(title="Material", content="Content", type="text", uploaded_by=self.teacher)
+
+    def make_enrollments(self, size):
+        self.make_modules(size)
+        for module in EducationalModule.objects.filter(enrollments__isnull=True):
+            Enrollment.objects.create(student=self.student, module=module)
+
+    def test_course_list(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.assertConstantQueries(reverse(f"{LmConfig.name}:course-list"), self.make_courses)
+
+    def test_module_list(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.assertConstantQueries(reverse(f"{LmConfig.name}:module-list"), self.make_modules)
+
+    def test_material_list(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.assertConstantQueries(reverse(f"{LmConfig.name}:material-list"), self.make_materials)
+
+    def test_enrollment_list(self):
+        self.client.force_authenticate(user=self.student)
+        self.assertConstantQueries(reverse(f"{LmConfig.name}:enrollment-list"), self.make_enrollments)
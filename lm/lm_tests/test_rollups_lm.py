@@ -0,0 +1,224 @@
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, CourseProgress, CourseStats, EducationalModule, Enrollment
+from ..progress import get_progress_buffer
+from ..rollups import rebuild_rollups
+from ..tasks import flush_progress
+
+User = get_user_model()
+
+
+def snapshot():
+    """Все агрегаты без служебных полей"""
+    return (
+        sorted(
+            CourseProgress.objects.values_list("course_id", "student_id", "enrollments", "completed", "progress_sum")
+        ),
+        sorted(
+            CourseStats.objects.values_list(
+                "course_id", "modules", "students", "enrollments", "completed", "progress_sum"
+            )
+        ),
+    )
+
+
+class RollupTestMixin:
+    def setUp(self):
+        cache.clear()
+        get_progress_buffer().drain()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role=User.TEACHER
+        )
+        self.students = [
+            User.objects.create_user(
+                username=f"student{number}", email=f"student{number}@test.com", password="testpass123"
+            )
+            for number in range(2)
+        ]
+        self.course = Course.objects.create(title="Course", description="Description", teacher=self.teacher)
+        self.modules = [
+            EducationalModule.objects.create(
+                order_number=number, title="Module", description="Description", course=self.course, author=self.teacher
+            )
+            for number in range(4)
+        ]
+
+    def tearDown(self):
+        cache.clear()
+
+    def assertMatchesRebuild(self):
+        incremental = snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, snapshot())
+
+
+class IncrementalRollupTest(RollupTestMixin, TestCase):
+    def test_enrollment_lifecycle(self):
+        """Создание, изменение прогресса и удаление записей дают те же агрегаты, что и полный пересчет"""
+        enrollment = Enrollment.objects.create(student=self.students[0], module=self.modules[0])
+        Enrollment.objects.create(
+            student=self.students[0], module=self.modules[1], progress=40.0, status="in_progress"
+        )
+        Enrollment.objects.create(student=self.students[1], module=self.modules[0])
+        self.assertMatchesRebuild()
+
+        enrollment.progress = 100.0
+        enrollment.status = "completed"
+        enrollment.save()
+        progress = CourseProgress.objects.get(course=self.course, student=self.students[0])
+        self.assertEqual((progress.enrollments, progress.completed, progress.progress_sum), (2, 1, 140.0))
+        self.assertMatchesRebuild()
+
+        Enrollment.objects.filter(student=self.students[1]).delete()
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.modules, stats.students, stats.enrollments), (4, 1, 2))
+        self.assertMatchesRebuild()
+
+    def test_unrelated_save_skips_rollups(self):
+        enrollment = Enrollment.objects.create(student=self.students[0], module=self.modules[0])
+        with self.assertNumQueries(1):
+            enrollment.save(update_fields=["enrolled_at"])
+
+    def test_progress_save_does_not_load_module(self):
+        """Курс записи берется из запроса pre_save, модуль не загружается"""
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0])
+        enrollment = Enrollment.objects.get()
+        enrollment.progress = 60.0
+        enrollment.save()
+        self.assertFalse(Enrollment.module.is_cached(enrollment))
+        self.assertEqual(CourseStats.objects.get(course=self.course).progress_sum, 60.0)
+        self.assertMatchesRebuild()
+
+    def test_flush_progress_updates_rollups(self):
+        for module in self.modules[:2]:
+            Enrollment.objects.create(student=self.students[0], module=module)
+        get_progress_buffer().add(self.students[0].pk, {self.modules[0].pk: 100.0, self.modules[1].pk: 30.0})
+        self.assertEqual(flush_progress(), 2)
+        progress = CourseProgress.objects.get(course=self.course, student=self.students[0])
+        self.assertEqual((progress.completed, progress.progress_sum), (1, 130.0))
+        self.assertMatchesRebuild()
+
+    def test_bulk_enrollment_updates_rollups(self):
+        self.client.force_authenticate(user=self.teacher)
+        response = self.client.post(
+            reverse(f"{LmConfig.name}:enrollment-bulk-create"),
+            {"students": [student.pk for student in self.students], "course": self.course.pk},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.students, stats.enrollments), (2, 8))
+        self.assertMatchesRebuild()
+
+    def test_module_moved_and_deleted(self):
+        other = Course.objects.create(title="Other", description="Description", teacher=self.teacher)
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0], progress=50.0)
+        Enrollment.objects.create(student=self.students[0], module=self.modules[1])
+        self.modules[0].course = other
+        self.modules[0].save()
+        self.assertEqual(CourseStats.objects.get(course=other).progress_sum, 50.0)
+        self.assertMatchesRebuild()
+
+        self.modules[1].delete()
+        self.assertFalse(CourseProgress.objects.filter(course=self.course).exists())
+        self.assertMatchesRebuild()
+
+    def test_course_delete(self):
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0])
+        self.course.delete()
+        self.assertEqual(snapshot(), ([], []))
+
+    def test_rebuild_command(self):
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0], progress=20.0)
+        expected = snapshot()
+        CourseProgress.objects.all().delete()
+        CourseStats.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_progress_rollups", course=[self.course.pk], stdout=out)
+        self.assertIn("Строк прогресса студентов: 1", out.getvalue())
+        self.assertEqual(snapshot(), expected)
+
+    def test_rebuild_updates_stats_in_place(self):
+        """Пересчет не удаляет строки CourseStats: их блокировки ждут параллельные изменения"""
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0], progress=20.0)
+        expected = snapshot()
+        CourseStats.objects.update(students=5, enrollments=7, progress_sum=1.0)
+        with CaptureQueriesContext(connection) as context:
+            rebuild_rollups()
+        self.assertEqual(snapshot(), expected)
+        self.assertFalse(
+            [query for query in context.captured_queries if 'DELETE FROM "lm_coursestats"' in query["sql"]]
+        )
+
+    def test_data_migration_builds_rollups(self):
+        """Миграция 0013 строит агрегаты для данных, которые были до таблиц агрегатов"""
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0], progress=100.0, status="completed")
+        Enrollment.objects.create(student=self.students[1], module=self.modules[1], progress=30.0)
+        other = Course.objects.create(title="Empty", description="Description", teacher=self.teacher)
+        expected = snapshot()
+        CourseProgress.objects.all().delete()
+        CourseStats.objects.all().delete()
+        import_module("lm.migrations.0013_build_course_rollups").build_course_rollups(apps, None)
+        self.assertEqual(snapshot(), expected)
+        self.assertEqual(CourseStats.objects.get(course=other).modules, 0)
+
+
+class RollupViewsTest(RollupTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0], progress=100.0, status="completed")
+        Enrollment.objects.create(
+            student=self.students[0], module=self.modules[1], progress=50.0, status="in_progress"
+        )
+        Enrollment.objects.create(student=self.students[1], module=self.modules[0])
+        self.stats_url = reverse(f"{LmConfig.name}:course-stats", kwargs={"pk": self.course.pk})
+        self.progress_url = reverse(
+            f"{LmConfig.name}:course-student-progress",
+            kwargs={"pk": self.course.pk, "student_id": self.students[0].pk},
+        )
+
+    def test_course_stats(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.client.get(self.stats_url)
+        # Профиль прав уже в кэше: одна строка CourseStats
+        with self.assertNumQueries(1):
+            response = self.client.get(self.stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["students"], 2)
+        self.assertEqual(response.data["enrollments"], 3)
+        self.assertEqual(response.data["average_progress"], 50.0)
+        self.assertEqual(response.data["completion_rate"], 33.33)
+
+    def test_course_stats_forbidden_for_student(self):
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.get(self.stats_url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_student_progress(self):
+        self.client.force_authenticate(user=self.students[0])
+        with self.assertNumQueries(1):
+            response = self.client.get(self.progress_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["modules"], 4)
+        self.assertEqual(response.data["completed"], 1)
+        self.assertEqual(response.data["average_progress"], 75.0)
+        self.assertEqual(response.data["course_progress"], 37.5)
+
+    def test_student_progress_of_other_student(self):
+        self.client.force_authenticate(user=self.students[1])
+        self.assertEqual(self.client.get(self.progress_url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.teacher)
+        self.assertEqual(self.client.get(self.progress_url).status_code, status.HTTP_200_OK)
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Course, Material
+from ..search import FullTextSearchFilter
+
+User = get_user_model()
+
+
+class FullTextSearchFilterTest(TestCase):
+    """На SQLite поиск работает через запасной SearchFilter с тем же параметром ?search="""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+        self.python = Course.objects.create(title="Python", description="Основы языка", teacher=self.teacher)
+        self.django = Course.objects.create(title="Django", description="Веб на Python", teacher=self.teacher)
+        Course.objects.create(title="SQL", description="Базы данных", teacher=self.teacher)
+
+    def test_sqlite_fallback(self):
+        self.assertFalse(FullTextSearchFilter().supports_full_text(Course.objects.all()))
+
+    def test_search_courses(self):
+        response = self.client.get(reverse(f"{LmConfig.name}:course-list"), {"search": "python"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual([course["id"] for course in response.data["results"]], [self.python.id, self.django.id])
+
+    def test_search_respects_ordering_param(self):
+        response = self.client.get(reverse(f"{LmConfig.name}:course-list"), {"search": "python", "ordering": "title"})
+        self.assertEqual([course["title"] for course in response.data["results"]], ["Django", "Python"])
+
+    def test_search_materials_content(self):
+        material = Material.objects.create(
+            title="Лекция", content="Индексы GIN и полнотекстовый поиск", type="text", uploaded_by=self.teacher
+        )
+        Material.objects.create(title="Другое", content="Не про это", type="text", uploaded_by=self.teacher)
+        response = self.client.get(reverse(f"{LmConfig.name}:material-list"), {"search": "GIN"})
+        self.assertEqual([item["id"] for item in response.data["results"]], [material.id])
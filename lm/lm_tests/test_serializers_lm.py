@@ -215,6 +215,8 @@ class EnrollmentModelTest(TestCase):
             student=self.student, module=self.module, progress=0.0, status="enrolled"
         )
         enrollment_min.full_clean()  # Не должно вызывать исключение
+        # На модуль можно записаться один раз
+        enrollment_min.delete()
 
         enrollment_max = Enrollment.objects.create(
             student=self.student, module=self.module, progress=100.0, status="enrolled"
@@ -232,6 +234,7 @@ class EnrollmentModelTest(TestCase):
             )
             enrollment.full_clean()  # Не должно вызывать исключение
             self.assertEqual(enrollment.status, status)
+            enrollment.delete()
 
         # Тест недопустимого статуса
         with self.assertRaises(ValidationError):
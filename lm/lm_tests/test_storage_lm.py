@@ -0,0 +1,140 @@
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..blobs import collect_unreferenced_blobs
+from ..models import Blob, Material
+from ..storage import material_storage
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.data = b"%PDF-1.4 same content"
+        self.digest = hashlib.sha256(self.data).hexdigest()
+
+    def create_material(self, filename="lecture.pdf", data=None):
+        return Material.objects.create(
+            title="Lecture",
+            content="Content",
+            type="pdf",
+            uploaded_by=self.teacher,
+            file=SimpleUploadedFile(filename, data or self.data),
+        )
+
+    def test_same_content_stored_once(self):
+        first = self.create_material("a.pdf")
+        second = self.create_material("b.PDF")
+        self.assertEqual(first.file.name, f"blobs/{self.digest[:2]}/{self.digest[2:4]}/{self.digest}.pdf")
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+    def test_reference_counting_and_garbage_collection(self):
+        first = self.create_material()
+        second = self.create_material()
+        name = first.file.name
+
+        first.delete()
+        self.assertEqual(Blob.objects.get(name=name).ref_count, 1)
+        second.file = SimpleUploadedFile("other.pdf", b"other content")
+        second.save()
+        self.assertEqual(Blob.objects.get(name=name).ref_count, 0)
+        self.assertEqual(Blob.objects.get(name=second.file.name).ref_count, 1)
+
+        # Файл без ссылок удаляется только после периода ожидания
+        self.assertEqual(collect_unreferenced_blobs(), 0)
+        self.assertTrue(material_storage.exists(name))
+        self.assertEqual(collect_unreferenced_blobs(grace=timedelta(0)), 1)
+        self.assertFalse(material_storage.exists(name))
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+
+    def test_saving_same_content_postpones_collection(self):
+        """Сохранение блоба, ожидающего сборки, продлевает его период ожидания"""
+        name = self.create_material().file.name
+        Material.objects.all().delete()
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        self.create_material("again.pdf")
+        Material.objects.all().delete()
+        self.assertEqual(collect_unreferenced_blobs(), 0)
+        self.assertTrue(material_storage.exists(name))
+
+    def test_unsaved_material_file_is_collected(self):
+        """Файл, записанный в хранилище без сохраненного материала, учтен в Blob без ссылок"""
+        name = material_storage.save("orphan.pdf", SimpleUploadedFile("orphan.pdf", self.data))
+        blob = Blob.objects.get(name=name)
+        self.assertEqual((blob.ref_count, blob.size), (0, len(self.data)))
+        self.assertEqual(collect_unreferenced_blobs(grace=timedelta(0)), 1)
+        self.assertFalse(material_storage.exists(name))
+
+        self.create_material()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+    def test_update_without_file_change_keeps_count(self):
+        material = self.create_material()
+        material.title = "Updated"
+        material.save()
+        Material.objects.only("id", "title").get(pk=material.pk).save()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+    def test_download_etag(self):
+        material = self.create_material()
+        client = APIClient()
+        client.force_authenticate(user=self.teacher)
+        url = reverse(f"{LmConfig.name}:material-download", kwargs={"pk": material.pk})
+
+        response = client.get(url)
+        self.assertEqual(response["ETag"], f'"{self.digest}"')
+        # Файл хранится под хешем, скачивается под исходным именем
+        self.assertEqual(response["Content-Disposition"], 'inline; filename="lecture.pdf"')
+        response = client.get(url, HTTP_IF_NONE_MATCH=f'"{self.digest}"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_migrate_existing_files(self):
+        os.makedirs(material_storage.path("materials"), exist_ok=True)
+        with open(material_storage.path("materials/old.pdf"), "wb") as file:
+            file.write(self.data)
+        material = self.create_material()
+        legacy = Material.objects.create(title="Old", content="Old", type="pdf", uploaded_by=self.teacher)
+        Material.objects.filter(pk=legacy.pk).update(file="materials/old.pdf")
+
+        out = StringIO()
+        call_command("migrate_material_blobs", stdout=out)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.file.name, material.file.name)
+        self.assertEqual(legacy.filename, "old.pdf")
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        self.assertFalse(material_storage.exists("materials/old.pdf"))
+        self.assertIn("Перенесено: 1", out.getvalue())
+
+    def test_migrate_shared_original(self):
+        """Исходный файл нескольких материалов удаляется только после переноса последнего из них"""
+        os.makedirs(material_storage.path("materials"), exist_ok=True)
+        with open(material_storage.path("materials/shared.pdf"), "wb") as file:
+            file.write(self.data)
+        legacy = [
+            Material.objects.create(title="Old", content="Old", type="pdf", uploaded_by=self.teacher) for _ in range(2)
+        ]
+        Material.objects.filter(pk__in=[material.pk for material in legacy]).update(file="materials/shared.pdf")
+
+        out = StringIO()
+        call_command("migrate_material_blobs", stdout=out)
+        self.assertIn("Перенесено: 2, не найдено: 0", out.getvalue())
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        self.assertFalse(material_storage.exists("materials/shared.pdf"))
@@ -0,0 +1,135 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Course, EducationalModule, Enrollment, Material
+from ..tasks import (
+    NOTIFICATION_DEBOUNCE,
+    last_user_login,
+    notify_material_updated,
+    send_debounced_notification,
+    send_notification_batch,
+)
+
+User = get_user_model()
+
+
+class LastUserLoginTaskTest(TestCase):
+    def setUp(self):
+        stale = timezone.now() - timedelta(days=31)
+        self.stale_users = [
+            User.objects.create(username=f"stale{number}", email=f"stale{number}@test.com", last_login=stale)
+            for number in range(5)
+        ]
+        self.recent = User.objects.create(username="recent", email="recent@test.com", last_login=timezone.now())
+        self.never = User.objects.create(username="never", email="never@test.com")
+
+    def test_deactivates_stale_users_in_chunks(self):
+        self.assertEqual(last_user_login(chunk_size=2), 5)
+        self.assertFalse(User.objects.filter(pk__in=[user.pk for user in self.stale_users], is_active=True).exists())
+        self.recent.refresh_from_db()
+        self.never.refresh_from_db()
+        self.assertTrue(self.recent.is_active)
+        self.assertTrue(self.never.is_active)
+
+    def test_idempotent(self):
+        last_user_login()
+        self.assertEqual(last_user_login(), 0)
+
+
+class MaterialNotificationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        course = Course.objects.create(title="Test Course", description="Test Description", teacher=self.teacher)
+        self.material = Material.objects.create(
+            title="Lecture", content="Content", type="text", uploaded_by=self.teacher
+        )
+        modules = []
+        for number in range(2):
+            module = EducationalModule.objects.create(
+                order_number=number, title="Module", description="Description", course=course, author=self.teacher
+            )
+            module.materials.add(self.material)
+            modules.append(module)
+        self.students = [
+            User.objects.create(username=f"student{number}", email=f"student{number}@test.com") for number in range(5)
+        ]
+        for student in self.students:
+            for module in modules:
+                Enrollment.objects.create(student=student, module=module)
+        User.objects.create(username="outsider", email="outsider@test.com")
+
+    def test_material_update_notifies_each_student_once(self):
+        self.material.title = "Lecture v2"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.save()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [s.email for s in self.students])
+        self.assertIn("Lecture v2", mail.outbox[0].body)
+
+    def test_recipients_are_batched(self):
+        with mock.patch.object(send_notification_batch, "delay") as delay:
+            self.assertEqual(notify_material_updated(self.material.pk, batch_size=2), 3)
+        self.assertEqual([len(call.args[1]) for call in delay.call_args_list], [2, 2, 1])
+
+    def test_repeated_updates_are_debounced(self):
+        """Серия изменений дает одну рассылку после паузы; изменение во время ожидания ее переносит"""
+        started = time.time()
+        with mock.patch("lm.tasks.time.time", return_value=started):
+            with mock.patch.object(send_debounced_notification, "apply_async") as apply_async:
+                for number in range(3):
+                    self.edit_material(f"Content {number}")
+        apply_async.assert_called_once_with((self.material.pk,), countdown=NOTIFICATION_DEBOUNCE)
+
+        with mock.patch("lm.tasks.time.time", return_value=started + NOTIFICATION_DEBOUNCE - 30):
+            self.edit_material("Content 3")
+        with mock.patch("lm.tasks.time.time", return_value=started + NOTIFICATION_DEBOUNCE):
+            with mock.patch.object(send_debounced_notification, "apply_async") as apply_async:
+                self.assertFalse(send_debounced_notification.run(self.material.pk))
+        self.assertEqual(apply_async.call_args.kwargs["countdown"], NOTIFICATION_DEBOUNCE - 30)
+        self.assertEqual(mail.outbox, [])
+
+        with mock.patch("lm.tasks.time.time", return_value=started + 2 * NOTIFICATION_DEBOUNCE):
+            self.assertTrue(send_debounced_notification.run(self.material.pk))
+        self.assertEqual(len(mail.outbox), len(self.students))
+
+        # После рассылки следующее изменение ставит новую
+        with mock.patch.object(send_debounced_notification, "apply_async") as apply_async:
+            self.edit_material("Content 4")
+        apply_async.assert_called_once()
+
+    def edit_material(self, content):
+        self.material.content = content
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.save()
+
+    def test_unchanged_save_does_not_notify(self):
+        """Сохранение без изменения названия, содержимого или файла студентам не рассылается"""
+        with mock.patch.object(send_debounced_notification, "apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.material.save()
+                self.material.type = "link"
+                self.material.save(update_fields=["type"])
+                self.material.title = "Lecture v2"
+                self.material.save(update_fields=["type"])
+        apply_async.assert_not_called()
+
+        with mock.patch.object(send_debounced_notification, "apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.material.save(update_fields=["title"])
+        apply_async.assert_called_once()
+
+    def test_batch_uses_single_connection(self):
+        with mock.patch("lm.tasks.get_connection", wraps=get_connection) as connection_factory:
+            send_notification_batch(self.material.pk, [student.email for student in self.students])
+        self.assertEqual(connection_factory.call_count, 1)
+        self.assertEqual(len(mail.outbox), len(self.students))
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..apps import LmConfig
+from ..models import Blob, Material, UploadSession
+from ..uploads import chain_checksum, cleanup_stale_sessions, get_part_path, spool_chunk
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ChunkedUploadTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=self.teacher)
+        self.data = os.urandom(3000)
+        response = self.client.post(
+            reverse(f"{LmConfig.name}:material-upload-create"),
+            {"filename": "../lecture.pdf", "size": len(self.data), "title": "Lecture", "type": "pdf"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.session_id = response.data["id"]
+        self.url = reverse(f"{LmConfig.name}:material-upload-detail", kwargs={"pk": self.session_id})
+        self.finalize_url = reverse(f"{LmConfig.name}:material-upload-finalize", kwargs={"pk": self.session_id})
+
+    def finalize(self, chunks):
+        checksum = ""
+        for chunk in chunks:
+            checksum = chain_checksum(checksum, hashlib.sha256(chunk).hexdigest())
+        return self.client.post(self.finalize_url, HTTP_UPLOAD_CHECKSUM=checksum)
+
+    def put_chunk(self, offset, chunk, **headers):
+        return self.client.put(
+            self.url, chunk, content_type="application/octet-stream", HTTP_UPLOAD_OFFSET=str(offset), **headers
+        )
+
+    def test_upload_in_chunks_and_finalize(self):
+        chunks = [self.data[:1000], self.data[1000:2000], self.data[2000:]]
+        offset = 0
+        for chunk in chunks:
+            checksum = hashlib.sha256(chunk).hexdigest()
+            response = self.put_chunk(offset, chunk, HTTP_UPLOAD_CHECKSUM=checksum)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["offset"], offset + len(chunk))
+            offset += len(chunk)
+        self.assertFalse(Material.objects.exists())
+
+        response = self.client.post(self.finalize_url, HTTP_UPLOAD_CHECKSUM="0" * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(os.path.exists(get_part_path(UploadSession.objects.get())))
+
+        response = self.finalize(chunks)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        material = Material.objects.get(pk=response.data["id"])
+        digest = hashlib.sha256(self.data).hexdigest()
+        self.assertEqual(material.file.name, f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.pdf")
+        self.assertEqual(material.filename, "lecture.pdf")
+        with material.file.open("rb") as file:
+            self.assertEqual(file.read(), self.data)
+        self.assertFalse(UploadSession.objects.exists())
+        # Файл перенесен в хранилище, в каталоге частей ничего не осталось
+        parts = os.listdir(os.path.dirname(get_part_path(UploadSession(pk=self.session_id))))
+        self.assertFalse([name for name in parts if name.startswith(str(self.session_id))])
+
+    def test_failed_finalize_can_be_retried(self):
+        self.put_chunk(0, self.data)
+        with mock.patch.object(UploadSession, "delete", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.finalize([self.data])
+        self.assertFalse(Material.objects.exists())
+        # Файл уже в хранилище: без ссылок его удалит сборщик мусора, если завершение не повторят
+        self.assertEqual(Blob.objects.get().ref_count, 0)
+        self.assertEqual(self.finalize([self.data]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+        with Material.objects.get().file.open("rb") as file:
+            self.assertEqual(file.read(), self.data)
+
+    def test_resume_after_bad_chunk(self):
+        self.put_chunk(0, self.data[:1000])
+        response = self.put_chunk(1000, self.data[1000:2000], HTTP_UPLOAD_CHECKSUM="0" * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["offset"], 1000)
+
+        # Клиент узнает позицию и продолжает с нее
+        self.assertEqual(self.client.get(self.url).data["offset"], 1000)
+        self.assertEqual(self.put_chunk(1000, self.data[1000:]).status_code, status.HTTP_200_OK)
+        response = self.finalize([self.data[:1000], self.data[1000:]])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with Material.objects.get().file.open("rb") as file:
+            self.assertEqual(file.read(), self.data)
+
+    def test_wrong_offset_conflict(self):
+        response = self.put_chunk(500, self.data[500:1000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["offset"], 0)
+
+    def test_offset_taken_while_chunk_was_read(self):
+        """Пока тело читалось без блокировки, параллельный запрос дописал ту же позицию"""
+
+        def spool_then_race(session, offset, stream, checksum=None):
+            spooled = spool_chunk(session, offset, stream, checksum)
+            UploadSession.objects.filter(pk=session.pk).update(offset=1000)
+            return spooled
+
+        with mock.patch("lm.uploads.spool_chunk", side_effect=spool_then_race):
+            response = self.put_chunk(0, self.data[:1000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["offset"], 1000)
+        self.assertFalse(os.path.exists(get_part_path(UploadSession.objects.get())))
+
+    def test_chunk_beyond_size_rejected(self):
+        response = self.put_chunk(0, self.data + b"extra")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url).data["offset"], 0)
+
+    def test_finalize_incomplete(self):
+        self.put_chunk(0, self.data[:10])
+        response = self.client.post(self.finalize_url)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_other_user_cannot_see_session(self):
+        other = User.objects.create_user(
+            username="other", email="other@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cleanup_stale_sessions(self):
+        self.put_chunk(0, self.data[:10])
+        session = UploadSession.objects.get()
+        path = get_part_path(session)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(cleanup_stale_sessions(), 0)
+
+        UploadSession.objects.update(updated_at=session.updated_at - timedelta(days=2))
+        self.assertEqual(cleanup_stale_sessions(), 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(UploadSession.objects.exists())
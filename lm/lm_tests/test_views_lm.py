@@ -1,6 +1,11 @@
 # lm/lm_tests/test_views_lm.py
+import tempfile
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -8,7 +13,8 @@ from rest_framework.test import APIClient
 from users.models import CustomUser
 
 from ..apps import LmConfig
-from ..models import Course, EducationalModule, Enrollment, Material
+from ..models import Course, CourseStats, EducationalModule, Enrollment, Material
+from ..serializers import BulkEnrollmentSerializer
 
 User = get_user_model()
 
@@ -87,7 +93,7 @@ class MaterialViewsTest(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_list_material_unauthenticated(self):
         """Тест получения списка материалов (неаутентифицированный пользователь)"""
@@ -213,3 +219,168 @@ class EnrollmentViewsTest(TestCase):
         response = self.client.get(url)
         # Проверяем, что преподаватель не может получить доступ к записям
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class EnrollmentBulkCreateViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.students = [
+            User.objects.create_user(
+                username=f"student{number}", email=f"student{number}@test.com", password="testpass123"
+            )
+            for number in range(3)
+        ]
+        self.course = Course.objects.create(title="Test Course", description="Test Description", teacher=self.teacher)
+        self.modules = [
+            EducationalModule.objects.create(
+                order_number=number, title="Module", description="Description", course=self.course, author=self.teacher
+            )
+            for number in range(2)
+        ]
+        self.url = reverse(f"{LmConfig.name}:enrollment-bulk-create")
+
+    def test_bulk_enroll_course(self):
+        self.client.force_authenticate(user=self.teacher)
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0])
+        data = {"students": [student.id for student in self.students] + [self.teacher.id], "course": self.course.id}
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 5)
+        self.assertEqual(len(response.data["results"]), 8)
+        statuses = {(row["student"], row["module"]): row["status"] for row in response.data["results"]}
+        self.assertEqual(statuses[(self.students[0].id, self.modules[0].id)], "exists")
+        self.assertEqual(statuses[(self.teacher.id, self.modules[0].id)], "invalid_student")
+        self.assertEqual(Enrollment.objects.count(), 6)
+
+        # Повторный запрос идемпотентен
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.data["created"], 0)
+        self.assertEqual(Enrollment.objects.count(), 6)
+
+    def test_bulk_enroll_modules(self):
+        self.client.force_authenticate(user=self.teacher)
+        data = {"students": [self.students[0].id], "modules": [self.modules[1].id, 999999]}
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([row["status"] for row in response.data["results"]], ["created", "invalid_module"])
+
+    def test_modules_or_course_required(self):
+        self.client.force_authenticate(user=self.teacher)
+        response = self.client.post(self.url, {"students": [self.students[0].id]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_student_forbidden(self):
+        self.client.force_authenticate(user=self.students[0])
+        response = self.client.post(self.url, {"students": [self.students[0].id], "course": self.course.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_other_teacher_course_forbidden(self):
+        other = User.objects.create_user(
+            username="other", email="other@test.com", password="testpass123", role="teacher"
+        )
+        self.client.force_authenticate(user=other)
+        for data in ({"course": self.course.id}, {"modules": [self.modules[0].id]}):
+            response = self.client.post(self.url, {"students": [self.students[0].id], **data}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Enrollment.objects.exists())
+
+    def test_bulk_enroll_skips_pairs_inserted_concurrently(self):
+        """Пара, которой не было при проверке, но которая уже записана, не учитывается как созданная"""
+        self.client.force_authenticate(user=self.teacher)
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0])
+        data = {"students": [self.students[0].id, self.students[1].id], "modules": [self.modules[0].id]}
+        with mock.patch.object(BulkEnrollmentSerializer, "get_existing_pairs", return_value=set()):
+            response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([row["status"] for row in response.data["results"]], ["exists", "created"])
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.students, stats.enrollments), (2, 2))
+
+    def test_bulk_enroll_pairs_limit(self):
+        self.client.force_authenticate(user=self.teacher)
+        data = {"students": [student.id for student in self.students], "course": self.course.id}
+        with mock.patch.object(BulkEnrollmentSerializer, "max_pairs", 5):
+            response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Enrollment.objects.exists())
+
+    def test_duplicate_enrollment_rejected_by_database(self):
+        Enrollment.objects.create(student=self.students[0], module=self.modules[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Enrollment.objects.create(student=self.students[0], module=self.modules[0])
+
+        self.client.force_authenticate(user=self.students[0])
+        response = self.client.post(reverse(f"{LmConfig.name}:enrollment-create"), {"module": self.modules[0].id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MaterialDownloadViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role="teacher"
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@test.com", password="testpass123", role="student"
+        )
+        self.outsider = User.objects.create_user(
+            username="outsider", email="outsider@test.com", password="testpass123", role="student"
+        )
+        self.content = bytes(range(256)) * 4
+        self.material = Material.objects.create(
+            title="Video",
+            content="Content",
+            type="video",
+            uploaded_by=self.teacher,
+            file=SimpleUploadedFile("lecture.mp4", self.content),
+        )
+        course = Course.objects.create(title="Test Course", description="Test Description", teacher=self.teacher)
+        module = EducationalModule.objects.create(
+            order_number=1, title="Module", description="Description", course=course, author=self.teacher
+        )
+        module.materials.add(self.material)
+        Enrollment.objects.create(student=self.student, module=module)
+        self.url = reverse(f"{LmConfig.name}:material-download", kwargs={"pk": self.material.pk})
+
+    def test_enrolled_student_streams_file(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+    def test_range_request(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+    def test_unsatisfiable_range(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.content)}-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT=True)
+    def test_accel_redirect(self):
+        self.client.force_authenticate(user=self.teacher)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.material.file.name}")
+        self.assertEqual(response.content, b"")
+
+    def test_outsider_forbidden(self):
+        self.client.force_authenticate(user=self.outsider)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
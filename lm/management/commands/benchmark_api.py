@@ -0,0 +1,162 @@
+import json
+import subprocess
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+
+from lm.benchmarks import SCENARIOS, SEED_PREFIX, BenchmarkContext, summarize
+from lm.metrics import get_registry
+from lm.models import Course, EducationalModule, Enrollment, Material
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон эндпоинтов списков, детальных и создания на данных seed_benchmark_data: "
+        "p50/p95/p99, запросов в секунду и запросов к базе на запрос. Запросы идут через WSGI-обработчик "
+        "в процессе, по клиенту на поток. --output сохраняет JSON для сравнения между коммитами (--baseline)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий")
+        parser.add_argument("--concurrency", type=int, default=10, help="Потоков с запросами")
+        parser.add_argument("--only", action="append", help="Сценарий по метке (можно несколько раз)")
+        parser.add_argument("--seed", type=int, default=42, help="Seed выборки ID для запросов")
+        parser.add_argument("--output", help="Файл для JSON с результатами")
+        parser.add_argument("--baseline", help="JSON прошлого прогона: вывести изменение p95")
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options["only"]:
+            unknown = set(options["only"]) - {scenario.label for scenario in SCENARIOS}
+            if unknown:
+                raise CommandError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in SCENARIOS if scenario.label in options["only"]]
+        baseline = {}
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)["results"]
+
+        try:
+            context = BenchmarkContext(options["seed"], f"{SEED_PREFIX}run_{uuid.uuid4().hex[:8]}_")
+        except LookupError as error:
+            raise CommandError(str(error))
+        report = {"meta": self.get_meta(options), "results": {}}
+        try:
+            for scenario in scenarios:
+                result = self.run_scenario(scenario, context, options["requests"], options["concurrency"])
+                report["results"][scenario.label] = result
+                self.write_result(scenario.label, result, baseline.get(scenario.label))
+        finally:
+            context.cleanup()
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Результаты сохранены в {options['output']}"))
+
+    def get_meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "seed": options["seed"],
+            "rows": {
+                "users": User.objects.filter(username__startswith=SEED_PREFIX).count(),
+                "courses": Course.objects.count(),
+                "modules": EducationalModule.objects.count(),
+                "materials": Material.objects.count(),
+                "enrollments": Enrollment.objects.count(),
+            },
+        }
+
+    def run_scenario(self, scenario, context, requests, concurrency):
+        """
+        Запросы сценария из concurrency потоков. Запросы к базе считает RequestMetricsMiddleware:
+        агрегаты процесса сбрасываются перед сценарием и читаются после него.
+        """
+        registry = get_registry()
+        registry.reset()
+        lock = threading.Lock()
+        numbers = iter(range(requests))
+        latencies = []
+        errors = Counter()
+        threaded = concurrency > 1
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    # Параметры строятся под блокировкой: случайные ID выбираются в одном порядке
+                    with lock:
+                        number = next(numbers, None)
+                        if number is None:
+                            return
+                        path, data, headers = scenario.build(context, number)
+                    started = time.perf_counter()
+                    if scenario.method == "get":
+                        response = client.get(path, data, headers=headers)
+                    else:
+                        response = client.post(path, data, content_type="application/json", headers=headers)
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        if response.status_code != scenario.status:
+                            errors[str(response.status_code)] += 1
+            finally:
+                if threaded:
+                    connections.close_all()
+
+        started = time.perf_counter()
+        if threaded:
+            threads = [threading.Thread(target=worker) for _ in range(min(concurrency, requests))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            # В одном потоке запросы идут в соединении команды и видят ее незафиксированные данные
+            worker()
+        result = summarize(latencies, time.perf_counter() - started)
+
+        endpoint = registry.stats.get((scenario.name, scenario.method.upper()))
+        result.update(
+            endpoint=scenario.name,
+            method=scenario.method.upper(),
+            errors=dict(errors),
+            queries_per_request=endpoint.queries.sum / endpoint.queries.count if endpoint else None,
+            db_time_ms=endpoint.db_time.sum / endpoint.db_time.count * 1e3 if endpoint else None,
+        )
+        return result
+
+    def write_result(self, label, result, previous):
+        latency = result["latency_ms"]
+        queries = result["queries_per_request"]
+        line = (
+            f"{label:<32} {result['throughput']:8.1f} запр/с  p50 {latency['p50']:7.1f}  p95 {latency['p95']:7.1f}  "
+            f"p99 {latency['p99']:7.1f} мс  запросов к базе {queries if queries is None else round(queries, 1)}"
+        )
+        if previous and previous["latency_ms"]["p95"]:
+            change = latency["p95"] / previous["latency_ms"]["p95"] - 1
+            line += f"  p95 {change:+.0%}"
+        if result["errors"]:
+            self.stdout.write(self.style.ERROR(f"{line}  ошибки {result['errors']}"))
+        else:
+            self.stdout.write(line)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lm.models import Course, EducationalModule, Enrollment, Material
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - нужен только для --url
+    httpx = None
+
+User = get_user_model()
+
+# Пары синхронных и асинхронных эндпоинтов: (имя, роль пользователя, нужен ли pk курса)
+ENDPOINTS = [
+    ("course-list", User.TEACHER, False),
+    ("course-detail", User.TEACHER, True),
+    ("module-list", User.TEACHER, False),
+    ("material-list", User.TEACHER, False),
+    ("enrollment-list", User.STUDENT, False),
+]
+
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает синхронные и асинхронные (lm.async_views) эндпоинты чтения под конкурентной нагрузкой: "
+        "запросов в секунду, p50 и p95. По умолчанию запросы идут через ASGI-обработчик в процессе на временных "
+        "данных; с --url - на запущенный ASGI-сервер (uvicorn config.asgi:application), нужен httpx."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Запросов на эндпоинт")
+        parser.add_argument("--concurrency", type=int, default=20, help="Одновременных запросов")
+        parser.add_argument("--rows", type=int, default=50, help="Курсов во временных данных")
+        parser.add_argument("--cached", action="store_true", help="Не отключать кэш ответов")
+        parser.add_argument("--url", help="Адрес запущенного сервера, например http://127.0.0.1:8000")
+        parser.add_argument("--teacher-token", help="JWT преподавателя для --url")
+        parser.add_argument("--student-token", help="JWT студента для --url")
+        parser.add_argument("--course", type=int, help="ID курса для course-detail при --url")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            if httpx is None:
+                raise CommandError("Для --url нужен пакет httpx")
+            if not (options["teacher_token"] and options["student_token"] and options["course"]):
+                raise CommandError("Для --url нужны --teacher-token, --student-token и --course")
+            tokens = {User.TEACHER: options["teacher_token"], User.STUDENT: options["student_token"]}
+            async_to_sync(self.run)(options, tokens, options["course"])
+            return
+
+        settings = {} if options["cached"] else {"CACHES": NO_CACHE, "ASYNC_CACHE_URL": None}
+        with override_settings(**settings), transaction.atomic():
+            tokens, course_id = self.seed(options["rows"])
+            async_to_sync(self.run)(options, tokens, course_id)
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        teacher = User.objects.create(
+            username="benchmark_teacher", email="benchmark_teacher@example.com", role=User.TEACHER
+        )
+        student = User.objects.create(
+            username="benchmark_student", email="benchmark_student@example.com", role=User.STUDENT
+        )
+        courses = Course.objects.bulk_create(
+            Course(title=f"Course {number}", description="Description", teacher=teacher) for number in range(rows)
+        )
+        modules = EducationalModule.objects.bulk_create(
+            EducationalModule(order_number=1, title="Module", description="", course=course, author=teacher)
+            for course in courses
+        )
+        materials = Material.objects.bulk_create(
+            Material(title="Material", content="Content", type="text", uploaded_by=teacher) for _ in modules
+        )
+        EducationalModule.materials.through.objects.bulk_create(
+            EducationalModule.materials.through(educationalmodule=module, material=material)
+            for module, material in zip(modules, materials)
+        )
+        Enrollment.objects.bulk_create(Enrollment(student=student, module=module) for module in modules)
+        tokens = {User.TEACHER: str(AccessToken.for_user(teacher)), User.STUDENT: str(AccessToken.for_user(student))}
+        return tokens, courses[0].pk
+
+    async def run(self, options, tokens, course_id):
+        if options["url"]:
+            client = httpx.AsyncClient(base_url=options["url"], timeout=60)
+        else:
+            client = AsyncClient()
+        self.stdout.write(f"{options['requests']} запросов на эндпоинт, {options['concurrency']} одновременно")
+        for name, role, detail in ENDPOINTS:
+            kwargs = {"pk": course_id} if detail else {}
+            headers = {"Authorization": f"Bearer {tokens[role]}"}
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            results = {}
+            for stack, url_name in (("sync", f"lm:{name}"), ("async", f"lm:async-{name}")):
+                path = reverse(url_name, kwargs=kwargs)
+                if options["cached"]:
+                    await client.get(path, headers=headers)
+                results[stack] = await self.measure(client, path, headers, options["requests"], options["concurrency"])
+                throughput, p50, p95 = results[stack]
+                self.stdout.write(
+                    f"  {stack:<5}: {throughput:8.1f} запр/с, p50 {p50 * 1e3:7.1f} мс, p95 {p95 * 1e3:7.1f} мс"
+                )
+            self.stdout.write(self.style.SUCCESS(f"  async/sync: x{results['async'][0] / results['sync'][0]:.2f}"))
+        if options["url"]:
+            await client.aclose()
+
+    async def measure(self, client, path, headers, requests, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def request():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"{path} вернул {response.status_code}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return requests / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
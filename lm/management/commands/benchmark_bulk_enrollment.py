@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from lm.models import Course, EducationalModule
+from lm.serializers import BulkEnrollmentSerializer, EnrollmentSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость массовой записи на модули с записью по одной строке. Данные откатываются."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=200)
+        parser.add_argument("--modules", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options["students"], options["modules"])
+            transaction.set_rollback(True)
+
+    def run(self, students_count, modules_count):
+        teacher = User.objects.create(username="benchmark_teacher", email="benchmark_teacher@example.com")
+        course = Course.objects.create(title="Benchmark", description="Benchmark", teacher=teacher)
+        modules = EducationalModule.objects.bulk_create(
+            EducationalModule(order_number=number, title="Module", description="", course=course, author=teacher)
+            for number in range(modules_count * 2)
+        )
+        students = User.objects.bulk_create(
+            User(username=f"benchmark_student_{number}", email=f"benchmark_student_{number}@example.com")
+            for number in range(students_count)
+        )
+        rows = students_count * modules_count
+        factory = APIRequestFactory()
+
+        # Путь EnrollmentCreateView: сериализатор, проверка и INSERT на каждую строку
+        started = time.perf_counter()
+        for student in students:
+            request = factory.post("/")
+            request.user = student
+            for module in modules[:modules_count]:
+                serializer = EnrollmentSerializer(data={"module": module.pk}, context={"request": request})
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+        per_row = time.perf_counter() - started
+
+        request = factory.post("/")
+        request.user = teacher
+        started = time.perf_counter()
+        serializer = BulkEnrollmentSerializer(
+            data={
+                "students": [student.pk for student in students],
+                "modules": [m.pk for m in modules[modules_count:]],
+            },
+            context={"request": request},
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        bulk = time.perf_counter() - started
+
+        self.stdout.write(f"Строк: {rows}")
+        self.stdout.write(f"По одной: {per_row:.3f} с ({rows / per_row:.0f} строк/с)")
+        self.stdout.write(f"Массово:  {bulk:.3f} с ({rows / bulk:.0f} строк/с)")
+        self.stdout.write(self.style.SUCCESS(f"Ускорение: x{per_row / bulk:.1f}"))
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from lm.tasks import INACTIVE_DAYS, last_user_login
+
+User = get_user_model()
+
+
+def legacy_deactivate():
+    """Прежняя реализация: отдельный save() на каждого пользователя"""
+    cutoff = timezone.now() - timedelta(days=INACTIVE_DAYS)
+    count = 0
+    for user in User.objects.filter(is_active=True, last_login__lt=cutoff):
+        user.is_active = False
+        user.save()
+        count += 1
+    return count
+
+
+class Command(BaseCommand):
+    help = "Сравнивает пакетную блокировку неактивных пользователей с циклом save(). Данные откатываются."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options["users"], options["chunk_size"])
+            transaction.set_rollback(True)
+
+    def run(self, users_count, chunk_size):
+        last_login = timezone.now() - timedelta(days=INACTIVE_DAYS + 1)
+        users = User.objects.bulk_create(
+            User(
+                username=f"benchmark_user_{number}",
+                email=f"benchmark_user_{number}@example.com",
+                last_login=last_login,
+            )
+            for number in range(users_count)
+        )
+        ids = [user.pk for user in users]
+
+        started = time.perf_counter()
+        legacy_count = legacy_deactivate()
+        legacy = time.perf_counter() - started
+
+        User.objects.filter(pk__in=ids).update(is_active=True)
+        started = time.perf_counter()
+        count = last_user_login(chunk_size=chunk_size)
+        chunked = time.perf_counter() - started
+
+        self.stdout.write(f"Цикл save():   {legacy_count} строк за {legacy:.3f} с")
+        self.stdout.write(f"Пакетный UPDATE: {count} строк за {chunked:.3f} с")
+        self.stdout.write(self.style.SUCCESS(f"Ускорение: x{legacy / chunked:.1f}"))
@@ -0,0 +1,60 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from lm.fastpath import ValuesSerializer
+from lm.models import Course, EducationalModule, Enrollment
+from lm.renderers import FastJSONRenderer
+from lm.serializers import CourseSerializer, EnrollmentSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает стоимость строки в ModelSerializer + JSONRenderer и в быстром пути списков. Данные откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Строк на страницу")
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options["rows"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def run(self, rows, repeat):
+        teacher = User.objects.create(username="benchmark_teacher", email="benchmark_teacher@example.com")
+        student = User.objects.create(username="benchmark_student", email="benchmark_student@example.com")
+        courses = Course.objects.bulk_create(
+            Course(title=f"Course {number}", description="Description", teacher=teacher) for number in range(rows)
+        )
+        modules = EducationalModule.objects.bulk_create(
+            EducationalModule(order_number=1, title="Module", description="", course=course, author=teacher)
+            for course in courses
+        )
+        Enrollment.objects.bulk_create(Enrollment(student=student, module=module) for module in modules)
+
+        for serializer_class in (CourseSerializer, EnrollmentSerializer):
+            model = serializer_class.Meta.model
+            queryset = model.objects.order_by("id")[:rows]
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                slow = JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+            slow_time = (time.perf_counter() - started) / (repeat * rows)
+
+            values_serializer = ValuesSerializer(serializer_class())
+            started = time.perf_counter()
+            for _ in range(repeat):
+                fast = FastJSONRenderer().render(values_serializer.serialize(values_serializer.values(queryset.all())))
+            fast_time = (time.perf_counter() - started) / (repeat * rows)
+
+            self.stdout.write(f"{model.__name__}: {rows} строк, вывод совпадает: {slow == fast}")
+            self.stdout.write(f"  ModelSerializer: {slow_time * 1e6:.1f} мкс/строку")
+            self.stdout.write(f"  Быстрый путь:    {fast_time * 1e6:.1f} мкс/строку")
+            self.stdout.write(self.style.SUCCESS(f"  Ускорение: x{slow_time / fast_time:.1f}"))
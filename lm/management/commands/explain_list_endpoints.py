@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+User = get_user_model()
+
+# Списочные эндпоинты и параметры, повторяющие реальные сценарии фильтрации и сортировки
+LIST_ENDPOINTS = [
+    ("lm:course-list", User.TEACHER, lambda user: {"teacher": user.pk, "ordering": "created_at"}),
+    ("lm:module-list", User.TEACHER, lambda user: {"author": user.pk, "ordering": "created_at"}),
+    ("lm:material-list", User.TEACHER, lambda user: {}),
+    ("lm:enrollment-list", User.STUDENT, lambda user: {}),
+    ("users:user-list", User.STUDENT, lambda user: {"role": User.STUDENT}),
+]
+
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет EXPLAIN для SQL, который генерируют списочные эндпоинты, и сообщает о последовательных "
+        "сканированиях. Запускать на базе с реалистичным объемом данных."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true", help="Печатать планы целиком")
+        parser.add_argument(
+            "--fail-on-seq-scan", action="store_true", help="Завершаться с ошибкой, если найдено сканирование"
+        )
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        found = 0
+        for url_name, role, get_params in LIST_ENDPOINTS:
+            user = User.objects.filter(role=role, is_active=True).first()
+            if user is None:
+                self.stdout.write(self.style.WARNING(f"{url_name}: нет пользователя с ролью {role}, пропущено"))
+                continue
+
+            url = reverse(url_name)
+            request = factory.get(url, get_params(user))
+            force_authenticate(request, user=user)
+            # Кэш ответов отключен, иначе запросы к базе не выполнятся
+            with override_settings(CACHES=NO_CACHE), CaptureQueriesContext(connection) as context:
+                response = resolve(url).func(request)
+            if response.status_code != 200:
+                raise CommandError(f"{url_name} вернул {response.status_code}")
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{url_name} ({len(context.captured_queries)} запросов)"))
+            for query in context.captured_queries:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                plan = self.explain(sql)
+                scans = [line for line in plan if self.is_seq_scan(line)]
+                found += len(scans)
+                status = self.style.ERROR("SEQ SCAN") if scans else self.style.SUCCESS("OK")
+                self.stdout.write(f"  [{status}] {sql[:150]}")
+                for line in plan if options["verbose_plans"] else scans:
+                    self.stdout.write(f"      {line}")
+
+        if found and options["fail_on_seq_scan"]:
+            raise CommandError(f"Найдено последовательных сканирований: {found}")
+        self.stdout.write(f"Всего последовательных сканирований: {found}")
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}")
+            rows = cursor.fetchall()
+        # Postgres возвращает строки плана, SQLite - (id, parent, notused, detail)
+        return [str(row[-1]) for row in rows]
+
+    @staticmethod
+    def is_seq_scan(line):
+        if connection.vendor == "postgresql":
+            return "Seq Scan" in line
+        return line.startswith("SCAN ") and " USING " not in line
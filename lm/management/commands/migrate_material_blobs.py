@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lm.blobs import acquire_blob
+from lm.models import Material
+from lm.storage import get_blob_digest, material_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит существующие файлы материалов в хранилище с адресацией по содержимому. "
+        "Файлы читаются потоком по частям, одинаковые файлы сохраняются один раз."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-originals", action="store_true", help="Не удалять исходные файлы")
+
+    def handle(self, *args, **options):
+        materials = (
+            Material.objects.exclude(file="").exclude(file__isnull=True).only("id", "file", "filename").order_by("pk")
+        )
+        migrated = missing = 0
+        for material in materials.iterator(chunk_size=500):
+            name = material.file.name
+            if get_blob_digest(name):
+                continue
+            if not material_storage.exists(name):
+                self.stdout.write(self.style.WARNING(f"Материал {material.pk}: файл {name} не найден"))
+                missing += 1
+                continue
+
+            with material_storage.open(name, "rb") as original:
+                blob_name = material_storage.save(name, original)
+            with transaction.atomic():
+                # update() без сигналов: ссылка на блоб учитывается явно; исходное имя остается для скачивания
+                Material.objects.filter(pk=material.pk).update(
+                    file=blob_name, filename=material.filename or os.path.basename(name)
+                )
+                acquire_blob(blob_name)
+            # Один исходный файл может быть у нескольких материалов: удаляется после переноса последнего
+            if not options["keep_originals"] and not Material.objects.filter(file=name).exists():
+                material_storage.delete(name)
+            migrated += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Перенесено: {migrated}, не найдено: {missing}"))
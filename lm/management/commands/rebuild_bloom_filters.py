@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from lm.bloom import BLOOM_SOURCES, get_bloom_filter, rebuild_bloom_filter
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает фильтры Блума из базы и печатает статистику: сколько проверок обошлось без запроса к базе "
+        '(negatives) и сколько ответов "возможно есть" оказались ложными (false_positives).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filter", choices=sorted(BLOOM_SOURCES), action="append", help="Только этот фильтр")
+        parser.add_argument("--stats", action="store_true", help="Только статистика, без пересборки")
+
+    def handle(self, *args, **options):
+        for name in options["filter"] or BLOOM_SOURCES:
+            if not options["stats"]:
+                count = rebuild_bloom_filter(name)
+                self.stdout.write(self.style.SUCCESS(f"{name}: добавлено элементов {count}"))
+            stats = get_bloom_filter(name).get_stats()
+            checks, negatives = stats.get("checks", 0), stats.get("negatives", 0)
+            share = negatives / checks if checks else 0
+            self.stdout.write(
+                f"{name}: проверок {checks}, без запроса к базе {negatives} ({share:.1%}), "
+                f"ложноположительных {stats.get('false_positives', 0)}"
+            )
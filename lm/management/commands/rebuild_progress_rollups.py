@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lm.rollups import REBUILD_BATCH_SIZE, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает агрегаты прогресса по курсам (CourseProgress, CourseStats) из записей на модули. "
+        "Нужен после пакетных вставок в обход сигналов и для исправления расхождений; начальные агрегаты строит миграция."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", help="Только этот курс (можно несколько раз)")
+        parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_rollups(options["course"], batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Строк прогресса студентов: {count} за {elapsed:.1f} с"))
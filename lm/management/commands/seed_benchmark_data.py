@@ -0,0 +1,213 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from lm.benchmarks import SEED_ADMIN, SEED_EMAIL_DOMAIN, SEED_PREFIX
+from lm.bloom import BLOOM_SOURCES, rebuild_bloom_filter
+from lm.cache import bump_generation
+from lm.models import Course, EducationalModule, Enrollment, Material
+from lm.rollups import rebuild_rollups
+
+User = get_user_model()
+
+# Распределение статусов записей: (статус, доля, диапазон прогресса)
+ENROLLMENT_STATUSES = [
+    ("enrolled", 0.4, (0.0, 0.0)),
+    ("in_progress", 0.45, (1.0, 99.0)),
+    ("completed", 0.15, (100.0, 100.0)),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует данные для нагрузочных тестов (benchmark_api) пакетными вставками. Пользователи получают "
+        f"префикс {SEED_PREFIX}, пароль у всех 'benchmark'. При одинаковом --seed данные одинаковы."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=100_000)
+        parser.add_argument("--teachers", type=int, default=500)
+        parser.add_argument("--courses", type=int, default=5_000)
+        parser.add_argument("--modules-per-course", type=int, default=4)
+        parser.add_argument("--materials-per-module", type=int, default=3)
+        parser.add_argument("--enrollments", type=int, default=2_000_000)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--clear", action="store_true", help="Сначала удалить ранее сгенерированные данные")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        if options["clear"]:
+            self.stage("Удаление прежних данных", self.clear)
+        elif User.objects.filter(username__startswith=SEED_PREFIX).exists():
+            raise CommandError("Данные уже сгенерированы; --clear удалит их перед генерацией")
+
+        modules_total = options["courses"] * options["modules_per_course"]
+        if options["enrollments"] > options["students"] * modules_total:
+            raise CommandError("Записей больше, чем пар студент-модуль")
+
+        with transaction.atomic():
+            teacher_ids = self.stage(
+                "Преподаватели", lambda: self.create_users("teacher", User.TEACHER, options["teachers"])
+            )
+            student_ids = self.stage(
+                "Студенты", lambda: self.create_users("student", User.STUDENT, options["students"])
+            )
+            User.objects.create_user(
+                username=SEED_ADMIN, email=f"admin@{SEED_EMAIL_DOMAIN}", password="benchmark", is_staff=True
+            )
+            course_ids = self.stage("Курсы", lambda: self.create_courses(teacher_ids, options["courses"]))
+            module_ids = self.stage(
+                "Модули", lambda: self.create_modules(course_ids, teacher_ids, options["modules_per_course"])
+            )
+            self.stage(
+                "Материалы", lambda: self.create_materials(module_ids, teacher_ids, options["materials_per_module"])
+            )
+            self.stage(
+                "Записи на модули", lambda: self.create_enrollments(student_ids, module_ids, options["enrollments"])
+            )
+
+        # Пакетные вставки не отправляют сигналы: кэш ответов, агрегаты прогресса и фильтры Блума обновляются явно
+        bump_generation("course")
+        bump_generation("module")
+        self.stage("Агрегаты прогресса", lambda: rebuild_rollups(course_ids))
+        for name in BLOOM_SOURCES:
+            self.stage(f"Фильтр Блума {name}", lambda: rebuild_bloom_filter(name))
+
+    def stage(self, title, function):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        count = len(result) if isinstance(result, list) else result
+        self.stdout.write(f"{title}: {count} за {elapsed:.1f} с")
+        return result
+
+    def clear(self):
+        users = User.objects.filter(username__startswith=SEED_PREFIX)
+        # Записи удаляются одним запросом, без загрузки в память
+        Enrollment.objects.filter(student__in=users).delete()
+        Material.objects.filter(uploaded_by__in=users).delete()
+        count, _ = users.delete()
+        return count
+
+    def bulk_create(self, model, objects):
+        """Пакетная вставка без накопления всех объектов в памяти"""
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+
+    def create_users(self, kind, role, count):
+        # Хеш пароля считается один раз: хеширование сотен тысяч паролей заняло бы часы
+        password = make_password("benchmark")
+        prefix = f"{SEED_PREFIX}{kind}_"
+        self.bulk_create(
+            User,
+            (
+                User(
+                    username=f"{prefix}{number}",
+                    email=f"{kind}_{number}@{SEED_EMAIL_DOMAIN}",
+                    password=password,
+                    role=role,
+                )
+                for number in range(count)
+            ),
+        )
+        return list(User.objects.filter(username__startswith=prefix).order_by("id").values_list("id", flat=True))
+
+    def create_courses(self, teacher_ids, count):
+        self.bulk_create(
+            Course,
+            (
+                Course(
+                    title=f"Курс {number}",
+                    description=f"Описание курса {number} " * self.rng.randint(1, 20),
+                    teacher_id=self.rng.choice(teacher_ids),
+                )
+                for number in range(count)
+            ),
+        )
+        return list(Course.objects.filter(teacher_id__in=teacher_ids).order_by("id").values_list("id", flat=True))
+
+    def create_modules(self, course_ids, teacher_ids, per_course):
+        self.bulk_create(
+            EducationalModule,
+            (
+                EducationalModule(
+                    order_number=order_number,
+                    title=f"Модуль {order_number} курса {number}",
+                    description="Описание модуля " * self.rng.randint(1, 20),
+                    course_id=course_id,
+                    author_id=self.rng.choice(teacher_ids),
+                )
+                for number, course_id in enumerate(course_ids)
+                for order_number in range(1, per_course + 1)
+            ),
+        )
+        return list(
+            EducationalModule.objects.filter(course_id__in=course_ids).order_by("id").values_list("id", flat=True)
+        )
+
+    def create_materials(self, module_ids, teacher_ids, per_module):
+        self.bulk_create(
+            Material,
+            (
+                Material(
+                    title=f"Материал {number}",
+                    content="Текст материала. " * self.rng.randint(10, 200),
+                    type=self.rng.choice(["text", "link"]),
+                    uploaded_by_id=self.rng.choice(teacher_ids),
+                )
+                for number in range(len(module_ids) * per_module)
+            ),
+        )
+        material_ids = list(
+            Material.objects.filter(uploaded_by_id__in=teacher_ids).order_by("id").values_list("id", flat=True)
+        )
+        through = EducationalModule.materials.through
+        self.bulk_create(
+            through,
+            (
+                through(educationalmodule_id=module_id, material_id=material_id)
+                for module_id, material_id in zip(
+                    (module_id for module_id in module_ids for _ in range(per_module)), material_ids
+                )
+            ),
+        )
+        return material_ids
+
+    def create_enrollments(self, student_ids, module_ids, count):
+        """Записи распределяются по студентам поровну, модули у студента не повторяются"""
+        per_student, remainder = divmod(count, len(student_ids))
+
+        def enrollments():
+            for index, student_id in enumerate(student_ids):
+                size = per_student + (1 if index < remainder else 0)
+                for module_index in self.rng.sample(range(len(module_ids)), size):
+                    status = self.pick_status()
+                    yield Enrollment(
+                        student_id=student_id,
+                        module_id=module_ids[module_index],
+                        status=status[0],
+                        progress=round(self.rng.uniform(*status[2]), 1),
+                    )
+
+        self.bulk_create(Enrollment, enrollments())
+        return count
+
+    def pick_status(self):
+        value = self.rng.random()
+        for status in ENROLLMENT_STATUSES:
+            value -= status[1]
+            if value <= 0:
+                return status
+        return ENROLLMENT_STATUSES[-1]
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from lm.metrics import SNAPSHOT_MAX_AGE, collect
+
+
+class Command(BaseCommand):
+    help = (
+        "Самые медленные эндпоинты и худшие случаи N+1 по метрикам RequestMetricsMiddleware "
+        "(снимки всех процессов из METRICS_URL). p95 - верхняя граница корзины гистограммы."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=10, help="Сколько эндпоинтов показать")
+        parser.add_argument("--fingerprints", type=int, default=1, help="Повторяющихся запросов на эндпоинт")
+        parser.add_argument("--max-age", type=int, default=SNAPSHOT_MAX_AGE, help="Игнорировать снимки старше, с")
+
+    def handle(self, *args, **options):
+        stats = collect(options["max_age"])
+        if not stats:
+            self.stdout.write("Метрик пока нет")
+            return
+        top = options["top"]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Самые медленные эндпоинты (топ {top} по среднему времени)"))
+        slowest = sorted(stats.items(), key=lambda item: item[1].duration.sum / item[1].duration.count, reverse=True)
+        for (endpoint, method), item in slowest[:top]:
+            count = item.duration.count
+            self.stdout.write(
+                f"  {method} {endpoint}: {count} запр., среднее {item.duration.sum / count * 1e3:.1f} мс, "
+                f"p95 <= {item.duration.quantile(0.95) * 1e3:.0f} мс, запросов к базе {item.queries.sum / count:.1f}, "
+                f"время базы {item.db_time.sum / count * 1e3:.1f} мс"
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"N+1 (топ {top} по повторам запросов на запрос)"))
+        offenders = sorted(
+            (entry for entry in stats.items() if entry[1].duplicate_queries),
+            key=lambda item: item[1].duplicate_queries / item[1].duration.count,
+            reverse=True,
+        )
+        if not offenders:
+            self.stdout.write("  Повторяющихся запросов нет")
+        for (endpoint, method), item in offenders[:top]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"  {method} {endpoint}: {item.duplicate_queries / item.duration.count:.1f} повторов на запрос, "
+                    f"в {item.requests_with_duplicates} из {item.duration.count} запросов"
+                )
+            )
+            for sql, count in item.fingerprints.most_common(options["fingerprints"]):
+                self.stdout.write(f"      x{count}: {sql[:200]}")
@@ -0,0 +1,86 @@
+import io
+import struct
+
+from PIL import Image, UnidentifiedImageError
+from pypdf import PdfReader
+
+THUMBNAIL_SIZE = (320, 320)
+MAX_TEXT_LENGTH = 1_000_000
+
+
+def make_thumbnail(file):
+    """PNG-миниатюра изображения или None, если Pillow не может его открыть"""
+    try:
+        with Image.open(file) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            output = io.BytesIO()
+            image.convert("RGB").save(output, format="PNG")
+    except (UnidentifiedImageError, OSError):
+        return None
+    return output.getvalue()
+
+
+def read_pdf(file):
+    """Текст, число страниц и миниатюра первого изображения первой страницы"""
+    file.seek(0)
+    reader = PdfReader(file)
+    text = []
+    length = 0
+    for page in reader.pages:
+        if length >= MAX_TEXT_LENGTH:
+            break
+        page_text = page.extract_text() or ""
+        text.append(page_text)
+        length += len(page_text)
+    result = {"page_count": len(reader.pages), "text": "\n".join(text)[:MAX_TEXT_LENGTH]}
+    if reader.pages and reader.pages[0].images:
+        result["thumbnail"] = make_thumbnail(io.BytesIO(reader.pages[0].images[0].data))
+    return result
+
+
+def iter_mp4_boxes(file, start, end):
+    position = start
+    while position + 8 <= end:
+        file.seek(position)
+        size, box_type = struct.unpack(">I4s", file.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", file.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header:
+            return
+        yield box_type, position + header, position + size
+        position += size
+
+
+def read_mp4_duration(file, size):
+    """Длительность MP4/MOV в секундах из заголовка moov/mvhd, без декодирования видео"""
+    for box_type, start, end in iter_mp4_boxes(file, 0, size):
+        if box_type != b"moov":
+            continue
+        for inner_type, inner_start, _ in iter_mp4_boxes(file, start, end):
+            if inner_type != b"mvhd":
+                continue
+            file.seek(inner_start)
+            version = file.read(4)[0]
+            if version == 1:
+                timescale, duration = struct.unpack(">16xIQ", file.read(28))
+            else:
+                timescale, duration = struct.unpack(">8xII", file.read(16))
+            return duration / timescale if timescale else None
+    return None
+
+
+def extract_metadata(field_file, material_type):
+    """Метаданные файла материала: размер, страницы и текст PDF, длительность видео, миниатюра"""
+    result = {"size": field_file.size}
+    with field_file.open("rb") as file:
+        if material_type == "pdf":
+            result.update(read_pdf(file))
+        elif material_type == "video":
+            result["duration"] = read_mp4_duration(file, result["size"])
+        else:
+            result["thumbnail"] = make_thumbnail(file)
+    return result
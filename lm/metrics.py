@@ -0,0 +1,342 @@
+import json
+import os
+import re
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Для отчета об N+1 на эндпоинт хранятся только самые частые повторяющиеся запросы
+MAX_FINGERPRINTS = 20
+MAX_FINGERPRINT_LENGTH = 500
+UNRESOLVED = "unresolved"
+# Снимки процессов, не обновлявшиеся дольше суток, считаются завершившимися
+SNAPSHOT_MAX_AGE = 60 * 60 * 24
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Литералы и списки параметров заменяются, чтобы запросы из цикла N+1 давали один отпечаток
+FINGERPRINT_PATTERNS = [
+    (re.compile(r"\bIN \([^()]*\)", re.IGNORECASE), "IN (...)"),
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+\b"), "?"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def fingerprint(sql):
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()[:MAX_FINGERPRINT_LENGTH]
+
+
+class QueryCollector:
+    """Запросы к базе одного HTTP-запроса"""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.fingerprints = Counter()
+
+    def add(self, sql, duration):
+        self.count += 1
+        self.time += duration
+        self.fingerprints[fingerprint(sql)] += 1
+
+    def get_duplicates(self):
+        """Отпечаток -> сколько раз запрос повторился сверх первого"""
+        return {sql: count - 1 for sql, count in self.fingerprints.items() if count > 1}
+
+
+# Сборщик текущего запроса; asgiref переносит его в потоки sync_to_async, поэтому учитывается и асинхронный ORM
+current_collector = ContextVar("current_collector", default=None)
+
+
+def query_wrapper(execute, sql, params, many, context):
+    collector = current_collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.add(sql, time.perf_counter() - started)
+
+
+def install_query_wrapper(sender=None, connection=None, **kwargs):
+    """Обработчик connection_created: обертка ставится один раз на соединение"""
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_wrapper)
+
+
+class Histogram:
+    def __init__(self, buckets, counts=None, total=0.0):
+        self.buckets = buckets
+        # Последний счетчик - значения больше последней границы (+Inf)
+        self.counts = counts or [0] * (len(buckets) + 1)
+        self.sum = total
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def merge(self, other):
+        self.counts = [left + right for left, right in zip(self.counts, other.counts)]
+        self.sum += other.sum
+
+    def quantile(self, q):
+        """Оценка квантиля сверху: граница корзины, в которой набирается доля q"""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return 0.0
+
+    def to_dict(self):
+        return {"counts": self.counts, "sum": self.sum}
+
+    @classmethod
+    def from_dict(cls, buckets, data):
+        return cls(buckets, list(data["counts"]), data["sum"])
+
+
+class EndpointStats:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_time = Histogram(DURATION_BUCKETS)
+        self.duplicate_queries = 0
+        self.requests_with_duplicates = 0
+        self.fingerprints = Counter()
+
+    def record(self, duration, collector):
+        self.duration.observe(duration)
+        self.queries.observe(collector.count)
+        self.db_time.observe(collector.time)
+        duplicates = collector.get_duplicates()
+        if duplicates:
+            self.duplicate_queries += sum(duplicates.values())
+            self.requests_with_duplicates += 1
+            self.fingerprints.update(duplicates)
+            if len(self.fingerprints) > MAX_FINGERPRINTS:
+                self.fingerprints = Counter(dict(self.fingerprints.most_common(MAX_FINGERPRINTS)))
+
+    def merge(self, other):
+        self.duration.merge(other.duration)
+        self.queries.merge(other.queries)
+        self.db_time.merge(other.db_time)
+        self.duplicate_queries += other.duplicate_queries
+        self.requests_with_duplicates += other.requests_with_duplicates
+        self.fingerprints.update(other.fingerprints)
+
+    def to_dict(self):
+        return {
+            "duration": self.duration.to_dict(),
+            "queries": self.queries.to_dict(),
+            "db_time": self.db_time.to_dict(),
+            "duplicate_queries": self.duplicate_queries,
+            "requests_with_duplicates": self.requests_with_duplicates,
+            "fingerprints": dict(self.fingerprints),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.duration = Histogram.from_dict(DURATION_BUCKETS, data["duration"])
+        stats.queries = Histogram.from_dict(QUERY_BUCKETS, data["queries"])
+        stats.db_time = Histogram.from_dict(DURATION_BUCKETS, data["db_time"])
+        stats.duplicate_queries = data["duplicate_queries"]
+        stats.requests_with_duplicates = data["requests_with_duplicates"]
+        stats.fingerprints = Counter(data["fingerprints"])
+        return stats
+
+
+class MetricsRegistry:
+    """Агрегаты по эндпоинтам (имя URL и метод) в памяти процесса"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, endpoint, method, duration, collector):
+        with self.lock:
+            stats = self.stats.setdefault((endpoint, method), EndpointStats())
+            stats.record(duration, collector)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "updated_at": time.time(),
+                "endpoints": [
+                    {"endpoint": endpoint, "method": method, **stats.to_dict()}
+                    for (endpoint, method), stats in self.stats.items()
+                ],
+            }
+
+    def claim_flush(self):
+        """True, если пора сохранить снимок; следующее сохранение - не раньше чем через METRICS_FLUSH_INTERVAL"""
+        now = time.monotonic()
+        if now - self.last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return False
+        self.last_flush = now
+        return True
+
+    def flush(self):
+        """Снимок процесса сохраняется в общее хранилище для /metrics и отчета (запрос к Redis)"""
+        get_metrics_store().save(get_process_key(), self.snapshot())
+
+    def maybe_flush(self):
+        if self.claim_flush():
+            self.flush()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+
+class RedisMetricsStore:
+    """Снимки агрегатов всех процессов в одном хеше Redis: процесс -> JSON"""
+
+    key = "lm:metrics:snapshots"
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def save(self, process, snapshot):
+        self.client.hset(self.key, process, json.dumps(snapshot))
+
+    def load(self):
+        return {process.decode(): json.loads(value) for process, value in self.client.hgetall(self.key).items()}
+
+    def delete(self, processes):
+        if processes:
+            self.client.hdel(self.key, *processes)
+
+
+class MemoryMetricsStore:
+    """Хранилище в памяти процесса для разработки и тестов"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = {}
+
+    def save(self, process, snapshot):
+        with self.lock:
+            self.snapshots[process] = snapshot
+
+    def load(self):
+        with self.lock:
+            return dict(self.snapshots)
+
+    def delete(self, processes):
+        with self.lock:
+            for process in processes:
+                self.snapshots.pop(process, None)
+
+
+@lru_cache(maxsize=None)
+def get_metrics_store():
+    if settings.METRICS_URL:
+        return RedisMetricsStore(settings.METRICS_URL)
+    return MemoryMetricsStore()
+
+
+def get_process_key():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@lru_cache(maxsize=None)
+def get_registry():
+    return MetricsRegistry()
+
+
+def collect(max_age=SNAPSHOT_MAX_AGE):
+    """
+    Агрегаты всех процессов: сохраненные снимки плюс свежие данные текущего процесса.
+    Снимки старше max_age секунд (завершившиеся процессы) удаляются из хранилища.
+    """
+    store = get_metrics_store()
+    snapshots = store.load()
+    if max_age is not None:
+        stale = [process for process, snapshot in snapshots.items() if time.time() - snapshot["updated_at"] > max_age]
+        store.delete(stale)
+        for process in stale:
+            del snapshots[process]
+    snapshots[get_process_key()] = get_registry().snapshot()
+
+    merged = {}
+    for snapshot in snapshots.values():
+        for data in snapshot["endpoints"]:
+            stats = EndpointStats.from_dict(data)
+            key = (data["endpoint"], data["method"])
+            if key in merged:
+                merged[key].merge(stats)
+            else:
+                merged[key] = stats
+    return merged
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_number(value):
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+def render_histogram(lines, name, help_text, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in histograms:
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{format_number(bound)}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+def render_prometheus(merged):
+    """Текстовый формат Prometheus (version 0.0.4)"""
+    items = [
+        (f'endpoint="{escape_label(endpoint)}",method="{escape_label(method)}"', stats)
+        for (endpoint, method), stats in sorted(merged.items())
+    ]
+    lines = []
+    render_histogram(
+        lines,
+        "lm_http_request_duration_seconds",
+        "Время обработки запроса",
+        [(labels, stats.duration) for labels, stats in items],
+    )
+    render_histogram(
+        lines,
+        "lm_db_queries_per_request",
+        "Запросов к базе за запрос",
+        [(labels, stats.queries) for labels, stats in items],
+    )
+    render_histogram(
+        lines,
+        "lm_db_time_seconds",
+        "Суммарное время запросов к базе за запрос",
+        [(labels, stats.db_time) for labels, stats in items],
+    )
+    lines.append("# HELP lm_db_duplicate_queries_total Повторы одинаковых запросов к базе (признак N+1)")
+    lines.append("# TYPE lm_db_duplicate_queries_total counter")
+    for labels, stats in items:
+        lines.append(f"lm_db_duplicate_queries_total{{{labels}}} {stats.duplicate_queries}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,55 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from lm.metrics import UNRESOLVED, QueryCollector, current_collector, get_registry
+
+
+class RequestMetricsMiddleware:
+    """
+    Время ответа, число и время запросов к базе, повторы одинаковых запросов - по имени URL.
+    Ставится первым в MIDDLEWARE, чтобы учитывать и остальные middleware. Работает в sync и async стеке.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        self.record(request, time.perf_counter() - started, collector)
+        get_registry().maybe_flush()
+        return response
+
+    async def __acall__(self, request):
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        self.record(request, time.perf_counter() - started, collector)
+        registry = get_registry()
+        if registry.claim_flush():
+            # Запись в Redis блокирующая: выполняется в потоке, а не в цикле событий
+            await sync_to_async(registry.flush, thread_sensitive=False)()
+        return response
+
+    @staticmethod
+    def record(request, duration, collector):
+        # Неизвестные пути собираются в одну группу, чтобы не плодить метки
+        endpoint = request.resolver_match.view_name if request.resolver_match else UNRESOLVED
+        get_registry().record(endpoint, request.method, duration, collector)
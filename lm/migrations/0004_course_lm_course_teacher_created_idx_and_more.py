@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0003_alter_course_teacher_alter_educationalmodule_author_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["teacher", "created_at"], name="lm_course_teacher_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["title"], name="lm_course_title_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["created_at", "id"], name="lm_course_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="educationalmodule",
+            index=models.Index(fields=["author", "created_at"], name="lm_module_author_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="educationalmodule",
+            index=models.Index(fields=["title"], name="lm_module_title_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="educationalmodule",
+            index=models.Index(fields=["created_at", "id"], name="lm_module_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(fields=["student", "status"], name="lm_enroll_student_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(fields=["student", "enrolled_at", "id"], name="lm_enroll_student_enrolled_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="material",
+            index=models.Index(fields=["uploaded_at", "id"], name="lm_material_uploaded_id_idx"),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:41
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_CONFIG = "russian"
+
+# Таблица -> поля с весами, из которых собирается search_vector
+SEARCH_VECTORS = {
+    "lm_course": [("title", "A"), ("description", "B")],
+    "lm_educationalmodule": [("title", "A"), ("description", "B")],
+    "lm_material": [("title", "A"), ("content", "B")],
+}
+
+
+def vector_sql(fields, prefix=""):
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({prefix}{field}, '')), '{weight}')"
+        for field, weight in fields
+    )
+
+
+def create_search_triggers(apps, schema_editor):
+    """Триггеры, GIN и триграммные индексы только для Postgres; на SQLite работает обычный поиск"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, fields in SEARCH_VECTORS.items():
+        columns = ", ".join(field for field, _ in fields)
+        schema_editor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {vector_sql(fields, "NEW.")};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+            """)
+        schema_editor.execute(
+            f"CREATE TRIGGER {table}_search_vector_trigger BEFORE INSERT OR UPDATE OF {columns} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();"
+        )
+        schema_editor.execute(f"UPDATE {table} SET search_vector = {vector_sql(fields)};")
+        schema_editor.execute(f"CREATE INDEX {table}_search_gin ON {table} USING gin (search_vector);")
+        schema_editor.execute(f"CREATE INDEX {table}_title_trgm ON {table} USING gin (title gin_trgm_ops);")
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in SEARCH_VECTORS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_title_trgm;")
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_gin;")
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table};")
+        schema_editor.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector_update();")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0004_course_lm_course_teacher_created_idx_and_more"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="course",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="educationalmodule",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="material",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:53
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0005_course_search_vector_educationalmodule_search_vector_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("filename", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField(help_text="Полный размер файла в байтах")),
+                ("offset", models.PositiveBigIntegerField(default=0, help_text="Сколько байт уже принято")),
+                ("checksum", models.CharField(blank=True, help_text="Цепочка SHA-256 принятых частей", max_length=64)),
+                ("title", models.CharField(max_length=200)),
+                ("content", models.TextField(blank=True)),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[("video", "Видео"), ("text", "Текст"), ("pdf", "PDF"), ("link", "Ссылка")],
+                        max_length=5,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Сессия загрузки",
+                "verbose_name_plural": "Сессии загрузки",
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:57
+
+import lm.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0006_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="material",
+            name="file",
+            field=models.FileField(
+                blank=True, null=True, storage=lm.storage.get_material_storage, upload_to="materials/"
+            ),
+        ),
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                ("name", models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ("size", models.PositiveBigIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Файл хранилища",
+                "verbose_name_plural": "Файлы хранилища",
+                "indexes": [models.Index(fields=["ref_count", "updated_at"], name="lm_blob_refcount_updated_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0007_alter_material_file_blob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaterialMetadata",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "В обработке"), ("done", "Готово"), ("failed", "Ошибка")],
+                        default="pending",
+                        max_length=7,
+                    ),
+                ),
+                ("size", models.PositiveBigIntegerField(blank=True, help_text="Размер файла в байтах", null=True)),
+                ("page_count", models.PositiveIntegerField(blank=True, null=True)),
+                ("duration", models.FloatField(blank=True, help_text="Длительность видео в секундах", null=True)),
+                ("text", models.TextField(blank=True, help_text="Текст, извлеченный из PDF")),
+                ("thumbnail", models.ImageField(blank=True, null=True, upload_to="thumbnails/")),
+                ("error", models.TextField(blank=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "material",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="metadata", to="lm.material"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Метаданные материала",
+                "verbose_name_plural": "Метаданные материалов",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0008_materialmetadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="material",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0009_material_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseStats",
+            fields=[
+                (
+                    "course",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="lm.course",
+                    ),
+                ),
+                ("modules", models.IntegerField(default=0)),
+                ("students", models.IntegerField(default=0, help_text="Студентов, записанных хотя бы на один модуль")),
+                ("enrollments", models.IntegerField(default=0)),
+                ("completed", models.IntegerField(default=0)),
+                ("progress_sum", models.FloatField(default=0.0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Статистика курса",
+                "verbose_name_plural": "Статистика курсов",
+            },
+        ),
+        migrations.CreateModel(
+            name="CourseProgress",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("enrollments", models.IntegerField(default=0, help_text="Записей на модули курса")),
+                ("completed", models.IntegerField(default=0, help_text="Завершенных модулей")),
+                ("progress_sum", models.FloatField(default=0.0, help_text="Сумма прогресса по записям")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="student_progress", to="lm.course"
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="course_progress",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Прогресс по курсу",
+                "verbose_name_plural": "Прогресс по курсам",
+                "constraints": [
+                    models.UniqueConstraint(fields=("course", "student"), name="lm_course_progress_unique")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:28
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def delete_duplicate_enrollments(apps, schema_editor):
+    """Из повторных записей на модуль остается одна: с наибольшим прогрессом, затем самая ранняя"""
+    Enrollment = apps.get_model("lm", "Enrollment")
+    duplicates = (
+        Enrollment.objects.values("student_id", "module_id").annotate(count=Count("id")).filter(count__gt=1).order_by()
+    )
+    for pair in duplicates.iterator():
+        rows = Enrollment.objects.filter(student_id=pair["student_id"], module_id=pair["module_id"])
+        keep = rows.order_by("-progress", "id").values_list("id", flat=True)[0]
+        rows.exclude(id=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0010_course_progress"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="enrollment",
+            constraint=models.UniqueConstraint(fields=("student", "module"), name="lm_enroll_student_module_uniq"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0011_enrollment_unique_student_module"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="material",
+            name="filename",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:10
+
+from django.db import migrations
+from django.db.models import Count, F, Q, Sum
+
+BATCH_SIZE = 5000
+
+
+def build_course_rollups(apps, schema_editor):
+    """
+    Агрегаты прогресса для данных, созданных до 0010: CourseProgress по записям на модули
+    и CourseStats для каждого курса. Повторяет lm.rollups.rebuild_rollups на исторических моделях.
+    """
+    Course = apps.get_model("lm", "Course")
+    CourseProgress = apps.get_model("lm", "CourseProgress")
+    CourseStats = apps.get_model("lm", "CourseStats")
+    Enrollment = apps.get_model("lm", "Enrollment")
+
+    CourseProgress.objects.all().delete()
+    CourseStats.objects.all().delete()
+
+    rows = (
+        Enrollment.objects.filter(module__course__isnull=False)
+        .values("student_id", course_id=F("module__course_id"))
+        .annotate(
+            enrollments=Count("id"),
+            completed=Count("id", filter=Q(status="completed")),
+            progress_sum=Sum("progress"),
+        )
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(CourseProgress(**row))
+        if len(batch) >= BATCH_SIZE:
+            CourseProgress.objects.bulk_create(batch)
+            batch = []
+    CourseProgress.objects.bulk_create(batch)
+
+    totals = {
+        row["course_id"]: row
+        for row in CourseProgress.objects.values("course_id")
+        .annotate(
+            students=Count("id"),
+            enrollments=Sum("enrollments"),
+            completed=Sum("completed"),
+            progress_sum=Sum("progress_sum"),
+        )
+        .order_by()
+    }
+    stats = []
+    for course_id, modules in Course.objects.annotate(module_count=Count("modules")).values_list("id", "module_count"):
+        row = totals.get(course_id, {})
+        stats.append(
+            CourseStats(
+                course_id=course_id,
+                modules=modules,
+                students=row.get("students", 0),
+                enrollments=row.get("enrollments", 0),
+                completed=row.get("completed", 0),
+                progress_sum=row.get("progress_sum", 0.0),
+            )
+        )
+    CourseStats.objects.bulk_create(stats, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0012_material_filename"),
+    ]
+
+    operations = [
+        migrations.RunPython(build_course_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lm", "0013_build_course_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="educationalmodule",
+            index=models.Index(fields=["order_number", "id"], name="lm_module_order_id_idx"),
+        ),
+    ]
@@ -1,7 +1,12 @@
+import os
+import uuid
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
+from lm.storage import get_material_storage
 from users.models import CustomUser
 
 User = get_user_model()
@@ -13,6 +18,8 @@ class Course(models.Model):
     teacher = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="authored_courses")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Заполняется триггером Postgres (миграция 0005), используется lm.search
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title
@@ -20,6 +27,11 @@ class Course(models.Model):
     class Meta:
         verbose_name = "Курс"
         verbose_name_plural = "Курсы"
+        indexes = [
+            models.Index(fields=["teacher", "created_at"], name="lm_course_teacher_created_idx"),
+            models.Index(fields=["title"], name="lm_course_title_idx"),
+            models.Index(fields=["created_at", "id"], name="lm_course_created_id_idx"),
+        ]
 
 
 class EducationalModule(models.Model):
@@ -35,6 +47,7 @@ class EducationalModule(models.Model):
     materials = models.ManyToManyField("Material")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"{self.order_number}. {self.title}.{self.description}"
@@ -44,6 +57,12 @@ class EducationalModule(models.Model):
         unique_together = ["course", "order_number"]
         verbose_name = "Образовательный модуль"
         verbose_name_plural = "Образовательные модули"
+        indexes = [
+            models.Index(fields=["author", "created_at"], name="lm_module_author_created_idx"),
+            models.Index(fields=["title"], name="lm_module_title_idx"),
+            models.Index(fields=["created_at", "id"], name="lm_module_created_id_idx"),
+            models.Index(fields=["order_number", "id"], name="lm_module_order_id_idx"),
+        ]
 
 
 class Material(models.Model):
@@ -58,17 +77,113 @@ class Material(models.Model):
 
     title = models.CharField(max_length=200)
     content = models.TextField()
-    file = models.FileField(upload_to="materials/", blank=True, null=True)
+    file = models.FileField(upload_to="materials/", storage=get_material_storage, blank=True, null=True)
+    # Хранилище называет файл по хешу содержимого; исходное имя нужно для скачивания
+    filename = models.CharField(max_length=255, blank=True)
     type = models.CharField(max_length=5, choices=MATERIAL_TYPES)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            self.filename = os.path.basename(self.file.name)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "file" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "filename"}
+        super().save(*args, **kwargs)
+
+    def get_download_name(self):
+        return self.filename or os.path.basename(self.file.name)
+
     class Meta:
         verbose_name = "Учебный материал"
         verbose_name_plural = "Учебные материалы"
+        indexes = [
+            models.Index(fields=["uploaded_at", "id"], name="lm_material_uploaded_id_idx"),
+        ]
+
+
+class MaterialMetadata(models.Model):
+    """Результаты фоновой обработки файла материала"""
+
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (PENDING, "В обработке"),
+        (DONE, "Готово"),
+        (FAILED, "Ошибка"),
+    ]
+
+    material = models.OneToOneField("Material", on_delete=models.CASCADE, related_name="metadata")
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default=PENDING)
+    size = models.PositiveBigIntegerField(null=True, blank=True, help_text="Размер файла в байтах")
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True, help_text="Длительность видео в секундах")
+    text = models.TextField(blank=True, help_text="Текст, извлеченный из PDF")
+    thumbnail = models.ImageField(upload_to="thumbnails/", blank=True, null=True)
+    error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.material_id}: {self.status}"
+
+    class Meta:
+        verbose_name = "Метаданные материала"
+        verbose_name_plural = "Метаданные материалов"
+
+
+class Blob(models.Model):
+    """Файл в хранилище с адресацией по содержимому и счетчик ссылок на него из материалов"""
+
+    name = models.CharField(max_length=255, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+    class Meta:
+        verbose_name = "Файл хранилища"
+        verbose_name_plural = "Файлы хранилища"
+        indexes = [
+            models.Index(fields=["ref_count", "updated_at"], name="lm_blob_refcount_updated_idx"),
+        ]
+
+
+class UploadSession(models.Model):
+    """Сессия загрузки файла материала по частям"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Полный размер файла в байтах")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Сколько байт уже принято")
+    checksum = models.CharField(max_length=64, blank=True, help_text="Цепочка SHA-256 принятых частей")
+    title = models.CharField(max_length=200)
+    content = models.TextField(blank=True)
+    type = models.CharField(max_length=5, choices=Material.MATERIAL_TYPES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
+
+    class Meta:
+        verbose_name = "Сессия загрузки"
+        verbose_name_plural = "Сессии загрузки"
 
 
 class Enrollment(models.Model):
@@ -96,3 +211,53 @@ class Enrollment(models.Model):
     class Meta:
         verbose_name = "Запись на модуль"
         verbose_name_plural = "Записи на модули"
+        indexes = [
+            models.Index(fields=["student", "status"], name="lm_enroll_student_status_idx"),
+            models.Index(fields=["student", "enrolled_at", "id"], name="lm_enroll_student_enrolled_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["student", "module"], name="lm_enroll_student_module_uniq"),
+        ]
+
+
+class CourseProgress(models.Model):
+    """
+    Прогресс студента по курсу: агрегат его записей на модули курса.
+    Поддерживается инкрементально (lm.rollups), перестраивается командой rebuild_progress_rollups.
+    """
+
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="course_progress")
+    course = models.ForeignKey("Course", on_delete=models.CASCADE, related_name="student_progress")
+    enrollments = models.IntegerField(default=0, help_text="Записей на модули курса")
+    completed = models.IntegerField(default=0, help_text="Завершенных модулей")
+    progress_sum = models.FloatField(default=0.0, help_text="Сумма прогресса по записям")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student_id} - {self.course_id}"
+
+    class Meta:
+        verbose_name = "Прогресс по курсу"
+        verbose_name_plural = "Прогресс по курсам"
+        constraints = [
+            models.UniqueConstraint(fields=["course", "student"], name="lm_course_progress_unique"),
+        ]
+
+
+class CourseStats(models.Model):
+    """Агрегаты курса: модули, студенты и записи; поддерживаются вместе с CourseProgress"""
+
+    course = models.OneToOneField("Course", on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    modules = models.IntegerField(default=0)
+    students = models.IntegerField(default=0, help_text="Студентов, записанных хотя бы на один модуль")
+    enrollments = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    progress_sum = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.course_id}: {self.students}"
+
+    class Meta:
+        verbose_name = "Статистика курса"
+        verbose_name_plural = "Статистика курсов"
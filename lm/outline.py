@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from lm.cache import CACHE_PREFIX
+from lm.models import Course, EducationalModule, Material
+from lm.serializers import CourseOutlineSerializer, MaterialOutlineSerializer, ModuleOutlineSerializer
+
+
+def outline_key(course_id):
+    return f"{CACHE_PREFIX}:outline:{course_id}"
+
+
+def build_course_outline(course_id, replace=True):
+    """
+    Пересобирает снимок структуры курса (три запроса) и сохраняет готовый JSON в кэш.
+    replace=False - только заполнить пустой ключ: снимок, собранный на чтении, мог устареть, пока строился,
+    и не должен затирать свежий снимок фоновой пересборки.
+    """
+    materials = Material.objects.only(*MaterialOutlineSerializer.Meta.fields).order_by("id")
+    modules = (
+        EducationalModule.objects.only(
+            "course", *(field for field in ModuleOutlineSerializer.Meta.fields if field != "materials")
+        )
+        .order_by("order_number")
+        .prefetch_related(Prefetch("materials", queryset=materials))
+    )
+    course = (
+        Course.objects.only(*(field for field in CourseOutlineSerializer.Meta.fields if field != "modules"))
+        .prefetch_related(Prefetch("modules", queryset=modules))
+        .filter(pk=course_id)
+        .first()
+    )
+    if course is None:
+        cache.delete(outline_key(course_id))
+        return None
+    snapshot = JSONRenderer().render(CourseOutlineSerializer(course).data)
+    if replace:
+        cache.set(outline_key(course_id), snapshot, timeout=None)
+    else:
+        cache.add(outline_key(course_id), snapshot, timeout=None)
+    return snapshot
+
+
+def get_course_outline(course_id):
+    """Снимок структуры курса; собирается на месте, только если его еще нет в кэше"""
+    snapshot = cache.get(outline_key(course_id))
+    if snapshot is None:
+        snapshot = build_course_outline(course_id, replace=False)
+    return snapshot
@@ -1,9 +1,188 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (например, (created_at, id)).
+    Глубокие страницы стоят столько же, сколько первая: нет COUNT(*) и OFFSET.
+    Представление задает ключ атрибутом cursor_ordering.
+    Другая сортировка (?ordering=, сортировка поиска по релевантности) с курсором не сочетается - ответ 400.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("id",)
+    invalid_cursor_message = "Неверный курсор"
+    invalid_ordering_message = "С курсором доступна только сортировка {ordering}"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Асинхронный вариант для lm.async_views"""
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.set_page([row async for row in queryset.aiterator(chunk_size=self.page_size + 1)])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, "cursor_ordering", self.ordering))
+        self.check_ordering(request, queryset)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.build_filter(position))
+        # Берем на одну строку больше, чтобы узнать, есть ли следующая страница
+        return queryset[: self.page_size + 1]
+
+    def check_ordering(self, request, queryset):
+        """Запрошенная сортировка должна совпадать с началом ключа, иначе страницы курсора были бы неверны"""
+        param = request.query_params.get(api_settings.ORDERING_PARAM)
+        if param is not None:
+            requested = tuple(term.strip() for term in param.split(",") if term.strip())
+            supported = requested == self.ordering[: len(requested)]
+        else:
+            # Полнотекстовый поиск без ?ordering= сортирует по релевантности (lm.search)
+            supported = "rank" not in queryset.query.annotations
+        if not supported:
+            raise ParseError(self.invalid_ordering_message.format(ordering=",".join(self.ordering)))
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def build_filter(self, position):
+        """(a, b) > (x, y)  ->  a > x OR (a = x AND b > y)"""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal = {name: value for name, value in zip(self.ordering[:index], position[:index])}
+            condition |= Q(**equal, **{f"{field}__gt": position[index]})
+        return condition
+
+    def encode_cursor(self, obj):
+        # Быстрый путь списков (lm.fastpath) отдает строки словарями
+        values = [obj[field] if isinstance(obj, dict) else getattr(obj, field) for field in self.ordering]
+        payload = json.dumps([value.isoformat() if hasattr(value, "isoformat") else value for value in values])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [model._meta.get_field(field).to_python(value) for field, value in zip(self.ordering, values)]
+        except (ValueError, TypeError, ValidationError) as error:
+            raise NotFound(self.invalid_cursor_message) from error
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, CustomPagination.mode_query_param, CustomPagination.cursor_mode)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
 
 
 class CustomPagination(PageNumberPagination):
-    """Пагинация"""
+    """
+    Пагинация.
+    По умолчанию постраничная, ?pagination=cursor (или ?cursor=...) включает пагинацию по ключу.
+    """
 
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return True
+        return request.query_params.get(self.mode_query_param) == self.cursor_mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Асинхронный вариант paginate_queryset для lm.async_views: COUNT(*) через acount,
+        страница через aiterator, ответ и ссылки те же, что у синхронного.
+        """
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator не обращается к базе, если count уже известен
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list.aiterator(chunk_size=page_size)]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.keyset is not None:
+            return ""
+        return super().to_html()
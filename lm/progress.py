@@ -0,0 +1,140 @@
+import threading
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+# Атомарно сохраняет максимум из текущего и нового значения прогресса
+MAX_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if not current or tonumber(ARGV[2]) > tonumber(current) then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+# Возвращает значения забранного ключа KEYS[2] в буфер KEYS[1] с тем же правилом максимума и удаляет KEYS[2]
+MERGE_SCRIPT = """
+local pending = redis.call('HGETALL', KEYS[2])
+for i = 1, #pending, 2 do
+    local current = redis.call('HGET', KEYS[1], pending[i])
+    if not current or tonumber(pending[i + 1]) > tonumber(current) then
+        redis.call('HSET', KEYS[1], pending[i], pending[i + 1])
+    end
+end
+redis.call('DEL', KEYS[2])
+return #pending / 2
+"""
+
+
+def make_field(student_id, module_id):
+    return f"{student_id}:{module_id}"
+
+
+def parse_field(field):
+    student_id, module_id = field.split(":")
+    return int(student_id), int(module_id)
+
+
+class RedisProgressBuffer:
+    """
+    Буфер событий прогресса в Redis: по одному значению (максимуму) на пару студент-модуль.
+    Забранные значения лежат в ключе key:<uuid>, пока их запись в базу не завершится.
+    """
+
+    key = "lm:progress:pending"
+    processing_ttl = 60 * 60 * 24
+    # Через сколько секунд забранный ключ считается брошенным (процесс упал во время записи)
+    orphan_timeout = 60 * 10
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(MAX_SCRIPT)
+        self.merge_script = self.client.register_script(MERGE_SCRIPT)
+
+    def add(self, student_id, events):
+        pipeline = self.client.pipeline(transaction=False)
+        for module_id, progress in events.items():
+            self.script(keys=[self.key], args=[make_field(student_id, module_id), progress], client=pipeline)
+        pipeline.execute()
+
+    @contextmanager
+    def claim(self):
+        """
+        Забирает накопленные значения; новые события пишутся уже в новый ключ.
+        Забранный ключ удаляется, только если блок завершился без ошибки, иначе значения возвращаются в буфер.
+        """
+        processing_key = f"{self.key}:{uuid.uuid4().hex}"
+        try:
+            self.client.rename(self.key, processing_key)
+        except redis.ResponseError:
+            # Ключа нет - событий не было
+            yield {}
+            return
+        self.client.expire(processing_key, self.processing_ttl)
+        pending = self.client.hgetall(processing_key)
+        try:
+            yield {parse_field(field.decode()): float(value) for field, value in pending.items()}
+        except BaseException:
+            self.merge_script(keys=[self.key, processing_key])
+            raise
+        self.client.delete(processing_key)
+
+    def drain(self):
+        """Забирает и удаляет накопленные значения"""
+        with self.claim() as pending:
+            return pending
+
+    def recover(self):
+        """
+        Возвращает в буфер значения брошенных ключей. Возраст ключа определяется по оставшемуся TTL.
+        Возвращает число возвращенных пар.
+        """
+        recovered = 0
+        for processing_key in self.client.scan_iter(match=f"{self.key}:*"):
+            ttl = self.client.ttl(processing_key)
+            if 0 <= ttl < self.processing_ttl - self.orphan_timeout:
+                recovered += self.merge_script(keys=[self.key, processing_key])
+        return recovered
+
+
+class MemoryProgressBuffer:
+    """Буфер в памяти процесса для разработки и тестов"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def add(self, student_id, events):
+        self.add_many({(student_id, module_id): progress for module_id, progress in events.items()})
+
+    @contextmanager
+    def claim(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        try:
+            yield pending
+        except BaseException:
+            self.add_many(pending)
+            raise
+
+    def add_many(self, pending):
+        with self.lock:
+            for key, progress in pending.items():
+                self.pending[key] = max(progress, self.pending.get(key, progress))
+
+    def drain(self):
+        with self.claim() as pending:
+            return pending
+
+    def recover(self):
+        # Забранные значения живут только в памяти процесса: брошенных не бывает
+        return 0
+
+
+@lru_cache(maxsize=None)
+def get_progress_buffer():
+    if settings.PROGRESS_BUFFER_URL:
+        return RedisProgressBuffer(settings.PROGRESS_BUFFER_URL)
+    return MemoryProgressBuffer()
@@ -0,0 +1,36 @@
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# Даты и dataclass отдаются в encoder DRF, чтобы формат совпадал с JSONRenderer
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson с тем же выводом: компактный JSON в UTF-8, U+2028/U+2029 экранируются как в DRF.
+    С отступами или с ensure_ascii работает стандартный путь DRF.
+    """
+
+    def can_use_orjson(self, accepted_media_type, renderer_context):
+        if self.ensure_ascii or not self.compact:
+            return False
+        return self.get_indent(accepted_media_type, renderer_context or {}) is None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.can_use_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Текстовый формат Prometheus; ошибки DRF ({"detail": ...}) отдаются текстом сообщения"""
+
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = data.get("detail", "")
+        return str(data).encode(self.charset)
@@ -0,0 +1,183 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from lm.models import Course, CourseProgress, CourseStats, Enrollment
+
+COMPLETED = "completed"
+REBUILD_BATCH_SIZE = 5000
+
+
+class ProgressDelta:
+    """
+    Изменения агрегатов по парам курс-студент: [записей, завершено, сумма прогресса].
+    Запись добавляет свой вклад через add, старое состояние записи вычитается через remove.
+    """
+
+    def __init__(self):
+        self.pairs = defaultdict(lambda: [0, 0, 0.0])
+
+    def add(self, course_id, student_id, progress, status, sign=1):
+        if course_id is None:
+            return
+        values = self.pairs[(course_id, student_id)]
+        values[0] += sign
+        values[1] += sign * (status == COMPLETED)
+        values[2] += sign * progress
+
+    def remove(self, course_id, student_id, progress, status):
+        self.add(course_id, student_id, progress, status, sign=-1)
+
+    def apply(self):
+        apply_progress_delta(self.pairs)
+
+
+def lock_course_stats(course_ids):
+    """
+    Блокирует строки CourseStats курсов и возвращает ID курсов, у которых они есть.
+    Строки создаются только при создании курса и пересчете: при каскадном удалении курса
+    сигналы записей приходят, когда агрегаты курса уже удалены, и такие изменения пропускаются.
+    """
+    stats = CourseStats.objects.select_for_update().filter(course_id__in=course_ids).order_by("course_id")
+    return set(stats.values_list("course_id", flat=True))
+
+
+def apply_progress_delta(pairs):
+    """
+    Применяет изменения к CourseProgress и CourseStats атомарными UPDATE с F().
+    Строки курсов блокируются, поэтому параллельные вызовы не расходятся в счетчике студентов.
+    """
+    pairs = {pair: values for pair, values in pairs.items() if any(values)}
+    if not pairs:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        course_ids = lock_course_stats({course_id for course_id, _ in pairs})
+        totals = defaultdict(lambda: [0, 0, 0, 0.0])
+        new_rows = []
+        emptied = []
+        for (course_id, student_id), (enrollments, completed, progress_sum) in pairs.items():
+            if course_id not in course_ids:
+                continue
+            total = totals[course_id]
+            total[1] += enrollments
+            total[2] += completed
+            total[3] += progress_sum
+            updated = CourseProgress.objects.filter(course_id=course_id, student_id=student_id).update(
+                enrollments=F("enrollments") + enrollments,
+                completed=F("completed") + completed,
+                progress_sum=F("progress_sum") + progress_sum,
+                updated_at=now,
+            )
+            if not updated and enrollments > 0:
+                new_rows.append(
+                    CourseProgress(
+                        course_id=course_id,
+                        student_id=student_id,
+                        enrollments=enrollments,
+                        completed=completed,
+                        progress_sum=progress_sum,
+                    )
+                )
+                total[0] += 1
+            elif updated and enrollments < 0:
+                emptied.append((course_id, student_id))
+        CourseProgress.objects.bulk_create(new_rows)
+
+        # Студент без записей на модули курса перестает учитываться в курсе
+        for course_id, student_id in emptied:
+            deleted, _ = CourseProgress.objects.filter(
+                course_id=course_id, student_id=student_id, enrollments__lte=0
+            ).delete()
+            totals[course_id][0] -= deleted
+
+        for course_id, (students, enrollments, completed, progress_sum) in totals.items():
+            CourseStats.objects.filter(course_id=course_id).update(
+                students=F("students") + students,
+                enrollments=F("enrollments") + enrollments,
+                completed=F("completed") + completed,
+                progress_sum=F("progress_sum") + progress_sum,
+                updated_at=now,
+            )
+
+
+def apply_module_delta(course_modules):
+    """Изменение числа модулей курсов: {ID курса: +n/-n}"""
+    now = timezone.now()
+    for course_id, modules in course_modules.items():
+        if course_id is not None and modules:
+            CourseStats.objects.filter(course_id=course_id).update(modules=F("modules") + modules, updated_at=now)
+
+
+def rebuild_rollups(course_ids=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Полный пересчет агрегатов из Enrollment (всех курсов или course_ids) одной транзакцией.
+    Строки CourseStats блокируются до чтения записей и обновляются на месте: параллельный
+    apply_progress_delta ждет блокировки и применяет свое изменение к пересчитанным значениям.
+    Возвращает число строк CourseProgress.
+    """
+    courses = Course.objects.all() if course_ids is None else Course.objects.filter(pk__in=course_ids)
+    now = timezone.now()
+    with transaction.atomic():
+        CourseStats.objects.bulk_create(
+            [CourseStats(course_id=course_id) for course_id in courses.values_list("id", flat=True)],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        lock_course_stats(courses.values("id"))
+        # CourseProgress меняется только под блокировкой CourseStats его курса
+        CourseProgress.objects.filter(course__in=courses).delete()
+
+        rows = (
+            Enrollment.objects.filter(module__course__in=courses)
+            .values("student_id", course_id=F("module__course_id"))
+            .annotate(
+                enrollments=Count("id"),
+                completed=Count("id", filter=Q(status=COMPLETED)),
+                progress_sum=Sum("progress"),
+            )
+            .order_by()
+        )
+        count = 0
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(CourseProgress(**row))
+            if len(batch) >= batch_size:
+                count += len(CourseProgress.objects.bulk_create(batch))
+                batch = []
+        count += len(CourseProgress.objects.bulk_create(batch))
+
+        totals = {
+            row["course_id"]: row
+            for row in CourseProgress.objects.filter(course__in=courses)
+            .values("course_id")
+            .annotate(
+                students=Count("id"),
+                enrollments=Sum("enrollments"),
+                completed=Sum("completed"),
+                progress_sum=Sum("progress_sum"),
+            )
+            .order_by()
+        }
+        stats = []
+        for course_id, modules in courses.annotate(module_count=Count("modules")).values_list("id", "module_count"):
+            row = totals.get(course_id, {})
+            stats.append(
+                CourseStats(
+                    course_id=course_id,
+                    modules=modules,
+                    students=row.get("students", 0),
+                    enrollments=row.get("enrollments", 0),
+                    completed=row.get("completed", 0),
+                    progress_sum=row.get("progress_sum", 0.0),
+                    updated_at=now,
+                )
+            )
+        CourseStats.objects.bulk_update(
+            stats,
+            ["modules", "students", "enrollments", "completed", "progress_sum", "updated_at"],
+            batch_size=batch_size,
+        )
+    return count
@@ -0,0 +1,42 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+# Должна совпадать с конфигурацией в триггерах миграции 0005
+SEARCH_CONFIG = "russian"
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Полнотекстовый поиск по параметру ?search=.
+    На Postgres ищет по search_vector (GIN) с ранжированием и триграммным совпадением
+    по title для опечаток. На других базах и для моделей без search_vector - обычный SearchFilter.
+    Должен стоять после OrderingFilter: без ?ordering= результаты сортируются по релевантности.
+    """
+
+    def supports_full_text(self, queryset):
+        if connections[queryset.db].vendor != "postgresql":
+            return False
+        try:
+            queryset.model._meta.get_field("search_vector")
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms or not self.get_search_fields(view, request) or not self.supports_full_text(queryset):
+            return super().filter_queryset(request, queryset, view)
+
+        text = " ".join(search_terms)
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+        queryset = queryset.filter(Q(search_vector=query) | Q(title__trigram_similar=text)).annotate(
+            rank=SearchRank(F("search_vector"), query),
+            similarity=TrigramSimilarity("title", text),
+        )
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by("-rank", "-similarity", "pk")
+        return queryset
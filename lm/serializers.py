@@ -1,9 +1,30 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+
+from lm.bloom import add_on_commit, enrollment_key, get_bloom_filter
+from lm.fieldsets import SparseFieldsMixin
+from lm.models import (
+    Course,
+    CourseProgress,
+    CourseStats,
+    EducationalModule,
+    Enrollment,
+    Material,
+    MaterialMetadata,
+    UploadSession,
+)
+from lm.rollups import ProgressDelta, lock_course_stats
+from users.access import get_request_access, invalidate_access_on_commit
 
-from lm.models import Course, EducationalModule, Enrollment, Material
+User = get_user_model()
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для курса"""
 
     class Meta:
@@ -12,7 +33,7 @@ class CourseSerializer(serializers.ModelSerializer):
         read_only_fields = ["teacher", "created_at", "updated_at"]
 
 
-class EducationalModuleSerializer(serializers.ModelSerializer):
+class EducationalModuleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для образовательного модуля"""
 
     materials = serializers.PrimaryKeyRelatedField(many=True, queryset=Material.objects.all(), required=False)
@@ -39,7 +60,7 @@ class EducationalModuleSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class MaterialSerializer(serializers.ModelSerializer):
+class MaterialSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для учебного материала"""
 
     def create(self, validated_data):
@@ -54,12 +75,73 @@ class MaterialSerializer(serializers.ModelSerializer):
         verbose_name_plural = "Учебные материалы"
 
 
+class MaterialOutlineSerializer(serializers.ModelSerializer):
+    """Материал в структуре курса: только описание, без содержимого"""
+
+    class Meta:
+        model = Material
+        fields = ["id", "title", "type", "uploaded_by", "uploaded_at", "updated_at"]
+
+
+class ModuleOutlineSerializer(serializers.ModelSerializer):
+    """Модуль в структуре курса"""
+
+    materials = MaterialOutlineSerializer(many=True)
+
+    class Meta:
+        model = EducationalModule
+        fields = ["id", "order_number", "title", "description", "author", "materials", "created_at", "updated_at"]
+
+
+class CourseOutlineSerializer(serializers.ModelSerializer):
+    """Структура курса: модули по порядку и их материалы"""
+
+    modules = ModuleOutlineSerializer(many=True)
+
+    class Meta:
+        model = Course
+        fields = CourseSerializer.Meta.fields + ["modules"]
+
+
+class MaterialMetadataSerializer(serializers.ModelSerializer):
+    """Сериализатор для метаданных файла материала"""
+
+    class Meta:
+        model = MaterialMetadata
+        fields = ["material", "status", "size", "page_count", "duration", "text", "thumbnail", "error", "processed_at"]
+        read_only_fields = fields
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Сериализатор для сессии загрузки файла по частям"""
+
+    class Meta:
+        model = UploadSession
+        fields = ["id", "filename", "size", "offset", "checksum", "title", "content", "type", "created_at"]
+        read_only_fields = ["id", "offset", "checksum", "created_at"]
+
+    def validate_filename(self, value):
+        filename = os.path.basename(value)
+        if not filename:
+            raise serializers.ValidationError("Некорректное имя файла")
+        return filename
+
+    def validate_size(self, value):
+        if value > settings.MATERIAL_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError("Файл слишком большой")
+        return value
+
+
 class EnrollmentSerializer(serializers.ModelSerializer):
     """Сериализатор для записи на модуль"""
 
     def create(self, validated_data):
         validated_data["student"] = self.context["request"].user
-        return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({"module": "Вы уже записаны на этот модуль"})
 
     class Meta:
         model = Enrollment
@@ -67,3 +149,228 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         read_only_fields = ["student", "enrolled_at"]
         verbose_name = "Запись на модуль"
         verbose_name_plural = "Записи на модули"
+
+
+class ProgressEventSerializer(serializers.Serializer):
+    """Сериализатор для события прогресса по модулю"""
+
+    module = serializers.IntegerField(min_value=1)
+    progress = serializers.FloatField(min_value=0.0, max_value=100.0)
+
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    """Сериализатор для массовой записи студентов на модули или на все модули курса"""
+
+    CREATED = "created"
+    EXISTS = "exists"
+    INVALID_STUDENT = "invalid_student"
+    INVALID_MODULE = "invalid_module"
+
+    batch_size = 1000
+    bloom_check_limit = 10000
+    # Строка результата на каждую пару студент-модуль: размер ответа и памяти ограничен
+    max_pairs = 100_000
+
+    students = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=10000)
+    modules = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000, required=False
+    )
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.only("id"), required=False)
+
+    def validate(self, attrs):
+        if ("modules" in attrs) == ("course" in attrs):
+            raise serializers.ValidationError("Укажите либо modules, либо course")
+        return attrs
+
+    def get_existing_pairs(self, student_ids, module_ids):
+        """
+        Уже существующие записи, по частям, чтобы не упираться в лимит параметров запроса.
+        Для небольших запросов пары сначала проверяются фильтром Блума: если ни одной записи точно нет, база не нужна.
+        """
+        student_ids = list(student_ids)
+        module_ids = set(module_ids)
+        checked = len(student_ids) * len(module_ids) <= self.bloom_check_limit
+        if checked:
+            bloom = get_bloom_filter("enrollment")
+            pairs = [(student_id, module_id) for student_id in student_ids for module_id in module_ids]
+            candidates = {
+                pair
+                for pair, found in zip(pairs, bloom.contains_many(enrollment_key(*pair) for pair in pairs))
+                if found
+            }
+            student_ids = list(dict.fromkeys(student_id for student_id, _ in candidates))
+            module_ids = {module_id for _, module_id in candidates}
+        existing = self.select_existing_pairs(student_ids, module_ids)
+        if checked:
+            bloom.record_false_positives(len(candidates - existing))
+        return existing
+
+    def select_existing_pairs(self, student_ids, module_ids):
+        """Существующие записи из базы, по частям, чтобы не упираться в лимит параметров запроса"""
+        student_ids = list(student_ids)
+        existing = set()
+        for start in range(0, len(student_ids), self.batch_size):
+            end = start + self.batch_size
+            chunk = student_ids[start:end]
+            existing.update(
+                Enrollment.objects.filter(student_id__in=chunk, module_id__in=module_ids).values_list(
+                    "student_id", "module_id"
+                )
+            )
+        return existing
+
+    def insert_enrollments(self, enrollments):
+        """
+        Вставляет записи и возвращает вставленные.
+        Пара, записанная параллельно после проверки existing (одиночная запись на модуль), нарушает
+        UniqueConstraint: такие пары перечитываются из базы и исключаются, остальные вставляются заново.
+        """
+        while enrollments:
+            try:
+                with transaction.atomic():
+                    return Enrollment.objects.bulk_create(enrollments, batch_size=self.batch_size)
+            except IntegrityError:
+                conflicts = self.select_existing_pairs(
+                    {enrollment.student_id for enrollment in enrollments},
+                    {enrollment.module_id for enrollment in enrollments},
+                )
+                remaining = [
+                    enrollment
+                    for enrollment in enrollments
+                    if (enrollment.student_id, enrollment.module_id) not in conflicts
+                ]
+                if len(remaining) == len(enrollments):
+                    raise
+                enrollments = remaining
+        return []
+
+    def check_course_access(self, module_courses):
+        """Записывать можно только на модули своих курсов (на модуль без курса - на свой модуль)"""
+        access = get_request_access(self.context["request"])
+        for module_id, course_id in module_courses.items():
+            if course_id is None:
+                allowed = access.is_staff or module_id in access.modules
+            else:
+                allowed = access.can_manage_course(course_id)
+            if not allowed:
+                raise PermissionDenied("Записывать студентов можно только на модули своих курсов")
+
+    def create(self, validated_data):
+        # Проверка всех строк за один проход: по одному запросу на студентов, модули и существующие записи
+        student_ids = list(dict.fromkeys(validated_data["students"]))
+        valid_students = set(User.objects.filter(pk__in=student_ids, role=User.STUDENT).values_list("pk", flat=True))
+        if "course" in validated_data:
+            module_ids = list(
+                EducationalModule.objects.filter(course=validated_data["course"]).values_list("pk", flat=True)
+            )
+        else:
+            module_ids = list(dict.fromkeys(validated_data["modules"]))
+        if len(student_ids) * len(module_ids) > self.max_pairs:
+            raise serializers.ValidationError(
+                f"Не больше {self.max_pairs} пар студент-модуль за запрос, разбейте запись на части"
+            )
+        valid_modules = dict(EducationalModule.objects.filter(pk__in=module_ids).values_list("pk", "course_id"))
+        self.check_course_access(valid_modules)
+
+        with transaction.atomic():
+            # Строки агрегатов курсов блокируются до проверки: параллельные запросы на те же курсы
+            # выполняются по очереди и видят записи друг друга. Остальные гонки разбирает insert_enrollments.
+            lock_course_stats(set(valid_modules.values()))
+            existing = self.get_existing_pairs(valid_students, valid_modules)
+            enrollments = self.insert_enrollments(
+                [
+                    Enrollment(student_id=student_id, module_id=module_id)
+                    for student_id in student_ids
+                    if student_id in valid_students
+                    for module_id in module_ids
+                    if module_id in valid_modules and (student_id, module_id) not in existing
+                ]
+            )
+            created = {(enrollment.student_id, enrollment.module_id) for enrollment in enrollments}
+
+            results = []
+            for student_id in student_ids:
+                for module_id in module_ids:
+                    if student_id not in valid_students:
+                        status = self.INVALID_STUDENT
+                    elif module_id not in valid_modules:
+                        status = self.INVALID_MODULE
+                    elif (student_id, module_id) in created:
+                        status = self.CREATED
+                    else:
+                        status = self.EXISTS
+                    results.append({"student": student_id, "module": module_id, "status": status})
+
+            # bulk_create не отправляет post_save, фильтр и профили прав обновляются явно
+            add_on_commit(
+                "enrollment",
+                (enrollment_key(enrollment.student_id, enrollment.module_id) for enrollment in enrollments),
+            )
+            invalidate_access_on_commit({enrollment.student_id for enrollment in enrollments})
+            delta = ProgressDelta()
+            for enrollment in enrollments:
+                delta.add(
+                    valid_modules[enrollment.module_id], enrollment.student_id, enrollment.progress, enrollment.status
+                )
+            delta.apply()
+        return {"created": len(enrollments), "results": results}
+
+
+def get_ratio(numerator, denominator, scale=100.0):
+    return round(numerator / denominator * scale, 2) if denominator else 0.0
+
+
+class CourseStatsSerializer(serializers.ModelSerializer):
+    """Агрегаты прогресса по курсу"""
+
+    average_progress = serializers.SerializerMethodField()
+    completion_rate = serializers.SerializerMethodField()
+
+    def get_average_progress(self, obj):
+        return get_ratio(obj.progress_sum, obj.enrollments, 1.0)
+
+    def get_completion_rate(self, obj):
+        return get_ratio(obj.completed, obj.enrollments)
+
+    class Meta:
+        model = CourseStats
+        fields = [
+            "course",
+            "modules",
+            "students",
+            "enrollments",
+            "completed",
+            "average_progress",
+            "completion_rate",
+            "updated_at",
+        ]
+
+
+class CourseProgressSerializer(serializers.ModelSerializer):
+    """
+    Прогресс студента по курсу: average_progress - средний по модулям, на которые он записан,
+    course_progress - по всем модулям курса (модули без записи считаются непройденными).
+    """
+
+    average_progress = serializers.SerializerMethodField()
+    course_progress = serializers.SerializerMethodField()
+    modules = serializers.IntegerField(source="course.stats.modules", read_only=True)
+
+    def get_average_progress(self, obj):
+        return get_ratio(obj.progress_sum, obj.enrollments, 1.0)
+
+    def get_course_progress(self, obj):
+        return get_ratio(obj.progress_sum, obj.course.stats.modules, 1.0)
+
+    class Meta:
+        model = CourseProgress
+        fields = [
+            "course",
+            "student",
+            "modules",
+            "enrollments",
+            "completed",
+            "average_progress",
+            "course_progress",
+            "updated_at",
+        ]
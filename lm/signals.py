@@ -0,0 +1,260 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from lm.blobs import acquire_blob, release_blob
+from lm.bloom import add_on_commit, enrollment_key
+from lm.cache import bump_generation_on_commit
+from lm.models import Course, CourseStats, EducationalModule, Enrollment, Material
+from lm.rollups import ProgressDelta, apply_module_delta
+from lm.tasks import schedule_material_notification, schedule_outline_rebuild
+from users.access import invalidate_access_on_commit
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_cache(sender, **kwargs):
+    bump_generation_on_commit("course")
+
+
+@receiver([post_save, post_delete], sender=EducationalModule)
+def invalidate_module_cache(sender, **kwargs):
+    bump_generation_on_commit("module")
+
+
+@receiver(m2m_changed, sender=EducationalModule.materials.through)
+def invalidate_module_materials_cache(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_generation_on_commit("module")
+
+
+@receiver(post_delete, sender=Material)
+def invalidate_material_cache(sender, **kwargs):
+    # Удаление материала убирает строки M2M без сигнала m2m_changed
+    bump_generation_on_commit("module")
+
+
+# Поля, изменение которых видно студентам и рассылается им уведомлением
+NOTIFIED_MATERIAL_FIELDS = ("title", "content", "file")
+
+
+@receiver(pre_save, sender=Material)
+def remember_material_state(sender, instance, update_fields=None, **kwargs):
+    """Прежние значения сохраняемых полей одним запросом: для ссылок на блобы и для уведомлений"""
+    instance._previous_file = None
+    instance._notify_students = False
+    deferred = instance.get_deferred_fields()
+    fields = [
+        field
+        for field in NOTIFIED_MATERIAL_FIELDS
+        if (update_fields is None or field in update_fields) and field not in deferred
+    ]
+    if instance._state.adding or not fields:
+        return
+    previous = Material.objects.filter(pk=instance.pk).values(*fields).first()
+    if previous is None:
+        previous = dict.fromkeys(fields, "")
+    current = {field: getattr(instance, field) for field in fields}
+    if "file" in fields:
+        current["file"] = instance.file.name or ""
+        instance._previous_file = previous["file"] or ""
+    instance._notify_students = any(previous[field] != current[field] for field in fields)
+
+
+@receiver(post_save, sender=Material)
+def notify_material_students(sender, instance, created, **kwargs):
+    # Сохранения без изменения видимых полей (служебные поля, то же содержимое) не рассылаются
+    if created or not getattr(instance, "_notify_students", False):
+        return
+    material_id = instance.pk
+    transaction.on_commit(lambda: schedule_material_notification(material_id))
+
+
+@receiver(post_save, sender=Material)
+def update_blob_references(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_file", None)
+    if not created and previous is None:
+        return
+    current = instance.file.name or ""
+    if current == previous:
+        return
+    acquire_blob(current)
+    release_blob(previous)
+
+
+@receiver(post_delete, sender=Material)
+def release_material_blob(sender, instance, **kwargs):
+    if "file" not in instance.get_deferred_fields():
+        release_blob(instance.file.name)
+
+
+def get_material_course_ids(material, module_ids=None):
+    modules = EducationalModule.objects.filter(pk__in=module_ids) if module_ids else material.educationalmodule_set
+    return list(modules.values_list("course_id", flat=True).distinct())
+
+
+@receiver([post_save, post_delete], sender=Course)
+def rebuild_course_outline_on_course(sender, instance, **kwargs):
+    schedule_outline_rebuild([instance.pk])
+
+
+@receiver(pre_save, sender=EducationalModule)
+def remember_module_course(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance._previous_course_id = None
+        return
+    instance._previous_course_id = (
+        EducationalModule.objects.filter(pk=instance.pk).values_list("course_id", flat=True).first()
+    )
+
+
+@receiver([post_save, post_delete], sender=EducationalModule)
+def rebuild_course_outline_on_module(sender, instance, **kwargs):
+    schedule_outline_rebuild([instance.course_id, getattr(instance, "_previous_course_id", None)])
+
+
+@receiver(m2m_changed, sender=EducationalModule.materials.through)
+def rebuild_course_outline_on_materials(sender, instance, action, reverse, pk_set, **kwargs):
+    # Для clear с обратной стороны строки связи нужно прочитать до удаления
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        schedule_outline_rebuild(get_material_course_ids(instance, pk_set))
+    else:
+        schedule_outline_rebuild([instance.course_id])
+
+
+@receiver(post_save, sender=Material)
+def rebuild_course_outline_on_material(sender, instance, created, **kwargs):
+    if not created:
+        schedule_outline_rebuild(get_material_course_ids(instance))
+
+
+@receiver(pre_delete, sender=Material)
+def rebuild_course_outline_on_material_delete(sender, instance, **kwargs):
+    # После удаления строки связи M2M уже не найти
+    schedule_outline_rebuild(get_material_course_ids(instance))
+
+
+@receiver(post_save, sender=Enrollment)
+def add_enrollment_to_bloom_filter(sender, instance, created, **kwargs):
+    if created:
+        add_on_commit("enrollment", [enrollment_key(instance.student_id, instance.module_id)])
+
+
+# Профили прав (users.access): сбрасываются после коммита у пользователей, чьи множества ID изменились
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_access(sender, instance, **kwargs):
+    invalidate_access_on_commit([instance.teacher_id])
+
+
+@receiver([post_save, post_delete], sender=EducationalModule)
+def invalidate_module_access(sender, instance, **kwargs):
+    course_ids = [instance.course_id, getattr(instance, "_previous_course_id", None)]
+    teacher_ids = Course.objects.filter(pk__in=course_ids).values_list("teacher_id", flat=True)
+    invalidate_access_on_commit([instance.author_id, *teacher_ids])
+
+
+@receiver(post_save, sender=Material)
+def invalidate_material_access(sender, instance, created, **kwargs):
+    if created:
+        invalidate_access_on_commit([instance.uploaded_by_id])
+
+
+@receiver(m2m_changed, sender=EducationalModule.materials.through)
+def invalidate_module_materials_access(sender, instance, action, reverse, pk_set, **kwargs):
+    # Как и для структуры курса, при clear строки связи читаются до удаления
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        modules = EducationalModule.objects.filter(pk__in=pk_set) if pk_set else instance.educationalmodule_set.all()
+    else:
+        modules = EducationalModule.objects.filter(pk=instance.pk)
+    user_ids = set(modules.values_list("author_id", "course__teacher_id").distinct())
+    students = Enrollment.objects.filter(module__in=modules).values_list("student_id", flat=True).distinct()
+    invalidate_access_on_commit({user_id for pair in user_ids for user_id in pair} | set(students))
+
+
+@receiver(post_save, sender=Enrollment)
+def invalidate_enrollment_access(sender, instance, created, **kwargs):
+    # Изменение прогресса не меняет множества ID
+    if created:
+        invalidate_access_on_commit([instance.student_id])
+
+
+@receiver(post_delete, sender=Enrollment)
+def invalidate_deleted_enrollment_access(sender, instance, **kwargs):
+    invalidate_access_on_commit([instance.student_id])
+
+
+# Агрегаты прогресса по курсам (lm.rollups)
+ROLLUP_FIELDS = {"module", "progress", "status"}
+
+
+@receiver(post_save, sender=Course)
+def create_course_stats(sender, instance, created, **kwargs):
+    if created:
+        CourseStats.objects.create(course=instance)
+
+
+@receiver(post_save, sender=EducationalModule)
+def update_rollups_on_module(sender, instance, created, **kwargs):
+    previous_course_id = getattr(instance, "_previous_course_id", None)
+    if created:
+        apply_module_delta({instance.course_id: 1})
+    elif previous_course_id is not None and previous_course_id != instance.course_id:
+        # Модуль перенесен в другой курс вместе со своими записями
+        apply_module_delta({previous_course_id: -1, instance.course_id: 1})
+        delta = ProgressDelta()
+        for student_id, progress, status in instance.enrollments.values_list("student_id", "progress", "status"):
+            delta.remove(previous_course_id, student_id, progress, status)
+            delta.add(instance.course_id, student_id, progress, status)
+        delta.apply()
+
+
+@receiver(post_delete, sender=EducationalModule)
+def update_rollups_on_module_delete(sender, instance, **kwargs):
+    apply_module_delta({instance.course_id: -1})
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment_rollup(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_previous = None
+    if instance._state.adding or (update_fields is not None and not ROLLUP_FIELDS & set(update_fields)):
+        return
+    instance._rollup_previous = (
+        Enrollment.objects.filter(pk=instance.pk)
+        .values_list("module_id", "module__course_id", "student_id", "progress", "status")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Enrollment)
+def update_rollups_on_enrollment(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_rollup_previous", None)
+    if not created and previous is None:
+        return
+    delta = ProgressDelta()
+    if previous is not None:
+        delta.remove(*previous[1:])
+    # Курс берется из запроса pre_save, если модуль не менялся, чтобы не загружать модуль отдельным запросом
+    if previous is not None and previous[0] == instance.module_id:
+        course_id = previous[1]
+    else:
+        course_id = instance.module.course_id
+    delta.add(course_id, instance.student_id, instance.progress, instance.status)
+    delta.apply()
+
+
+@receiver(pre_delete, sender=Enrollment)
+def remember_enrollment_course(sender, instance, **kwargs):
+    # После каскадного удаления модуля курс записи уже не найти
+    instance._rollup_course_id = (
+        EducationalModule.objects.filter(pk=instance.module_id).values_list("course_id", flat=True).first()
+    )
+
+
+@receiver(post_delete, sender=Enrollment)
+def update_rollups_on_enrollment_delete(sender, instance, **kwargs):
+    delta = ProgressDelta()
+    delta.remove(getattr(instance, "_rollup_course_id", None), instance.student_id, instance.progress, instance.status)
+    delta.apply()
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+BLOB_PREFIX = "blobs"
+BLOB_NAME_RE = re.compile(rf"^{BLOB_PREFIX}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/(?P<digest>[0-9a-f]{{64}})(\.\w+)?$")
+
+
+def get_blob_digest(name):
+    """SHA-256 содержимого по имени блоба или None для обычных файлов"""
+    match = BLOB_NAME_RE.match(name or "")
+    return match.group("digest") if match else None
+
+
+def touch_blob(name):
+    """Продлевает период ожидания блоба перед сборкой мусора; False, если записи Blob нет"""
+    # Модели импортируют хранилище, поэтому модель берется из реестра
+    Blob = apps.get_model("lm", "Blob")
+    return bool(Blob.objects.filter(name=name).update(updated_at=timezone.now()))
+
+
+def register_blob(name, size):
+    """
+    Запись Blob для только что записанного файла. Новая запись создается без ссылок: если материал
+    так и не будет сохранен, сборщик мусора (lm.blobs) удалит файл после периода ожидания.
+    """
+    Blob = apps.get_model("lm", "Blob")
+    if touch_blob(name):
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(name=name, size=size, ref_count=0)
+    except IntegrityError:
+        touch_blob(name)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище с адресацией по содержимому: файл хешируется во время записи
+    и хранится один раз под именем blobs/ab/cd/<sha256>.<расширение>.
+    Файлы удаляются не через delete(), а сборщиком мусора по счетчику ссылок (модель Blob).
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым, суффиксы для уникальности не нужны
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        digest = hashlib.sha256()
+        if hasattr(content, "seek"):
+            content.seek(0)
+        if hasattr(content, "temporary_file_path"):
+            # Файл уже на диске (lm.uploads.PartFile, TemporaryUploadedFile): только хешируется и переносится
+            temp_name = content.temporary_file_path()
+            for chunk in content.chunks():
+                digest.update(chunk)
+        else:
+            temp_dir = self.path(os.path.join(BLOB_PREFIX, "tmp"))
+            os.makedirs(temp_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            temp_name = temp.name
+
+        hexdigest = digest.hexdigest()
+        blob_name = f"{BLOB_PREFIX}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}"
+        path = self.path(blob_name)
+        # Запись Blob обновляется до проверки файла: сборщик мусора (lm.blobs) либо уже удалил блоб
+        # (запись не найдена, файл пишется заново), либо увидит свежий updated_at и блоб не тронет
+        if touch_blob(blob_name) and os.path.exists(path):
+            os.remove(temp_name)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_name, path)
+            if self.file_permissions_mode is not None:
+                os.chmod(path, self.file_permissions_mode)
+            register_blob(blob_name, os.path.getsize(path))
+        return blob_name
+
+    def delete(self, name):
+        if get_blob_digest(name) is None:
+            super().delete(name)
+
+    def purge(self, name):
+        super().delete(name)
+
+
+material_storage = ContentAddressedStorage()
+
+
+def get_material_storage():
+    return material_storage
@@ -1,22 +1,252 @@
-from datetime import timezone
+import time
+from datetime import timedelta
 
 from celery import shared_task
-from django.core.mail import send_mail
+from celery.exceptions import SoftTimeLimitExceeded
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
 from config.settings import EMAIL_HOST_USER
+from lm.blobs import collect_unreferenced_blobs
+from lm.bloom import BLOOM_SOURCES, rebuild_bloom_filter
+from lm.media import extract_metadata
+from lm.models import Enrollment, Material, MaterialMetadata
+from lm.outline import build_course_outline
+from lm.progress import get_progress_buffer
+from lm.rollups import ProgressDelta
+from lm.uploads import cleanup_stale_sessions
+from users.authentication import invalidate_auth_state
 from users.models import CustomUser
 
+PROGRESS_BATCH_SIZE = 1000
+INACTIVE_DAYS = 30
+DEACTIVATION_CHUNK_SIZE = 5000
+NOTIFICATION_BATCH_SIZE = 100
+# Рассылка уходит, когда материал не менялся NOTIFICATION_DEBOUNCE секунд
+NOTIFICATION_DEBOUNCE = 60 * 2
+NOTIFICATION_MARKER_TIMEOUT = 60 * 60
+OUTLINE_DEDUP_TIMEOUT = 60
+MEDIA_SOFT_TIME_LIMIT = 120
+MEDIA_TIME_LIMIT = 150
+
+
+def notification_keys(material_id):
+    """Ключи кэша: время последнего изменения материала и отметка поставленной задачи"""
+    return f"lm:notify:material:{material_id}:changed", f"lm:notify:material:{material_id}:scheduled"
+
+
+def schedule_material_notification(material_id):
+    """
+    Откладывает рассылку до паузы в изменениях материала. Каждое изменение обновляет время последнего
+    изменения; задача на материал ставится одна и переносит себя, пока изменения продолжаются.
+    """
+    changed_key, scheduled_key = notification_keys(material_id)
+    cache.set(changed_key, time.time(), timeout=NOTIFICATION_MARKER_TIMEOUT)
+    if cache.add(scheduled_key, 1, timeout=NOTIFICATION_MARKER_TIMEOUT):
+        send_debounced_notification.apply_async((material_id,), countdown=NOTIFICATION_DEBOUNCE)
+
+
+@shared_task(bind=True)
+def send_debounced_notification(self, material_id):
+    """Запускает рассылку, если материал не менялся NOTIFICATION_DEBOUNCE секунд, иначе переносит ее"""
+    changed_key, scheduled_key = notification_keys(material_id)
+    remaining = cache.get(changed_key, 0) + NOTIFICATION_DEBOUNCE - time.time()
+    # Задачи в режиме eager выполняются сразу, отложить их нельзя
+    if remaining > 0 and not self.request.is_eager:
+        self.apply_async((material_id,), countdown=remaining)
+        return False
+    # Изменения после снятия отметки ставят новую рассылку
+    cache.delete(scheduled_key)
+    notify_material_updated.delay(material_id)
+    return True
+
+
+@shared_task
+def notify_material_updated(material_id, batch_size=NOTIFICATION_BATCH_SIZE):
+    """Рассылка студентам, записанным на модули с материалом: получатели читаются потоком и делятся на пачки"""
+    recipients = (
+        CustomUser.objects.filter(enrollments__module__materials=material_id, is_active=True)
+        .exclude(email="")
+        .order_by("email")
+        .values_list("email", flat=True)
+        .distinct()
+    )
+    batch = []
+    batches = 0
+    for email in recipients.iterator(chunk_size=batch_size * 10):
+        batch.append(email)
+        if len(batch) == batch_size:
+            send_notification_batch.delay(material_id, batch)
+            batch = []
+            batches += 1
+    if batch:
+        send_notification_batch.delay(material_id, batch)
+        batches += 1
+    return batches
+
+
+@shared_task(rate_limit="30/m")
+def send_notification_batch(material_id, emails):
+    """Отправляет пачку писем через одно SMTP-соединение"""
+    title = Material.objects.filter(pk=material_id).values_list("title", flat=True).first()
+    if title is None:
+        return 0
+    connection = get_connection()
+    messages = [
+        EmailMessage(
+            "Материалы курса обновлены",
+            f"Материал «{title}» обновлен.",
+            EMAIL_HOST_USER,
+            [email],
+            connection=connection,
+        )
+        for email in dict.fromkeys(emails)
+    ]
+    return connection.send_messages(messages)
+
+
+@shared_task
+def last_user_login(chunk_size=DEACTIVATION_CHUNK_SIZE):
+    """
+    Блокирует пользователей, не входивших больше INACTIVE_DAYS дней.
+    Обновление идет пачками по первичному ключу: память и время блокировок ограничены размером пачки.
+    Повторный запуск ничего не меняет. Возвращает число заблокированных пользователей.
+    update() не отправляет сигналы, поэтому кэш состояния для проверки JWT сбрасывается явно.
+    """
+    cutoff = timezone.now() - timedelta(days=INACTIVE_DAYS)
+    stale = CustomUser.objects.filter(is_active=True, last_login__lt=cutoff).order_by("pk")
+    deactivated = 0
+    last_pk = 0
+    while True:
+        ids = list(stale.filter(pk__gt=last_pk).values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return deactivated
+        deactivated += CustomUser.objects.filter(pk__in=ids, is_active=True).update(is_active=False)
+        invalidate_auth_state(ids)
+        last_pk = ids[-1]
+
+
+@shared_task
+def flush_progress():
+    """
+    Переносит накопленный прогресс в Enrollment пачками; прогресс только растет.
+    Забранные из буфера значения удаляются только после фиксации транзакции: при ошибке они возвращаются
+    в буфер, а значения упавшего процесса возвращает recover при следующем запуске.
+    """
+    buffer = get_progress_buffer()
+    buffer.recover()
+    with buffer.claim() as pending:
+        return write_progress(pending)
+
+
+def write_progress(pending):
+    """
+    Записывает значения {(ID студента, ID модуля): прогресс}; возвращает число измененных записей.
+    Фильтр Блума здесь не используется: запись могла еще не попасть в него (bulk_create, пересборка),
+    а отброшенное событие уже не вернуть. Какие пары существуют, решает запрос к базе.
+    """
+    if not pending:
+        return 0
+
+    student_ids = {student_id for student_id, _ in pending}
+    module_ids = {module_id for _, module_id in pending}
+    changed = []
+    with transaction.atomic():
+        enrollments = (
+            Enrollment.objects.select_for_update(of=("self",))
+            .filter(student_id__in=student_ids, module_id__in=module_ids)
+            .annotate(course_id=F("module__course_id"))
+            .only("id", "student_id", "module_id", "progress", "status")
+        )
+        # bulk_update не отправляет сигналы: агрегаты по курсам обновляются явно
+        delta = ProgressDelta()
+        for enrollment in enrollments:
+            pair = (enrollment.student_id, enrollment.module_id)
+            progress = pending.get(pair)
+            if progress is None or progress <= enrollment.progress:
+                continue
+            delta.remove(enrollment.course_id, enrollment.student_id, enrollment.progress, enrollment.status)
+            enrollment.progress = min(progress, 100.0)
+            if enrollment.progress >= 100.0:
+                enrollment.status = "completed"
+            elif enrollment.status == "enrolled":
+                enrollment.status = "in_progress"
+            delta.add(enrollment.course_id, enrollment.student_id, enrollment.progress, enrollment.status)
+            changed.append(enrollment)
+        Enrollment.objects.bulk_update(changed, ["progress", "status"], batch_size=PROGRESS_BATCH_SIZE)
+        delta.apply()
+    return len(changed)
+
+
+@shared_task
+def cleanup_upload_sessions():
+    """Сборка мусора: брошенные сессии загрузки по частям"""
+    return cleanup_stale_sessions()
+
+
+@shared_task
+def collect_blobs():
+    """Сборка мусора: файлы хранилища, на которые больше не ссылается ни один материал"""
+    return collect_unreferenced_blobs()
+
+
+def schedule_media_processing(material):
+    """Обработка файла запускается после коммита и не входит во время ответа API"""
+    if material.file:
+        material_id = material.pk
+        transaction.on_commit(lambda: process_material_media.delay(material_id))
+
+
+@shared_task(soft_time_limit=MEDIA_SOFT_TIME_LIMIT, time_limit=MEDIA_TIME_LIMIT)
+def process_material_media(material_id):
+    """Извлекает метаданные файла материала; выполняется в отдельной очереди media"""
+    material = Material.objects.filter(pk=material_id).only("id", "file", "type").first()
+    if material is None or not material.file:
+        return None
+    metadata, _ = MaterialMetadata.objects.get_or_create(material=material)
+    try:
+        result = extract_metadata(material.file, material.type)
+    except SoftTimeLimitExceeded:
+        metadata.status, metadata.error = MaterialMetadata.FAILED, "Превышено время обработки"
+    except Exception as error:  # битый или неподдерживаемый файл не должен ронять воркер
+        metadata.status, metadata.error = MaterialMetadata.FAILED, str(error)
+    else:
+        thumbnail = result.pop("thumbnail", None)
+        for field, value in result.items():
+            setattr(metadata, field, value)
+        if thumbnail:
+            metadata.thumbnail.save(f"{material_id}.png", ContentFile(thumbnail), save=False)
+        metadata.status, metadata.error = MaterialMetadata.DONE, ""
+    metadata.processed_at = timezone.now()
+    metadata.save()
+    return metadata.status
+
+
+def schedule_outline_rebuild(course_ids):
+    """Пересборка снимков структуры после коммита; повторные изменения до запуска задачи схлопываются"""
+
+    def schedule():
+        for course_id in course_ids:
+            if cache.add(f"lm:outline:pending:{course_id}", 1, timeout=OUTLINE_DEDUP_TIMEOUT):
+                rebuild_course_outline.delay(course_id)
+
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if course_ids:
+        transaction.on_commit(schedule)
+
 
 @shared_task
-def send_letter(email="ussome@yandex.ru"):
-    send_mail("Новое письмо", "Материалы курса обновлены", EMAIL_HOST_USER, [email])
+def rebuild_course_outline(course_id):
+    # Флаг снимается до чтения данных, чтобы изменения во время сборки поставили новую задачу
+    cache.delete(f"lm:outline:pending:{course_id}")
+    build_course_outline(course_id)
 
 
 @shared_task
-def last_user_login():
-    today = timezone.now().today().date()
-    users = CustomUser.objects.filter(last__login__isnull=False, last__login__lt=today - timezone.timedelta(days=30))
-    if users:
-        for user in users:
-            user.is_active = False
-            user.save()
+def rebuild_bloom_filters():
+    """Пересборка фильтров Блума из базы: удаленные строки перестают давать ложноположительные ответы"""
+    return {name: rebuild_bloom_filter(name) for name in BLOOM_SOURCES}
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from lm.models import Material, UploadSession
+
+CHUNK_READ_SIZE = 1024 * 1024
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+
+
+class ChunkError(Exception):
+    """Часть файла не принята; offset сессии не изменился"""
+
+
+class OffsetMismatch(ChunkError):
+    """Клиент прислал часть не с того места; продолжать нужно с offset сессии"""
+
+
+class FinalizeConflict(ChunkError):
+    """Сессию уже завершает другой запрос"""
+
+
+class PartFile(File):
+    """
+    Принятый файл на диске. Как у TemporaryUploadedFile, хранилище переносит его на место
+    по temporary_file_path(), а не копирует.
+    """
+
+    def __init__(self, path):
+        super().__init__(open(path, "rb"), name=os.path.basename(path))
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def get_part_path(session):
+    return os.path.join(settings.MEDIA_ROOT, "uploads", f"{session.pk}.part")
+
+
+def chain_checksum(checksum, chunk_digest):
+    """Цепочка контрольных сумм: sha256(предыдущее значение + SHA-256 части в hex), начиная с пустой строки"""
+    return hashlib.sha256(f"{checksum}{chunk_digest}".encode()).hexdigest()
+
+
+def spool_chunk(session, offset, stream, checksum=None):
+    """
+    Читает часть файла от клиента во временный файл рядом с файлом сессии, не держа ее в памяти.
+    Медленный клиент читается без транзакции и блокировок. Возвращает временный файл, SHA-256 части и ее размер.
+    """
+    directory = os.path.dirname(get_part_path(session))
+    os.makedirs(directory, exist_ok=True)
+    spooled = tempfile.TemporaryFile(dir=directory)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        while True:
+            data = stream.read(CHUNK_READ_SIZE)
+            if not data:
+                break
+            written += len(data)
+            if offset + written > session.size:
+                raise ChunkError("Часть выходит за объявленный размер файла")
+            digest.update(data)
+            spooled.write(data)
+        if checksum and checksum.lower() != digest.hexdigest():
+            raise ChunkError("Контрольная сумма части не совпадает")
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled, digest.hexdigest(), written
+
+
+def write_chunk(session, offset, stream, checksum=None):
+    """
+    Дописывает часть файла с позиции offset.
+    Часть, оборванная или с неверной контрольной суммой, отбрасывается: клиент повторяет ее с того же offset.
+    Тело запроса сначала читается во временный файл (spool_chunk), затем в короткой транзакции
+    под блокировкой сессии проверяется offset и часть копируется в файл сессии.
+    Возвращает новый offset; при OffsetMismatch session.offset - текущая позиция.
+    """
+    if offset != session.offset:
+        raise OffsetMismatch(f"Ожидался offset {session.offset}")
+    spooled, chunk_digest, written = spool_chunk(session, offset, stream, checksum)
+    path = get_part_path(session)
+    with spooled, transaction.atomic():
+        locked = UploadSession.objects.select_for_update().filter(pk=session.pk).first()
+        if locked is None:
+            raise ChunkError("Загрузка уже завершена")
+        # Пока часть читалась, ту же позицию мог занять параллельный запрос
+        session.offset, session.checksum = locked.offset, locked.checksum
+        if offset != locked.offset:
+            raise OffsetMismatch(f"Ожидался offset {locked.offset}")
+        with open(path, "r+b" if os.path.exists(path) else "wb") as part:
+            part.seek(offset)
+            shutil.copyfileobj(spooled, part, CHUNK_READ_SIZE)
+            part.truncate(offset + written)
+        locked.offset = offset + written
+        locked.checksum = chain_checksum(locked.checksum, chunk_digest)
+        locked.save(update_fields=["offset", "checksum", "updated_at"])
+    session.offset, session.checksum, session.updated_at = locked.offset, locked.checksum, locked.updated_at
+    return session.offset
+
+
+def finalize(session, checksum):
+    """
+    Создает Material из полностью принятого файла и удаляет сессию.
+    checksum - цепочка контрольных сумм частей, посчитанная клиентом (chain_checksum).
+    Файл переносится в хранилище до транзакции и без копирования, в транзакции только записи в базе.
+    Если транзакция не удалась, файл в хранилище остается блобом без ссылок и удаляется сборщиком мусора.
+    """
+    if not checksum or checksum.lower() != session.checksum:
+        raise ChunkError("Контрольная сумма файла не совпадает")
+    path = get_part_path(session)
+    # Параллельное завершение той же сессии не найдет файл и получит ошибку
+    claimed_path = f"{path}.{uuid.uuid4().hex}"
+    try:
+        os.rename(path, claimed_path)
+    except FileNotFoundError:
+        raise FinalizeConflict("Загрузка уже завершается")
+
+    material = Material(
+        title=session.title,
+        content=session.content,
+        type=session.type,
+        uploaded_by=session.owner,
+        filename=session.filename,
+    )
+    try:
+        with PartFile(claimed_path) as part:
+            material.file.save(session.filename, part, save=False)
+    except BaseException:
+        if os.path.exists(claimed_path):
+            os.rename(claimed_path, path)
+        raise
+    try:
+        with transaction.atomic():
+            material.save()
+            session.delete()
+    except BaseException:
+        # Файл уже в хранилище: жесткая ссылка возвращает его сессии без копирования, завершение можно повторить
+        os.link(material.file.path, path)
+        raise
+    return material
+
+
+def cleanup_stale_sessions(ttl=UPLOAD_SESSION_TTL):
+    """Удаляет брошенные сессии и их недокачанные файлы"""
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - ttl)
+    removed = 0
+    for session in stale.iterator():
+        try:
+            os.remove(get_part_path(session))
+        except FileNotFoundError:
+            pass
+        session.delete()
+        removed += 1
+    return removed
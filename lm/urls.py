@@ -4,27 +4,47 @@ from drf_yasg.views import get_schema_view
 from rest_framework.permissions import AllowAny
 
 from lm.apps import LmConfig
+from lm.async_views import (
+    AsyncCourseDetailView,
+    AsyncCourseListView,
+    AsyncEducationalModuleDetailView,
+    AsyncEducationalModuleListView,
+    AsyncEnrollmentListView,
+    AsyncMaterialDetailView,
+    AsyncMaterialListView,
+)
 from lm.views import (
     CourseCreateView,
     CourseDeleteView,
     CourseDetailView,
     CourseListView,
+    CourseOutlineView,
+    CourseProgressView,
+    CourseStatsView,
     CourseUpdateView,
     EducationalModuleCreateView,
     EducationalModuleDeleteView,
     EducationalModuleDetailView,
     EducationalModuleListView,
     EducationalModuleUpdateView,
+    EnrollmentBulkCreateView,
     EnrollmentCreateView,
     EnrollmentDeleteView,
     EnrollmentDetailView,
     EnrollmentListView,
+    EnrollmentProgressView,
     EnrollmentUpdateView,
     MaterialCreateView,
     MaterialDeleteView,
     MaterialDetailView,
+    MaterialDownloadView,
     MaterialListView,
+    MaterialMetadataView,
     MaterialUpdateView,
+    MetricsView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UploadSessionFinalizeView,
 )
 
 app_name = LmConfig.name
@@ -42,6 +62,9 @@ schema_view = get_schema_view(
 urlpatterns = [
     path("courses/", CourseListView.as_view(), name="course-list"),
     path("courses/<int:pk>/", CourseDetailView.as_view(), name="course-detail"),
+    path("courses/<int:pk>/outline/", CourseOutlineView.as_view(), name="course-outline"),
+    path("courses/<int:pk>/progress/", CourseStatsView.as_view(), name="course-stats"),
+    path("courses/<int:pk>/progress/<int:student_id>/", CourseProgressView.as_view(), name="course-student-progress"),
     path("courses/create/", CourseCreateView.as_view(), name="course-create"),
     path("courses/<int:pk>/update/", CourseUpdateView.as_view(), name="course-update"),
     path("courses/<int:pk>/delete/", CourseDeleteView.as_view(), name="course-delete"),
@@ -52,14 +75,34 @@ urlpatterns = [
     path("modules/<int:pk>/delete/", EducationalModuleDeleteView.as_view(), name="module-delete"),
     path("materials/", MaterialListView.as_view(), name="material-list"),
     path("materials/<int:pk>/", MaterialDetailView.as_view(), name="material-detail"),
+    path("materials/<int:pk>/download/", MaterialDownloadView.as_view(), name="material-download"),
+    path("materials/<int:material_id>/metadata/", MaterialMetadataView.as_view(), name="material-metadata"),
     path("materials/create/", MaterialCreateView.as_view(), name="material-create"),
     path("materials/<int:pk>/update/", MaterialUpdateView.as_view(), name="material-update"),
+    path("materials/uploads/", UploadSessionCreateView.as_view(), name="material-upload-create"),
+    path("materials/uploads/<uuid:pk>/", UploadSessionDetailView.as_view(), name="material-upload-detail"),
+    path(
+        "materials/uploads/<uuid:pk>/finalize/",
+        UploadSessionFinalizeView.as_view(),
+        name="material-upload-finalize",
+    ),
     path("materials/<int:pk>/delete/", MaterialDeleteView.as_view(), name="material-delete"),
     path("enrollments/", EnrollmentListView.as_view(), name="enrollment-list"),
     path("enrollments/<int:pk>/", EnrollmentDetailView.as_view(), name="enrollment-detail"),
     path("enrollments/create/", EnrollmentCreateView.as_view(), name="enrollment-create"),
+    path("enrollments/bulk/", EnrollmentBulkCreateView.as_view(), name="enrollment-bulk-create"),
+    path("enrollments/progress/", EnrollmentProgressView.as_view(), name="enrollment-progress"),
     path("enrollments/<int:pk>/update/", EnrollmentUpdateView.as_view(), name="enrollment-update"),
     path("enrollments/<int:pk>/delete/", EnrollmentDeleteView.as_view(), name="enrollment-delete"),
+    # Асинхронные версии чтения рядом с синхронными, для сравнения под нагрузкой
+    path("async/courses/", AsyncCourseListView.as_view(), name="async-course-list"),
+    path("async/courses/<int:pk>/", AsyncCourseDetailView.as_view(), name="async-course-detail"),
+    path("async/modules/", AsyncEducationalModuleListView.as_view(), name="async-module-list"),
+    path("async/modules/<int:pk>/", AsyncEducationalModuleDetailView.as_view(), name="async-module-detail"),
+    path("async/materials/", AsyncMaterialListView.as_view(), name="async-material-list"),
+    path("async/materials/<int:pk>/", AsyncMaterialDetailView.as_view(), name="async-material-detail"),
+    path("async/enrollments/", AsyncEnrollmentListView.as_view(), name="async-enrollment-list"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
     path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
 ]
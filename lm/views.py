@@ -1,26 +1,106 @@
-from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, generics, permissions
+import io
 
-from lm.models import Course, EducationalModule, Enrollment, Material
-from lm.serializers import CourseSerializer, EducationalModuleSerializer, EnrollmentSerializer, MaterialSerializer
-from users.permissions import IsStudent, IsTeacherOrReadOnly
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, generics, permissions, status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from lm.cache import CachedResponseMixin, ConditionalGetMixin
+from lm.downloads import serve_file
+from lm.fastpath import ValuesListMixin
+from lm.fieldsets import SparseQuerysetMixin
+from lm.metrics import PROMETHEUS_CONTENT_TYPE, collect, render_prometheus
+from lm.models import (
+    Course,
+    CourseProgress,
+    CourseStats,
+    EducationalModule,
+    Enrollment,
+    Material,
+    MaterialMetadata,
+    UploadSession,
+)
+from lm.outline import get_course_outline
+from lm.progress import get_progress_buffer
+from lm.renderers import PrometheusRenderer
+from lm.search import FullTextSearchFilter
+from lm.serializers import (
+    BulkEnrollmentSerializer,
+    CourseOutlineSerializer,
+    CourseProgressSerializer,
+    CourseSerializer,
+    CourseStatsSerializer,
+    EducationalModuleSerializer,
+    EnrollmentSerializer,
+    MaterialMetadataSerializer,
+    MaterialSerializer,
+    ProgressEventSerializer,
+    UploadSessionSerializer,
+)
+from lm.tasks import schedule_media_processing
+from lm.uploads import ChunkError, FinalizeConflict, OffsetMismatch, finalize, write_chunk
+from users.access import get_request_access
+from users.authentication import MetricsTokenAuthentication
+from users.permissions import (
+    IsCourseProgressViewer,
+    IsMaterialParticipant,
+    IsOwnerOrStaff,
+    IsStaffOrMetricsScraper,
+    IsStudent,
+    IsTeacherOrReadOnly,
+)
+
+# Планы загрузки данных для чтения: только поля из сериализаторов, связи одним запросом
+COURSE_QUERYSET = Course.objects.only(*CourseSerializer.Meta.fields)
+MODULE_QUERYSET = EducationalModule.objects.only(
+    *(field for field in EducationalModuleSerializer.Meta.fields if field != "materials")
+).prefetch_related(Prefetch("materials", queryset=Material.objects.only("id")))
+MATERIAL_QUERYSET = Material.objects.only(*MaterialSerializer.Meta.fields)
+ENROLLMENT_QUERYSET = Enrollment.objects.only(*EnrollmentSerializer.Meta.fields)
 
 
 # Курсы
-class CourseListView(generics.ListAPIView):
-    queryset = Course.objects.all()
+class CourseListView(
+    ConditionalGetMixin, CachedResponseMixin, SparseQuerysetMixin, ValuesListMixin, generics.ListAPIView
+):
+    queryset = COURSE_QUERYSET
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    cache_namespaces = ("course",)
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ["title", "teacher"]
     search_fields = ["title", "description"]
     ordering_fields = ["created_at", "title"]
+    ordering = ["created_at", "id"]
+    cursor_ordering = ("created_at", "id")
 
 
-class CourseDetailView(generics.RetrieveAPIView):
-    queryset = Course.objects.all()
+class CourseDetailView(ConditionalGetMixin, CachedResponseMixin, SparseQuerysetMixin, generics.RetrieveAPIView):
+    queryset = COURSE_QUERYSET
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespaces = ("course",)
+
+
+class CourseOutlineView(generics.GenericAPIView):
+    """
+    Курс, его модули по порядку и описания материалов одним ответом.
+    Отдается готовый JSON-снимок из кэша, который пересобирается фоновой задачей при изменениях.
+    """
+
+    serializer_class = CourseOutlineSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        snapshot = get_course_outline(pk)
+        if snapshot is None:
+            raise NotFound("Курс не найден")
+        return HttpResponse(snapshot, content_type="application/json")
 
 
 class CourseCreateView(generics.CreateAPIView):
@@ -35,94 +115,230 @@ class CourseCreateView(generics.CreateAPIView):
 class CourseUpdateView(generics.UpdateAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
-    permission_classes = [IsTeacherOrReadOnly]
+    permission_classes = [IsTeacherOrReadOnly, IsOwnerOrStaff]
 
 
 class CourseDeleteView(generics.DestroyAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
-    permission_classes = [IsTeacherOrReadOnly]
+    permission_classes = [IsTeacherOrReadOnly, IsOwnerOrStaff]
 
 
 # Образовательные модули
-class EducationalModuleListView(generics.ListAPIView):
-    queryset = EducationalModule.objects.all()
+class EducationalModuleListView(
+    ConditionalGetMixin, CachedResponseMixin, SparseQuerysetMixin, ValuesListMixin, generics.ListAPIView
+):
+    queryset = MODULE_QUERYSET
     serializer_class = EducationalModuleSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    cache_namespaces = ("module",)
+    prefetch_fields = ("materials",)
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ["title", "author"]
     search_fields = ["title", "description"]
     ordering_fields = ["created_at", "title"]
+    # order_number повторяется в разных курсах: id делает порядок страниц однозначным.
+    # Курсор идет по тому же ключу, чтобы оба режима пагинации отдавали список в одном порядке
+    ordering = ["order_number", "id"]
+    cursor_ordering = ("order_number", "id")
 
 
-class EducationalModuleDetailView(generics.RetrieveAPIView):
-    queryset = EducationalModule.objects.all()
+class EducationalModuleDetailView(
+    ConditionalGetMixin, CachedResponseMixin, SparseQuerysetMixin, generics.RetrieveAPIView
+):
+    queryset = MODULE_QUERYSET
     serializer_class = EducationalModuleSerializer
     permission_classes = [permissions.IsAuthenticated]
-
-
-class EducationalModuleCreateView(generics.CreateAPIView):
+    cache_namespaces = ("module",)
+    prefetch_fields = ("materials",)
+    # Изменение состава materials не меняет updated_at модуля, поэтому только ETag
+    last_modified_is_exact = False
+
+
+class CourseOwnerMixin:
+    """
+    Модуль можно добавить или перенести только в курс, которым пользователь владеет,
+    и добавить в него только свои материалы: иначе чужой материал стал бы доступен для изменения.
+    """
+
+    def check_course_access(self, serializer):
+        access = get_request_access(self.request)
+        course = serializer.validated_data.get("course")
+        if course is not None and not access.can_edit(course):
+            raise PermissionDenied("Модули можно добавлять только в свои курсы")
+        materials = serializer.validated_data.get("materials", [])
+        # Уже входящие в модуль материалы (например, добавленные автором модуля) можно оставить
+        current = set(serializer.instance.materials.values_list("id", flat=True)) if serializer.instance else set()
+        if any(material.pk not in current and not access.can_edit(material) for material in materials):
+            raise PermissionDenied("В модуль можно добавлять только свои материалы")
+
+
+class EducationalModuleCreateView(CourseOwnerMixin, generics.CreateAPIView):
     queryset = EducationalModule.objects.all()
     serializer_class = EducationalModuleSerializer
     permission_classes = [IsTeacherOrReadOnly]
 
     def perform_create(self, serializer):
+        self.check_course_access(serializer)
         serializer.save(author=self.request.user)
 
 
-class EducationalModuleUpdateView(generics.UpdateAPIView):
+class EducationalModuleUpdateView(CourseOwnerMixin, generics.UpdateAPIView):
     queryset = EducationalModule.objects.all()
     serializer_class = EducationalModuleSerializer
-    permission_classes = [IsTeacherOrReadOnly]
+    permission_classes = [IsTeacherOrReadOnly, IsOwnerOrStaff]
+
+    def perform_update(self, serializer):
+        self.check_course_access(serializer)
+        serializer.save()
 
 
 class EducationalModuleDeleteView(generics.DestroyAPIView):
     queryset = EducationalModule.objects.all()
     serializer_class = EducationalModuleSerializer
-    permission_classes = [IsTeacherOrReadOnly]
+    permission_classes = [IsTeacherOrReadOnly, IsOwnerOrStaff]
 
 
 # Материалы
-class MaterialListView(generics.ListAPIView):
-    queryset = Material.objects.all()
+class MaterialListView(ConditionalGetMixin, SparseQuerysetMixin, ValuesListMixin, generics.ListAPIView):
+    queryset = MATERIAL_QUERYSET
     serializer_class = MaterialSerializer
     permission_classes = [permissions.IsAuthenticated]
+    search_fields = ["title", "content"]
+    ordering = ["uploaded_at", "id"]
+    cursor_ordering = ("uploaded_at", "id")
 
 
-class MaterialDetailView(generics.RetrieveAPIView):
-    queryset = Material.objects.all()
+class MaterialDetailView(ConditionalGetMixin, SparseQuerysetMixin, generics.RetrieveAPIView):
+    queryset = MATERIAL_QUERYSET
     serializer_class = MaterialSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
+class MaterialDownloadView(generics.GenericAPIView):
+    """Скачивание файла материала: через X-Accel-Redirect в nginx или потоково с поддержкой Range"""
+
+    queryset = Material.objects.only("id", "file", "filename", "uploaded_by")
+    permission_classes = [permissions.IsAuthenticated, IsMaterialParticipant]
+
+    def get(self, request, *args, **kwargs):
+        material = self.get_object()
+        if not material.file:
+            raise NotFound("У материала нет файла")
+        return serve_file(request, material.file, material.get_download_name())
+
+
 class MaterialCreateView(generics.CreateAPIView):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
     permission_classes = [IsTeacherOrReadOnly]
 
     def perform_create(self, serializer):
-        serializer.save(uploaded_by=self.request.user)
+        material = serializer.save(uploaded_by=self.request.user)
+        schedule_media_processing(material)
+
+
+class MaterialMetadataView(generics.RetrieveAPIView):
+    """Результаты фоновой обработки файла материала"""
+
+    queryset = MaterialMetadata.objects.select_related("material")
+    serializer_class = MaterialMetadataSerializer
+    permission_classes = [permissions.IsAuthenticated, IsMaterialParticipant]
+    lookup_field = "material_id"
+
+    def check_object_permissions(self, request, obj):
+        # Метаданные доступны тем же, кому доступен файл материала
+        super().check_object_permissions(request, obj.material)
+
+
+# Загрузка файлов материалов по частям
+class UploadSessionCreateView(generics.CreateAPIView):
+    """Начало загрузки: описание материала и полный размер файла"""
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsTeacherOrReadOnly]
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+
+class UploadSessionDetailView(generics.RetrieveAPIView):
+    """
+    GET - сколько байт уже принято (для возобновления после обрыва).
+    PUT - очередная часть файла в теле запроса, позиция в заголовке Upload-Offset,
+    необязательный SHA-256 части в заголовке Upload-Checksum.
+    """
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsTeacherOrReadOnly]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def put(self, request, *args, **kwargs):
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            raise ValidationError({"Upload-Offset": "Укажите позицию части в байтах"})
+
+        # Тело читается без транзакции; блокировка сессии берется только на запись части (lm.uploads.write_chunk)
+        session = get_object_or_404(self.get_queryset(), pk=kwargs["pk"])
+        try:
+            write_chunk(session, offset, request.stream or io.BytesIO(), request.headers.get("Upload-Checksum"))
+        except ChunkError as error:
+            code = status.HTTP_409_CONFLICT if isinstance(error, OffsetMismatch) else status.HTTP_400_BAD_REQUEST
+            return Response({"detail": str(error), "offset": session.offset}, status=code)
+        return Response(self.get_serializer(session).data)
+
+
+class UploadSessionFinalizeView(generics.GenericAPIView):
+    """
+    Завершение загрузки: создает материал из принятого файла.
+    Заголовок Upload-Checksum - цепочка контрольных сумм частей (lm.uploads.chain_checksum).
+    """
+
+    serializer_class = MaterialSerializer
+    permission_classes = [IsTeacherOrReadOnly]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def post(self, request, *args, **kwargs):
+        session = get_object_or_404(self.get_queryset(), pk=kwargs["pk"])
+        if not session.is_complete:
+            return Response(
+                {"detail": "Файл загружен не полностью", "offset": session.offset}, status=status.HTTP_409_CONFLICT
+            )
+        try:
+            material = finalize(session, request.headers.get("Upload-Checksum"))
+        except ChunkError as error:
+            code = status.HTTP_409_CONFLICT if isinstance(error, FinalizeConflict) else status.HTTP_400_BAD_REQUEST
+            return Response({"detail": str(error)}, status=code)
+        schedule_media_processing(material)
+        return Response(self.get_serializer(material).data, status=status.HTTP_201_CREATED)
 
 
 class MaterialUpdateView(generics.UpdateAPIView):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
-    permission_classes = [IsTeacherOrReadOnly]
+    permission_classes = [IsTeacherOrReadOnly, IsOwnerOrStaff]
 
 
 class MaterialDeleteView(generics.DestroyAPIView):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
-    permission_classes = [IsTeacherOrReadOnly]
+    permission_classes = [IsTeacherOrReadOnly, IsOwnerOrStaff]
 
 
 # Записи на модули
-class EnrollmentListView(generics.ListAPIView):
+class EnrollmentListView(ValuesListMixin, generics.ListAPIView):
     serializer_class = EnrollmentSerializer
     permission_classes = [IsStudent]
+    ordering = ["enrolled_at", "id"]
+    cursor_ordering = ("enrolled_at", "id")
 
     def get_queryset(self):
-        return Enrollment.objects.filter(student=self.request.user)
+        return ENROLLMENT_QUERYSET.filter(student=self.request.user)
 
 
 class EnrollmentDetailView(generics.RetrieveAPIView):
@@ -130,7 +346,7 @@ class EnrollmentDetailView(generics.RetrieveAPIView):
     permission_classes = [IsStudent]
 
     def get_queryset(self):
-        return Enrollment.objects.filter(student=self.request.user)
+        return ENROLLMENT_QUERYSET.filter(student=self.request.user)
 
 
 class EnrollmentCreateView(generics.CreateAPIView):
@@ -141,6 +357,37 @@ class EnrollmentCreateView(generics.CreateAPIView):
         serializer.save(student=self.request.user)
 
 
+class EnrollmentBulkCreateView(generics.GenericAPIView):
+    """Массовая запись студентов на модули одной транзакцией"""
+
+    serializer_class = BulkEnrollmentSerializer
+    permission_classes = [IsTeacherOrReadOnly]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_201_CREATED)
+
+
+class EnrollmentProgressView(generics.GenericAPIView):
+    """
+    Прием событий прогресса. События объединяются в буфере по паре студент-модуль
+    и записываются в Enrollment периодической задачей flush_progress.
+    """
+
+    serializer_class = ProgressEventSerializer
+    permission_classes = [IsStudent]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        events = {}
+        for event in serializer.validated_data:
+            events[event["module"]] = max(event["progress"], events.get(event["module"], 0.0))
+        get_progress_buffer().add(request.user.pk, events)
+        return Response({"accepted": len(events)}, status=status.HTTP_202_ACCEPTED)
+
+
 class EnrollmentUpdateView(generics.UpdateAPIView):
     serializer_class = EnrollmentSerializer
     permission_classes = [IsStudent]
@@ -155,3 +402,33 @@ class EnrollmentDeleteView(generics.DestroyAPIView):
 
     def get_queryset(self):
         return Enrollment.objects.filter(student=self.request.user)
+
+
+# Прогресс по курсам (агрегаты lm.rollups): одна строка по первичному или уникальному ключу
+class CourseStatsView(generics.RetrieveAPIView):
+    queryset = CourseStats.objects.all()
+    serializer_class = CourseStatsSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCourseProgressViewer]
+
+
+class CourseProgressView(generics.RetrieveAPIView):
+    queryset = CourseProgress.objects.select_related("course__stats")
+    serializer_class = CourseProgressSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCourseProgressViewer]
+
+    def get_object(self):
+        obj = get_object_or_404(self.get_queryset(), course_id=self.kwargs["pk"], student_id=self.kwargs["student_id"])
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+# Метрики
+class MetricsView(APIView):
+    """Метрики запросов в текстовом формате Prometheus: для staff или по заголовку Authorization: Bearer METRICS_TOKEN"""
+
+    authentication_classes = [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    permission_classes = [IsStaffOrMetricsScraper]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(render_prometheus(collect()), content_type=PROMETHEUS_CONTENT_TYPE)
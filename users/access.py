@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from lm.models import Course, EducationalModule, Enrollment, Material
+
+# Объекты, права на которые хранятся в профиле: метка модели -> множество ID для изменения
+EDITABLE_SETS = {
+    "lm.course": "courses",
+    "lm.educationalmodule": "modules",
+    "lm.material": "materials",
+}
+
+
+def access_key(user_id):
+    return f"users:access:{user_id}"
+
+
+class AccessProfile:
+    """
+    Права пользователя: роль и ID объектов, которыми он владеет или на которые записан.
+    Проверки прав на объект - поиск в множествах без запросов к базе.
+    """
+
+    SETS = ("courses", "modules", "materials", "enrolled_modules", "readable_materials")
+
+    def __init__(self, role, is_staff, **sets):
+        self.role = role
+        self.is_staff = is_staff
+        for name in self.SETS:
+            setattr(self, name, frozenset(sets.get(name, ())))
+
+    @classmethod
+    def load(cls, user):
+        """
+        courses - курсы преподавателя; modules - модули его курсов и созданные им;
+        materials - загруженные им: изменять материал может только загрузивший;
+        readable_materials - materials, материалы модулей его курсов и модулей, на которые он записан.
+        """
+        materials = set(Material.objects.filter(uploaded_by=user).values_list("id", flat=True))
+        shared_materials = EducationalModule.materials.through.objects.filter(
+            Q(educationalmodule__course__teacher=user) | Q(educationalmodule__enrollments__student=user)
+        ).values_list("material_id", flat=True)
+        return cls(
+            user.role,
+            user.is_staff,
+            courses=Course.objects.filter(teacher=user).values_list("id", flat=True),
+            modules=EducationalModule.objects.filter(Q(course__teacher=user) | Q(author=user)).values_list(
+                "id", flat=True
+            ),
+            materials=materials,
+            enrolled_modules=Enrollment.objects.filter(student=user).values_list("module_id", flat=True),
+            readable_materials=materials.union(shared_materials),
+        )
+
+    def to_dict(self):
+        return {
+            "role": self.role,
+            "is_staff": self.is_staff,
+            **{name: list(getattr(self, name)) for name in self.SETS},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def can_edit(self, obj):
+        if self.is_staff:
+            return True
+        return obj.pk in getattr(self, EDITABLE_SETS[obj._meta.label_lower])
+
+    def can_manage_course(self, course_id):
+        return self.is_staff or course_id in self.courses
+
+    def can_read_material(self, material_id):
+        return self.is_staff or material_id in self.readable_materials
+
+
+def get_access_profile(user):
+    """Профиль из общего кэша (Redis) или базы; хранится ACCESS_CACHE_TIMEOUT секунд и сбрасывается сигналами"""
+    key = access_key(user.pk)
+    data = cache.get(key)
+    if data is None:
+        profile = AccessProfile.load(user)
+        cache.set(key, profile.to_dict(), settings.ACCESS_CACHE_TIMEOUT)
+        return profile
+    return AccessProfile.from_dict(data)
+
+
+def get_request_access(request):
+    """Профиль пользователя запроса; в пределах запроса кэш читается один раз"""
+    profile = getattr(request, "_access_profile", None)
+    if profile is None:
+        profile = request._access_profile = get_access_profile(request.user)
+    return profile
+
+
+def invalidate_access(user_ids):
+    cache.delete_many([access_key(user_id) for user_id in user_ids if user_id is not None])
+
+
+def invalidate_access_on_commit(user_ids):
+    """
+    Сброс профилей после коммита: до него параллельный запрос прочитал бы из базы старые множества ID
+    и снова положил бы их в кэш. ID вычисляются сразу, пока связи еще можно прочитать.
+    """
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: invalidate_access(user_ids))
@@ -0,0 +1,168 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from lm.cache import get_async_cache
+from users.tokens import USER_CLAIMS
+
+# Состояние пользователя для проверки токенов с claims: блокировка и смена роли видны не позже чем через таймаут кэша
+AUTH_STATE_FIELDS = ("is_active", "role", "is_staff")
+
+
+def auth_state_key(user_id):
+    return f"users:auth_state:{user_id}"
+
+
+def get_auth_state_queryset(user_id):
+    return get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values(*AUTH_STATE_FIELDS)
+
+
+def get_auth_state(user_id):
+    """Поля AUTH_STATE_FIELDS из кэша или базы; пустой словарь - пользователя нет"""
+    key = auth_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = get_auth_state_queryset(user_id).first() or {}
+        cache.set(key, state, settings.AUTH_STATE_CACHE_TIMEOUT)
+    return state
+
+
+async def aget_auth_state(user_id):
+    async_cache = get_async_cache()
+    key = auth_state_key(user_id)
+    state = await async_cache.aget(key)
+    if state is None:
+        state = await get_auth_state_queryset(user_id).afirst() or {}
+        await async_cache.aset(key, state, settings.AUTH_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def invalidate_auth_state(user_ids):
+    cache.delete_many([auth_state_key(user_id) for user_id in user_ids])
+
+
+def check_auth_state(state, validated_token):
+    if not state:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if api_settings.CHECK_USER_IS_ACTIVE and not state["is_active"]:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if state["role"] != validated_token["role"] or state["is_staff"] != validated_token["is_staff"]:
+        raise AuthenticationFailed("Роль или права пользователя изменились, обновите токен", code="token_outdated")
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Пользователь строится из claims токена (users.tokens) без запроса к базе: экземпляр CustomUser
+    с загруженными id, username, role, is_active и is_staff, остальные поля догружаются при обращении.
+    Блокировка и смена роли проверяются по состоянию пользователя в кэше (AUTH_STATE_CACHE_TIMEOUT).
+    Токены без claims и режим CHECK_REVOKE_TOKEN обрабатываются как в JWTAuthentication.
+    """
+
+    def has_user_claims(self, validated_token):
+        return not api_settings.CHECK_REVOKE_TOKEN and all(
+            claim in validated_token for claim in (api_settings.USER_ID_CLAIM, *USER_CLAIMS)
+        )
+
+    def get_user(self, validated_token):
+        if not self.has_user_claims(validated_token):
+            return super().get_user(validated_token)
+        check_auth_state(get_auth_state(validated_token[api_settings.USER_ID_CLAIM]), validated_token)
+        return self.make_token_user(validated_token)
+
+    def make_token_user(self, validated_token):
+        claims = {api_settings.USER_ID_FIELD: validated_token[api_settings.USER_ID_CLAIM]}
+        claims.update((claim, validated_token[claim]) for claim in USER_CLAIMS)
+        # from_db ждет значения в порядке полей модели; недостающие поля становятся отложенными
+        # simplejwt хранит id строкой
+        fields = [field for field in self.user_model._meta.concrete_fields if field.attname in claims]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS,
+            [field.attname for field in fields],
+            [field.to_python(claims[field.attname]) for field in fields],
+        )
+
+
+class MetricsTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Сборщик метрик (Prometheus) передает заголовок Authorization: Bearer METRICS_TOKEN.
+    Ставится перед JWT: иначе этот заголовок разбирался бы как JWT и отклонялся. Пользователь анонимный.
+    """
+
+    def authenticate(self, request):
+        token = settings.METRICS_TOKEN
+        if token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return AnonymousUser(), None
+        return None
+
+    def authenticate_header(self, request):
+        # Без заголовка WWW-Authenticate DRF отвечал бы 403 вместо 401 на неверные учетные данные
+        return 'Bearer realm="api"'
+
+
+class AsyncJWTAuthentication(ClaimsJWTAuthentication):
+    """JWTAuthentication для асинхронных представлений: подпись проверяется в цикле событий, пользователь - через aget"""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """Те же проверки, что в ClaimsJWTAuthentication.get_user"""
+        if self.has_user_claims(validated_token):
+            check_auth_state(await aget_auth_state(validated_token[api_settings.USER_ID_CLAIM]), validated_token)
+            return self.make_token_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+async def aauthenticate(request):
+    """
+    Асинхронный аналог Request._authenticate: заполняет user, auth и успешный аутентификатор запроса DRF.
+    Аутентификаторы без aauthenticate вызываются в потоке.
+    """
+    for authenticator in request.authenticators:
+        try:
+            if hasattr(authenticator, "aauthenticate"):
+                result = await authenticator.aauthenticate(request)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(request)
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+        if result is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = result
+            return
+    request._not_authenticated()
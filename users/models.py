@@ -33,3 +33,6 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = "пользователь"
         verbose_name_plural = "пользователи"
+        indexes = [
+            models.Index(fields=["role"], name="users_role_idx"),
+        ]
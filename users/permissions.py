@@ -1,5 +1,8 @@
 from rest_framework import permissions
 
+from users.access import get_request_access
+from users.authentication import MetricsTokenAuthentication
+
 
 class IsTeacherOrReadOnly(permissions.BasePermission):
     """
@@ -20,3 +23,43 @@ class IsStudent(permissions.BasePermission):
 
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.is_student
+
+
+class IsOwnerOrStaff(permissions.BasePermission):
+    """
+    Изменять и удалять курс, модуль или материал может его владелец или персонал.
+    Владение проверяется по профилю прав пользователя (users.access) без запросов к базе.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return get_request_access(request).can_edit(obj)
+
+
+class IsMaterialParticipant(permissions.BasePermission):
+    """
+    Файл материала доступен загрузившему его, преподавателю курса с этим материалом
+    и студентам, записанным на модуль с этим материалом.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        return get_request_access(request).can_read_material(obj.pk)
+
+
+class IsCourseProgressViewer(permissions.BasePermission):
+    """Агрегаты прогресса курса видят его преподаватель и персонал, свой прогресс - сам студент"""
+
+    def has_object_permission(self, request, view, obj):
+        if getattr(obj, "student_id", None) == request.user.pk:
+            return True
+        return get_request_access(request).can_manage_course(obj.course_id)
+
+
+class IsStaffOrMetricsScraper(permissions.BasePermission):
+    """Метрики доступны персоналу (любой аутентификацией DRF, в том числе JWT) и по METRICS_TOKEN"""
+
+    def has_permission(self, request, view):
+        if isinstance(request.successful_authenticator, MetricsTokenAuthentication):
+            return True
+        return request.user.is_authenticated and request.user.is_staff
@@ -1,11 +1,19 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import IntegrityError, connections, transaction
+from django.db.models import OuterRef, Prefetch
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from lm.bloom import BloomUniqueValidator
+from lm.fieldsets import SparseFieldsMixin
+from lm.models import Course, EducationalModule, Enrollment
 
 from .models import CustomUser
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
-    authored_courses = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
-    authored_modules = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+class CustomUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    authored_courses = serializers.SerializerMethodField()
+    authored_modules = serializers.SerializerMethodField()
     enrolled_modules = serializers.SerializerMethodField("get_enrolled_modules")
 
     class Meta:
@@ -13,9 +21,70 @@ class CustomUserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email", "role", "authored_courses", "authored_modules", "enrolled_modules"]
         extra_kwargs = {"password": {"write_only": True}}
 
+    # Поля-методы для быстрой сериализации списков (lm.fastpath): поле -> (queryset, внешний ключ, значение)
+    values_relations = {
+        "authored_courses": (Course.objects.order_by("id"), "teacher_id", "id"),
+        "authored_modules": (EducationalModule.objects.order_by("id"), "author_id", "id"),
+        "enrolled_modules": (Enrollment.objects.order_by("id"), "student_id", "module_id"),
+    }
+
+    @staticmethod
+    def setup_eager_loading(queryset, fields=None):
+        """
+        Загружаем ID связанных объектов для всей страницы фиксированным числом запросов.
+        fields - выбранные поля (?fields= / ?exclude=): связи для остальных не загружаются.
+        """
+        fields = CustomUserSerializer.Meta.fields if fields is None else fields
+        queryset = queryset.only("id", "username", "email", "role")
+        if connections[queryset.db].vendor == "postgresql":
+            # На Postgres ID собираются в массивы прямо в основном запросе
+            annotations = {
+                "authored_courses": (
+                    "authored_course_ids",
+                    Course.objects.filter(teacher=OuterRef("pk")).order_by("id").values("id"),
+                ),
+                "authored_modules": (
+                    "authored_module_ids",
+                    EducationalModule.objects.filter(author=OuterRef("pk")).order_by("id").values("id"),
+                ),
+                "enrolled_modules": (
+                    "enrolled_module_ids",
+                    Enrollment.objects.filter(student=OuterRef("pk")).order_by("id").values("module_id"),
+                ),
+            }
+            return queryset.annotate(
+                **{name: ArraySubquery(subquery) for field, (name, subquery) in annotations.items() if field in fields}
+            )
+        prefetches = {
+            "authored_courses": Prefetch(
+                "authored_courses", queryset=Course.objects.only("id", "teacher_id").order_by("id")
+            ),
+            "authored_modules": Prefetch(
+                "authored_modules", queryset=EducationalModule.objects.only("id", "author_id").order_by("id")
+            ),
+            "enrolled_modules": Prefetch(
+                "enrollments", queryset=Enrollment.objects.only("id", "student_id", "module_id").order_by("id")
+            ),
+        }
+        return queryset.prefetch_related(*(prefetch for field, prefetch in prefetches.items() if field in fields))
+
+    def get_authored_courses(self, obj):
+        """Получаем ID курсов, которые ведет пользователь"""
+        if hasattr(obj, "authored_course_ids"):
+            return obj.authored_course_ids
+        return [course.id for course in obj.authored_courses.all()]
+
+    def get_authored_modules(self, obj):
+        """Получаем ID модулей, автором которых является пользователь"""
+        if hasattr(obj, "authored_module_ids"):
+            return obj.authored_module_ids
+        return [module.id for module in obj.authored_modules.all()]
+
     def get_enrolled_modules(self, obj):
         """Получаем ID модулей, на которые записан пользователь"""
-        return [enrollment.module.id for enrollment in obj.enrollments.all()]
+        if hasattr(obj, "enrolled_module_ids"):
+            return obj.enrolled_module_ids
+        return [enrollment.module_id for enrollment in obj.enrollments.all()]
 
 
 class CustomUserCreateSerializer(serializers.ModelSerializer):
@@ -25,5 +94,23 @@ class CustomUserCreateSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = ["username", "email", "password", "role"]
 
+    def build_standard_field(self, field_name, model_field):
+        """Проверки уникальности username и email сначала смотрят в фильтр Блума"""
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        field_kwargs["validators"] = [
+            (
+                BloomUniqueValidator(field_name, validator.queryset, validator.message, validator.lookup)
+                if isinstance(validator, UniqueValidator)
+                else validator
+            )
+            for validator in field_kwargs.get("validators", [])
+        ]
+        return field_class, field_kwargs
+
     def create(self, validated_data):
-        return CustomUser.objects.create_user(**validated_data)
+        try:
+            with transaction.atomic():
+                return CustomUser.objects.create_user(**validated_data)
+        except IntegrityError:
+            # Фильтр мог ответить "точно нет" до появления строки в параллельной транзакции
+            raise serializers.ValidationError({"detail": "Пользователь с таким username или email уже существует"})
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from lm.bloom import add_on_commit
+
+from .access import invalidate_access, invalidate_access_on_commit
+from .authentication import AUTH_STATE_FIELDS, invalidate_auth_state
+from .models import CustomUser
+
+BLOOM_FIELDS = ("username", "email")
+
+
+@receiver(post_save, sender=CustomUser)
+def add_user_to_bloom_filters(sender, instance, created, update_fields=None, **kwargs):
+    # Сохранения вроде обновления last_login не меняют уникальные поля
+    if not created and update_fields is not None and not set(update_fields) & set(BLOOM_FIELDS):
+        return
+    for field in BLOOM_FIELDS:
+        add_on_commit(field, [getattr(instance, field)])
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_caches(sender, instance, created, update_fields=None, **kwargs):
+    # Новый пользователь тоже сбрасывает кэш: ID могут переиспользоваться (SQLite после отката)
+    if not created and update_fields is not None and not set(update_fields) & set(AUTH_STATE_FIELDS):
+        return
+    invalidate_auth_state([instance.pk])
+    if created:
+        # Профиль чужого пользователя с тем же ID сбрасывается сразу: новому нечего читать до коммита
+        invalidate_access([instance.pk])
+    invalidate_access_on_commit([instance.pk])
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_deleted_user_caches(sender, instance, **kwargs):
+    invalidate_auth_state([instance.pk])
+    invalidate_access_on_commit([instance.pk])
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+# Поля пользователя в токене: по ним ClaimsJWTAuthentication строит пользователя без запроса к базе
+USER_CLAIMS = ("username", "role", "is_active", "is_staff")
+
+
+def add_user_claims(token, user):
+    for field in USER_CLAIMS:
+        token[field] = getattr(user, field)
+    return token
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    """Refresh-токен с ролью и флагами пользователя; access-токен копирует их из refresh"""
+
+    @classmethod
+    def for_user(cls, user):
+        return add_user_claims(super().for_user(user), user)
+
+
+class UserClaimsAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        return add_user_claims(super().for_user(user), user)
+
+
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = UserClaimsRefreshToken
+
+
+class UserClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Новый access-токен получает текущие роль и флаги пользователя, а не скопированные из refresh:
+    после смены роли достаточно обновить токен. Ротация refresh-токенов в проекте не используется.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = (
+            get_user_model()
+            .objects.filter(**{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)})
+            .first()
+        )
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        return {"access": str(add_user_claims(refresh.access_token, user))}
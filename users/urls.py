@@ -1,4 +1,5 @@
 from django.urls import path
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views import UserCreateAPIView, UserDeleteAPIView, UserDetailAPIView, UserListAPIView, UserUpdateAPIView
 
@@ -10,4 +11,6 @@ urlpatterns = [
     path("users/create/", UserCreateAPIView.as_view(), name="user-create"),
     path("users/<int:pk>/update/", UserUpdateAPIView.as_view(), name="user-update"),
     path("users/<int:pk>/delete/", UserDeleteAPIView.as_view(), name="user-delete"),
+    path("token/", TokenObtainPairView.as_view(), name="token-obtain"),
+    path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
 ]
@@ -0,0 +1,149 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from lm.apps import LmConfig
+from lm.models import Course, EducationalModule, Enrollment, Material
+
+from ..access import get_access_profile
+
+User = get_user_model()
+
+
+class AccessProfileTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@test.com", password="testpass123", role=User.TEACHER
+        )
+        self.other = User.objects.create_user(
+            username="other", email="other@test.com", password="testpass123", role=User.TEACHER
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@test.com", password="testpass123", role=User.STUDENT
+        )
+        self.course = Course.objects.create(title="Course", description="Description", teacher=self.owner)
+        self.module = EducationalModule.objects.create(
+            order_number=1, title="Module", description="Description", course=self.course, author=self.owner
+        )
+        self.material = Material.objects.create(
+            title="Material", content="Content", type="text", uploaded_by=self.owner
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_profile_sets(self):
+        self.module.materials.add(self.material)
+        Enrollment.objects.create(student=self.student, module=self.module)
+        owner = get_access_profile(self.owner)
+        self.assertEqual(owner.courses, {self.course.pk})
+        self.assertEqual(owner.modules, {self.module.pk})
+        self.assertEqual(owner.materials, {self.material.pk})
+        student = get_access_profile(self.student)
+        self.assertEqual(student.enrolled_modules, {self.module.pk})
+        self.assertTrue(student.can_read_material(self.material.pk))
+        self.assertFalse(student.can_edit(self.course))
+
+    def test_cached_profile_needs_no_queries(self):
+        get_access_profile(self.owner)
+        with self.assertNumQueries(0):
+            self.assertTrue(get_access_profile(self.owner).can_edit(self.course))
+
+    def test_only_owner_updates_course(self):
+        url = reverse(f"{LmConfig.name}:course-update", kwargs={"pk": self.course.pk})
+        data = {"title": "Updated", "description": "Description"}
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.put(url, data).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.owner)
+        self.assertEqual(self.client.put(url, data).status_code, status.HTTP_200_OK)
+
+    def test_only_owner_deletes_module_and_material(self):
+        self.client.force_authenticate(user=self.other)
+        for name, obj in (("module-delete", self.module), ("material-delete", self.material)):
+            url = reverse(f"{LmConfig.name}:{name}", kwargs={"pk": obj.pk})
+            self.assertEqual(self.client.delete(url).status_code, status.HTTP_403_FORBIDDEN)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.is_staff = True
+            self.other.save()
+        url = reverse(f"{LmConfig.name}:module-delete", kwargs={"pk": self.module.pk})
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_module_only_in_own_course(self):
+        self.client.force_authenticate(user=self.other)
+        response = self.client.post(
+            reverse(f"{LmConfig.name}:module-create"),
+            {"order_number": 2, "title": "Module", "description": "Description", "course": self.course.pk},
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_course_materials_are_readable_not_editable(self):
+        """Чужой материал в модуле своего курса преподаватель курса видит, но не изменяет"""
+        foreign = Material.objects.create(title="Foreign", content="Content", type="text", uploaded_by=self.other)
+        self.module.materials.add(foreign)
+        owner = get_access_profile(self.owner)
+        self.assertTrue(owner.can_read_material(foreign.pk))
+        self.assertFalse(owner.can_edit(foreign))
+        self.client.force_authenticate(user=self.owner)
+        url = reverse(f"{LmConfig.name}:material-delete", kwargs={"pk": foreign.pk})
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_module_only_with_own_materials(self):
+        """Чужой материал нельзя добавить в свой модуль, чтобы получить права на него"""
+        foreign = Material.objects.create(title="Foreign", content="Content", type="text", uploaded_by=self.other)
+        self.client.force_authenticate(user=self.owner)
+        data = {"order_number": 2, "title": "Module", "description": "Description", "course": self.course.pk}
+        response = self.client.post(
+            reverse(f"{LmConfig.name}:module-create"), {**data, "materials": [foreign.pk]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(foreign.educationalmodule_set.exists())
+
+        url = reverse(f"{LmConfig.name}:module-update", kwargs={"pk": self.module.pk})
+        response = self.client.patch(url, {"materials": [self.material.pk, foreign.pk]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(self.module.materials.exists())
+        response = self.client.patch(url, {"materials": [self.material.pk]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Материал, который уже в модуле, при изменении модуля можно оставить
+        self.module.materials.add(foreign)
+        response = self.client.patch(url, {"materials": [self.material.pk, foreign.pk]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_new_course_invalidates_profile(self):
+        """Профиль сбрасывается после коммита: до него из базы прочитались бы старые множества ID"""
+        get_access_profile(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(title="Other", description="Description", teacher=self.other)
+            self.assertNotIn(course.pk, get_access_profile(self.other).courses)
+        self.assertIn(course.pk, get_access_profile(self.other).courses)
+
+    def test_enrollment_and_module_materials_invalidate_profile(self):
+        """Запись на модуль и новый материал модуля сразу открывают доступ к файлу"""
+        self.assertFalse(get_access_profile(self.student).can_read_material(self.material.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, module=self.module)
+        self.assertFalse(get_access_profile(self.student).can_read_material(self.material.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.module.materials.add(self.material)
+        self.assertTrue(get_access_profile(self.student).can_read_material(self.material.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.educationalmodule_set.clear()
+        self.assertFalse(get_access_profile(self.student).can_read_material(self.material.pk))
+
+    def test_bulk_enrollment_invalidates_profile(self):
+        get_access_profile(self.student)
+        self.client.force_authenticate(user=self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(f"{LmConfig.name}:enrollment-bulk-create"),
+                {"students": [self.student.pk], "modules": [self.module.pk]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_access_profile(self.student).enrolled_modules, {self.module.pk})
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lm.apps import LmConfig
+from lm.models import Course
+from lm.tasks import INACTIVE_DAYS, last_user_login
+
+from ..authentication import AsyncJWTAuthentication, ClaimsJWTAuthentication
+from ..tokens import UserClaimsAccessToken, UserClaimsRefreshToken
+
+User = get_user_model()
+
+
+class ClaimsJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@test.com", password="testpass123", role=User.TEACHER
+        )
+        self.authentication = ClaimsJWTAuthentication()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_token_obtain_contains_claims(self):
+        response = self.client.post(
+            reverse("users:token-obtain"), {"username": "teacher", "password": "testpass123"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data["access"])
+        self.assertEqual(token["role"], User.TEACHER)
+        self.assertTrue(token["is_active"])
+        self.assertFalse(token["is_staff"])
+
+    def test_user_built_from_claims(self):
+        """После первого запроса состояние берется из кэша: пользователь строится без запросов к базе"""
+        token = UserClaimsAccessToken.for_user(self.teacher)
+        self.authentication.get_user(token)
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(token)
+            self.assertEqual(user.pk, self.teacher.pk)
+            self.assertTrue(user.is_teacher)
+            self.assertTrue(user.is_authenticated)
+        # Поля вне claims догружаются при обращении
+        self.assertEqual(user.email, "teacher@test.com")
+
+    def test_token_user_as_foreign_key(self):
+        token = UserClaimsAccessToken.for_user(self.teacher)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.post(
+            reverse(f"{LmConfig.name}:course-create"), {"title": "Course", "description": "Description"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Course.objects.get().teacher, self.teacher)
+
+    def test_tokens_without_claims_still_work(self):
+        token = AccessToken.for_user(self.teacher)
+        self.assertEqual(self.authentication.get_user(token), self.teacher)
+
+    def test_deactivation_by_task_rejects_token(self):
+        """last_user_login сбрасывает кэш состояния: заблокированный токен отклоняется сразу"""
+        User.objects.filter(pk=self.teacher.pk).update(last_login=timezone.now() - timedelta(days=INACTIVE_DAYS + 1))
+        token = UserClaimsAccessToken.for_user(self.teacher)
+        self.authentication.get_user(token)
+        last_user_login()
+        with self.assertRaises(AuthenticationFailed) as context:
+            self.authentication.get_user(token)
+        self.assertEqual(context.exception.detail["code"], "user_inactive")
+
+    def test_role_change_rejects_token(self):
+        token = UserClaimsAccessToken.for_user(self.teacher)
+        self.authentication.get_user(token)
+        self.teacher.role = User.STUDENT
+        self.teacher.save()
+        with self.assertRaises(AuthenticationFailed) as context:
+            self.authentication.get_user(token)
+        self.assertEqual(context.exception.detail["code"], "token_outdated")
+
+    def test_deleted_user_rejects_token(self):
+        token = UserClaimsAccessToken.for_user(self.teacher)
+        self.teacher.delete()
+        with self.assertRaises(AuthenticationFailed) as context:
+            self.authentication.get_user(token)
+        self.assertEqual(context.exception.detail["code"], "user_not_found")
+
+    def test_refresh_updates_claims(self):
+        refresh = UserClaimsRefreshToken.for_user(self.teacher)
+        self.teacher.role = User.STUDENT
+        self.teacher.save()
+        response = self.client.post(reverse("users:token-refresh"), {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data["access"])
+        self.assertEqual(token["role"], User.STUDENT)
+        self.assertTrue(self.authentication.get_user(token).is_student)
+
+    def test_refresh_rejects_inactive_user(self):
+        refresh = UserClaimsRefreshToken.for_user(self.teacher)
+        User.objects.filter(pk=self.teacher.pk).update(is_active=False)
+        response = self.client.post(reverse("users:token-refresh"), {"refresh": str(refresh)}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_user_built_from_claims(self):
+        token = UserClaimsAccessToken.for_user(self.teacher)
+        user = async_to_sync(AsyncJWTAuthentication().aget_user)(token)
+        self.assertEqual(user.pk, self.teacher.pk)
+        self.assertTrue(user.is_teacher)
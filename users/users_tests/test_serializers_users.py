@@ -2,7 +2,8 @@ import pytest
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from lm.models import Course, EducationalModule
+from lm.bloom import get_bloom_filter, rebuild_bloom_filter
+from lm.models import Course, EducationalModule, Enrollment
 
 from ..serializers import CustomUserCreateSerializer, CustomUserSerializer
 
@@ -53,6 +54,69 @@ class CustomUserSerializerTest(TestCase):
         serializer = CustomUserSerializer(instance=teacher)
         self.assertIn(module.id, serializer.data["authored_modules"])
 
+    def test_enrolled_modules_field(self):
+        teacher = CustomUser.objects.create_user(
+            username="teacher3", email="teacher3@example.com", password="pass123", role="teacher"
+        )
+        course = Course.objects.create(title="Test Course", description="Test Description", teacher=teacher)
+        module = EducationalModule.objects.create(
+            order_number=1, title="Test Module", description="Test Description", course=course, author=teacher
+        )
+        Enrollment.objects.create(student=self.user, module=module)
+        serializer = CustomUserSerializer(instance=self.user)
+        self.assertEqual(serializer.data["enrolled_modules"], [module.id])
+
+
+@pytest.mark.django_db
+class CustomUserSerializerEagerLoadingTest(TestCase):
+    def setUp(self):
+        self.teacher = CustomUser.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass123", role="teacher"
+        )
+        self.course = Course.objects.create(title="Test Course", description="Test Description", teacher=self.teacher)
+
+    def add_students(self, count):
+        for _ in range(count):
+            number = CustomUser.objects.count()
+            student = CustomUser.objects.create_user(
+                username=f"student{number}", email=f"student{number}@example.com", password="pass123"
+            )
+            module = EducationalModule.objects.create(
+                order_number=number,
+                title="Module",
+                description="Description",
+                course=self.course,
+                author=self.teacher,
+            )
+            Enrollment.objects.create(student=student, module=module)
+
+    def serialize_all(self):
+        queryset = CustomUserSerializer.setup_eager_loading(CustomUser.objects.all())
+        return CustomUserSerializer(queryset, many=True).data
+
+    def test_query_count_does_not_grow(self):
+        self.add_students(1)
+        with self.assertNumQueries(4):
+            self.serialize_all()
+        self.add_students(5)
+        with self.assertNumQueries(4):
+            data = self.serialize_all()
+        self.assertEqual(len(data), 7)
+
+    def test_same_output_as_lazy_loading(self):
+        self.add_students(3)
+        users = CustomUser.objects.order_by("id")
+        lazy = CustomUserSerializer(users, many=True).data
+        eager = CustomUserSerializer(CustomUserSerializer.setup_eager_loading(users), many=True).data
+        self.assertEqual(lazy, eager)
+
+    def test_only_selected_relations_are_loaded(self):
+        """Связи загружаются только для полей, выбранных через ?fields="""
+        self.add_students(3)
+        queryset = CustomUserSerializer.setup_eager_loading(CustomUser.objects.all(), ["id", "enrolled_modules"])
+        with self.assertNumQueries(2):
+            list(queryset)
+
 
 @pytest.mark.django_db
 class CustomUserCreateSerializerTest(TestCase):
@@ -73,3 +137,35 @@ class CustomUserCreateSerializerTest(TestCase):
         user = self.serializer.save()
         self.assertEqual(user.username, self.user_data["username"])
         self.assertEqual(user.email, self.user_data["email"])
+
+
+class CustomUserCreateBloomTest(TestCase):
+    def setUp(self):
+        CustomUser.objects.create_user(username="existing", email="existing@example.com", password="pass123")
+        for name in ("username", "email"):
+            rebuild_bloom_filter(name)
+
+    def tearDown(self):
+        for name in ("username", "email"):
+            get_bloom_filter(name).reset()
+
+    def test_new_values_skip_uniqueness_queries(self):
+        """Фильтр Блума отвечает "точно нет", и уникальность не проверяется запросом"""
+        data = {"username": "fresh", "email": "fresh@example.com", "password": "pass123"}
+        with self.assertNumQueries(0):
+            self.assertTrue(CustomUserCreateSerializer(data=data).is_valid())
+
+    def test_duplicates_are_rejected(self):
+        data = {"username": "existing", "email": "existing@example.com", "password": "pass123"}
+        serializer = CustomUserCreateSerializer(data=data)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {"username", "email"})
+
+    def test_created_user_is_added(self):
+        serializer = CustomUserCreateSerializer(data={"username": "new", "email": "new@example.com", "password": "x"})
+        self.assertTrue(serializer.is_valid())
+        # Значения попадают в фильтр после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        serializer = CustomUserCreateSerializer(data={"username": "new", "email": "new@example.com", "password": "x"})
+        self.assertFalse(serializer.is_valid())
@@ -30,7 +30,7 @@ class TestUserViews:
         self.client.force_authenticate(user=self.user)
         response = self.client.get(reverse("users:user-list"))
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) > 0
+        assert len(response.data["results"]) > 0
 
     def test_user_list_unauthenticated(self):
         """Тест получения списка пользователей (неаутентифицированный пользователь)"""
@@ -42,7 +42,7 @@ class TestUserViews:
         self.client.force_authenticate(user=self.user)
         response = self.client.get(reverse("users:user-list") + "?role=student")
         assert response.status_code == status.HTTP_200_OK
-        assert all(user["role"] == "student" for user in response.data)
+        assert all(user["role"] == "student" for user in response.data["results"])
 
     def test_user_detail_authenticated(self):
         """Тест получения деталей пользователя (аутентифицированный пользователь)"""
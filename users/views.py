@@ -1,28 +1,36 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
+from lm.fastpath import ValuesListMixin
+from lm.fieldsets import SparseQuerysetMixin
+
 from .models import CustomUser
 from .serializers import CustomUserCreateSerializer, CustomUserSerializer
 
 
-class UserListAPIView(generics.ListAPIView):
+class UserListAPIView(SparseQuerysetMixin, ValuesListMixin, generics.ListAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ["id"]
+    cursor_ordering = ("id",)
 
     def get_queryset(self):
-        queryset = CustomUser.objects.all()
+        queryset = CustomUserSerializer.setup_eager_loading(CustomUser.objects.all(), self.get_requested_fields())
         role = self.request.query_params.get("role", None)
         if role:
             queryset = queryset.filter(role=role)
         return queryset
 
 
-class UserDetailAPIView(generics.RetrieveAPIView):
+class UserDetailAPIView(SparseQuerysetMixin, generics.RetrieveAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return CustomUserSerializer.setup_eager_loading(CustomUser.objects.all(), self.get_requested_fields())
+
 
 class UserCreateAPIView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()